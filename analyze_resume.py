@@ -1,37 +1,51 @@
-from openai import OpenAI, OpenAIError
-from pdf_parser import parse_pdf
-from docx_parser import parse_docx
+from openai import OpenAIError
+from document import load_document
+from cache import get_default_cache, make_cache_key
+from incremental import MAX_DELTA_RUNS, build_delta_prompt, diff_inputs
+from json_stream import IncrementalJSONParser
+from llm_response import (REQUIRED_FIELDS, SCORE_FIELDS, acomplete_missing, complete_missing, parse_response,
+                          request_options)
+from openai_client import get_client
+from prompt_builder import count_tokens, prepare_inputs
+from tracing import span, token_usage, traced
+from dataclasses import dataclass
+from contextlib import nullcontext
+from functools import partial
+from typing import Callable
+import asyncio
+import contextvars
+import hashlib
 import json
+import logging
+import os
+import queue
+import threading
+import time
 
+logger = logging.getLogger(__name__)
 
-def analyze_resume(uploaded_file, job_description, api_key=None, use_mock=True):
-    """
-    Analyze resume vs job description.
-    Returns tuple: (resume_text, {"score": int, "suggestions": list[str], "improved_cv": str})
-    """
+MODEL = "gpt-4.1-nano"
+# Bump whenever the prompt below changes so cached results from the old prompt are not reused.
+PROMPT_VERSION = "2"
 
-    # 1️⃣ Parse uploaded file
-    filename = uploaded_file.name.lower()
-    try:
-        if filename.endswith(".pdf"):
-            resume_text = parse_pdf(uploaded_file)
-        elif filename.endswith(".docx"):
-            resume_text = parse_docx(uploaded_file)
-        else:  # txt, md, etc.
-            resume_text = uploaded_file.read().decode()
-    except Exception as e:
-        return resume_text, {"score": "Error parsing file", "suggestions": [str(e)], "improved_cv": ""}
+# Scores + recommendations and the CV rewrite as two concurrent calls, each with its own
+# model and cache entry; CV_MATCHER_SPLIT_ANALYSIS=0 goes back to the single combined prompt.
+SPLIT_ANALYSIS = os.environ.get("CV_MATCHER_SPLIT_ANALYSIS", "1") != "0"
+SCORING_MODEL = os.environ.get("CV_MATCHER_SCORING_MODEL", MODEL)
+REWRITE_MODEL = os.environ.get("CV_MATCHER_REWRITE_MODEL", MODEL)
+REWRITE_TEMPERATURE = float(os.environ.get("CV_MATCHER_REWRITE_TEMPERATURE", "0.2"))
+SCORING_PROMPT_VERSION = "1"
+REWRITE_PROMPT_VERSION = "1"
+DELTA_PROMPT_VERSION = "1"
 
-    # 2️⃣ Mock output (for dev/demo without API calls)
-    if use_mock or not api_key:
-        return resume_text, {
-            "score": 85,
-            "suggestions": [
-                "Highlight PyTorch and CatBoost",
-                "Explicitly mention LLMs in customer support automation",
-                "Add measurable business outcomes to bullets"
-            ],
-            "improved_cv": """# John Doe
+MOCK_RESULT = {
+    "score": 85,
+    "suggestions": [
+        "Highlight PyTorch and CatBoost",
+        "Explicitly mention LLMs in customer support automation",
+        "Add measurable business outcomes to bullets"
+    ],
+    "improved_cv": """# John Doe
 📧 john.doe@email.com | 📱 +123456789 | 🌐 linkedin.com/in/johndoe  
 
 ## Experience
@@ -41,11 +55,16 @@ def analyze_resume(uploaded_file, job_description, api_key=None, use_mock=True):
 ## Education
 - B.Sc. Computer Science — XYZ University  
 """
-        }
+}
+
 
-    # 3️⃣ Call OpenAI API
-    client = OpenAI(api_key=api_key)
-    prompt = f"""
+def parse_resume(uploaded_file) -> str:
+    """Extract plain text from an uploaded (or opened) PDF, DOCX or text file."""
+    return load_document(uploaded_file).text
+
+
+def build_prompt(resume_text: str, job_description: str) -> str:
+    return f"""
     You are a professional career consultant. Analyze the following resume against the job description.
     Your goal is to provide a **structured improvement plan** and then rewrite the resume so it matches the role better.
     
@@ -74,18 +93,441 @@ def analyze_resume(uploaded_file, job_description, api_key=None, use_mock=True):
     {job_description}
     """
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4.1-nano",
+
+def build_scoring_prompt(resume_text: str, job_description: str) -> str:
+    return f"""
+    You are a professional career consultant. Analyze the following resume against the job description
+    and provide a **structured improvement plan**.
+    
+    Respond ONLY with valid JSON in this schema:
+    
+    {{
+      "score": <integer 0-100>,
+      "skills_score": <integer 0-100>,
+      "education_score": <integer 0-100>,
+      "experience_score": <integer 0-100>,
+      "keyword_score": <integer 0-100>,
+      "formatting_score": <integer 0-100>,
+      "recommendations": {{
+          "Skills & Keywords": ["bullet 1", "bullet 2", "bullet 3"],
+          "Experience Relevance": ["bullet 1", "bullet 2"],
+          "Impact & Metrics": ["bullet 1", "bullet 2"],
+          "Formatting & Clarity": ["bullet 1"]
+      }}
+    }}
+    
+    Resume:
+    {resume_text}
+    
+    Job Description:
+    {job_description}
+    """
+
+
+def build_rewrite_prompt(resume_text: str, job_description: str) -> str:
+    return f"""
+    You are a professional career consultant. Rewrite the following resume so it matches the job description
+    better: lead with the most relevant experience, use the posting's keywords where they are true for the
+    candidate, and quantify impact. Never invent experience.
+    
+    Respond ONLY with valid JSON in this schema:
+    
+    {{
+      "improved_cv": "<resume rewritten in clean Markdown with clear sections>"
+    }}
+    
+    Resume:
+    {resume_text}
+    
+    Job Description:
+    {job_description}
+    """
+
+
+@dataclass(frozen=True)
+class AnalysisPart:
+    """One LLM call of an analysis: the result fields it produces and how it is requested."""
+    name: str
+    fields: tuple
+    build_prompt: Callable
+    model: str
+    prompt_version: str
+    temperature: float = 0.2
+
+    def cache_key(self, resume_text: str, job_description: str) -> str:
+        # The combined prompt keeps its original key so existing cache entries stay valid.
+        version = self.prompt_version if self.name == "full" else (
+            f"{self.name}-{self.prompt_version}-t{self.temperature}")
+        return make_cache_key(resume_text, job_description, self.model, version)
+
+
+def analysis_parts(split=None) -> list:
+    """The calls making up one analysis (see SPLIT_ANALYSIS)."""
+    if not (SPLIT_ANALYSIS if split is None else split):
+        return [AnalysisPart("full", REQUIRED_FIELDS, build_prompt, MODEL, PROMPT_VERSION)]
+    return [
+        AnalysisPart("scoring", SCORE_FIELDS + ("recommendations",), build_scoring_prompt, SCORING_MODEL,
+                     SCORING_PROMPT_VERSION),
+        AnalysisPart("rewrite", ("improved_cv",), build_rewrite_prompt, REWRITE_MODEL, REWRITE_PROMPT_VERSION,
+                     REWRITE_TEMPERATURE),
+    ]
+
+
+def delta_part(previous_result: dict, delta) -> AnalysisPart:
+    """Scores and recommendations updated for an edit (see incremental.py) instead of recomputed."""
+    previous_result = {name: previous_result[name] for name in SCORE_FIELDS + ("recommendations",)
+                       if name in previous_result}
+    # The answer depends on the earlier analysis and the edit, not only on the new inputs the cache key hashes.
+    conditioned_on = json.dumps([previous_result, delta.job_description.added, delta.job_description.removed,
+                                 delta.resume.added, delta.resume.removed], sort_keys=True, ensure_ascii=False)
+    version = f"{DELTA_PROMPT_VERSION}-{hashlib.sha256(conditioned_on.encode('utf-8')).hexdigest()[:16]}"
+    return AnalysisPart("delta", SCORE_FIELDS + ("recommendations",),
+                        partial(build_delta_prompt, previous_result=previous_result, delta=delta), SCORING_MODEL,
+                        version)
+
+
+def prepare_prompt_inputs(resume_text: str, job_description: str, pages=None):
+    """Compress both inputs to the prompt token budget. Returns a PromptBuild."""
+    with span("prompt") as prompt_span:
+        inputs = prepare_inputs(resume_text, job_description, pages=pages, model=MODEL)
+        prompt_span.set(input_tokens=inputs.input_tokens, tokens_saved=inputs.tokens_saved)
+    logger.info(
+        "prompt inputs: %d tokens (%d saved%s)",
+        inputs.input_tokens, inputs.tokens_saved, ", truncated to budget" if inputs.truncated else ""
+    )
+    return inputs
+
+
+def prepare_prompt(resume_text: str, job_description: str, pages=None, builder=build_prompt):
+    """Compress both inputs to the prompt token budget and render the prompt. Returns (prompt, PromptBuild)."""
+    inputs = prepare_prompt_inputs(resume_text, job_description, pages)
+    return builder(inputs.resume_text, inputs.job_description), inputs
+
+
+def error_result(message: str, score="Error") -> dict:
+    return {"score": score, "suggestions": [message], "improved_cv": ""}
+
+
+def finish_response(client, content, inputs, cache, cache_key, fields=REQUIRED_FIELDS, model=MODEL):
+    """
+    Parse the model output tolerantly, fetch only the fields it is missing, and cache the
+    result once complete. Returns (result, fields added by the follow-up).
+    """
+    with span("decode") as decode_span:
+        parsed = parse_response(content, fields=fields)
+        decode_span.set(method=parsed.method, missing=len(parsed.missing))
+    if not parsed.complete:
+        requested = list(parsed.missing)
+        with span("followup", fields=",".join(requested)):
+            parsed = complete_missing(client, model, parsed, inputs.resume_text, inputs.job_description)
+        added = [name for name in requested if name not in parsed.missing]
+    else:
+        added = []
+    if parsed.complete:
+        cache.set(cache_key, parsed.data)
+    if not parsed.usable:
+        return error_result("Could not read the analysis (missing: " + ", ".join(parsed.missing) + ")"), []
+    return parsed.data, added
+
+
+def failed_part(part: AnalysisPart, message: str) -> dict:
+    """Stand-in result for a part whose call failed."""
+    logger.warning("%s call failed: %s", part.name, message)
+    return error_result(message) if "score" in part.fields else {}
+
+
+def merge_parts(parts, results: dict) -> dict:
+    """Combine the per-part results into the single result schema the app expects."""
+    result = {}
+    for part in parts:
+        result.update(results[part.name])
+    result.setdefault("improved_cv", "")
+    return result
+
+
+async def _acomplete_part(client, part: AnalysisPart, inputs, limiter):
+    """One part's parsed result, with missing fields fetched by a follow-up call (see llm_response.py)."""
+    async with limiter:
+        response = await client.achat(
+            model=part.model,
+            messages=[{"role": "user", "content": part.build_prompt(inputs.resume_text, inputs.job_description)}],
+            temperature=part.temperature,
+            **request_options(part.fields)
+        )
+        parsed = parse_response(response.choices[0].message.content, fields=part.fields)
+        return await acomplete_missing(client, part.model, parsed, inputs.resume_text, inputs.job_description)
+
+
+async def aanalyze_document(client, document, job_description, cache, bypass_cache=False, split=None,
+                            semaphore=None):
+    """
+    Analyze a parsed resume with async calls (used by batch.py and service.py).
+
+    Returns (result, info); info holds "cached" and, when the API was called,
+    "prompt_tokens", "tokens_saved" and the "missing" fields that could not be recovered.
+    A failed scoring call raises; a failed rewrite leaves "improved_cv" empty. At most
+    `semaphore` calls are in flight when one is given.
+    """
+    resume_text = document.text
+    parts = analysis_parts(split)
+    results, pending = {}, []
+    for part in parts:
+        key = part.cache_key(resume_text, job_description)
+        cached = None if bypass_cache else cache.get(key)
+        if cached is not None:
+            results[part.name] = cached
+        else:
+            pending.append((part, key))
+    info = {"cached": not pending}
+    if pending:
+        inputs = await asyncio.to_thread(prepare_prompt_inputs, resume_text, job_description, document.page_texts)
+        info.update(prompt_tokens=inputs.input_tokens, tokens_saved=inputs.tokens_saved)
+        outcomes = await asyncio.gather(
+            *(_acomplete_part(client, part, inputs, semaphore or nullcontext()) for part, _ in pending),
+            return_exceptions=True)
+        missing = []
+        for (part, key), parsed in zip(pending, outcomes):
+            if isinstance(parsed, Exception):
+                if "score" in part.fields:
+                    raise parsed
+                # Scores without a rewrite are still a useful result.
+                results[part.name] = failed_part(part, f"{type(parsed).__name__}: {parsed}")
+                missing.extend(part.fields)
+                continue
+            if not parsed.usable:
+                raise ValueError("Could not read the analysis (missing: " + ", ".join(parsed.missing) + ")")
+            if parsed.complete:
+                cache.set(key, parsed.data)
+            else:
+                missing.extend(parsed.missing)
+            results[part.name] = parsed.data
+        if missing:
+            info["missing"] = missing
+    return merge_parts(parts, results), info
+
+
+def analyze_resume(uploaded_file, job_description, api_key=None, use_mock=True, cache=None, bypass_cache=False,
+                   split=None, previous=None):
+    """
+    Analyze resume vs job description.
+    Returns tuple: (resume_text, {"score": int, "suggestions": list[str], "improved_cv": str})
+
+    Successful results are stored in `cache` (the shared on-disk cache by default);
+    pass `bypass_cache=True` to force a fresh API call. `split` overrides SPLIT_ANALYSIS.
+    `previous` enables incremental re-analysis, see analyze_resume_stream.
+    """
+    resume_text, result = "", None
+    for event, payload in analyze_resume_stream(uploaded_file, job_description, api_key, use_mock, cache,
+                                                bypass_cache, split, previous):
+        if event == "resume_text":
+            resume_text = payload
+        elif event == "done":
+            result = payload
+    return resume_text, result
+
+
+def _result_events(data: dict):
+    """Replay a complete result as the same events the streaming path produces."""
+    for key, value in data.items():
+        if key == "recommendations" and isinstance(value, dict):
+            for section, bullets in value.items():
+                for bullet in bullets:
+                    yield "recommendation", (section, bullet)
+        elif key == "improved_cv":
+            yield "improved_cv", value
+        elif not isinstance(value, (dict, list)):
+            yield "field", (key, value)
+
+
+def _stream_part(client, part, prompt, inputs, cache, cache_key, emit) -> dict:
+    """Run one part as a streamed call, emitting events as values complete. Returns its result."""
+    parser = IncrementalJSONParser(stream_paths=[("improved_cv",)] if "improved_cv" in part.fields else ())
+    chunks = []
+    cv_streamed = False
+    with span("llm", part=part.name, model=part.model, stream=True) as llm_span:
+        started = time.perf_counter()
+        stream = client.chat(
+            model=part.model,
             messages=[{"role": "user", "content": prompt}],
-            temperature=0.2
+            temperature=part.temperature,
+            stream=True,
+            **request_options(part.fields)
         )
+        for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                llm_span.set(**token_usage(chunk.usage))
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            text = chunk.choices[0].delta.content
+            if not chunks:
+                llm_span.set(first_token_s=round(time.perf_counter() - started, 6))
+            chunks.append(text)
+            for kind, path, value in parser.feed(text):
+                if kind == "delta":
+                    cv_streamed = True
+                    emit(("improved_cv", value))
+                elif len(path) == 1 and path[0] in part.fields and path[0] != "improved_cv":
+                    emit(("field", (path[0], value)))
+                elif len(path) == 3 and path[0] == "recommendations" and "recommendations" in part.fields:
+                    emit(("recommendation", (path[1], value)))
+
+    data, added = finish_response(client, "".join(chunks), inputs, cache, cache_key, part.fields, part.model)
+    # A CV cut off mid-stream is only replaced in the final result, not appended to.
+    for event in _result_events({name: data[name] for name in added if name != "improved_cv" or not cv_streamed}):
+        emit(event)
+    return data
+
+
+def _part_worker(client, part, prompt, inputs, cache, cache_key, events):
+    try:
+        data = _stream_part(client, part, prompt, inputs, cache, cache_key, events.put)
+    except OpenAIError as e:
+        data = failed_part(part, str(e))
+    except Exception as e:
+        data = failed_part(part, f"{type(e).__name__}: {e}")
+    events.put(("part_done", (part.name, data)))
 
-        content = response.choices[0].message.content
 
-        # Parse JSON safely
-        data = json.loads(content)
-        return resume_text, data
+def _run_parts(parts, resume_text, job_description, document, api_key, cache, bypass_cache, inputs=None):
+    """
+    Yield the events of every part, from the cache where possible; the others run as
+    concurrent calls. Returns {part name: result}.
+    """
+    # Reuse previous results part by part: a new rewrite model does not re-pay for scoring.
+    results, pending = {}, []
+    for part in parts:
+        cache_key = part.cache_key(resume_text, job_description)
+        cached = None
+        if not bypass_cache:
+            with span("cache", part=part.name) as cache_span:
+                cached = cache.get(cache_key)
+                cache_span.set(hit=cached is not None)
+        if cached is not None:
+            results[part.name] = cached
+            yield from _result_events(cached)
+        else:
+            pending.append((part, cache_key))
+
+    if pending:
+        client = get_client(api_key)
+        inputs = inputs or prepare_prompt_inputs(resume_text, job_description, document.page_texts)
+        events = queue.Queue()
+        for part, cache_key in pending:
+            prompt = part.build_prompt(inputs.resume_text, inputs.job_description)
+            # Each worker runs in a copy of this context so its spans land in this trace.
+            threading.Thread(
+                target=contextvars.copy_context().run,
+                args=(_part_worker, client, part, prompt, inputs, cache, cache_key, events),
+                name=f"analysis-{part.name}", daemon=True,
+            ).start()
+        remaining = len(pending)
+        while remaining:
+            event, payload = events.get()
+            if event == "part_done":
+                results[payload[0]] = payload[1]
+                remaining -= 1
+            else:
+                yield event, payload
+    return results
+
+
+def delta_runs(previous) -> int:
+    """How many delta calls in a row produced the previous result (0 after a full analysis)."""
+    return (previous["result"].get("incremental") or {}).get("delta_runs", 0)
+
+
+def _reanalyze(delta, previous, document, resume_text, job_description, api_key, cache, bypass_cache, split):
+    """
+    Events of a re-analysis after a small edit: the previous result when nothing changed,
+    otherwise one delta call for the scores and recommendations and a new rewrite for the
+    edited inputs (the previous CV is kept, marked stale, only if that call fails). The
+    result's "incremental" entry reports the estimated savings.
+    """
+    started = time.perf_counter()
+    previous_result = {name: value for name, value in previous["result"].items() if name in REQUIRED_FIELDS}
+    inputs = prepare_prompt_inputs(resume_text, job_description, document.page_texts)
+    full_tokens = sum(count_tokens(part.build_prompt(inputs.resume_text, inputs.job_description))
+                      for part in analysis_parts(split))
+    report = {"mode": "reuse" if delta.unchanged else "delta", **delta.summary(),
+              "rewrite_reused": delta.unchanged, "rewrite_stale": False, "full_prompt_tokens": full_tokens,
+              "delta_runs": delta_runs(previous) + (0 if delta.unchanged else 1)}
+
+    parts, results = [], {}
+    if delta.unchanged:
+        results["previous"] = previous_result
+    else:
+        parts = [delta_part(previous_result, delta), analysis_parts(split=True)[1]]
+    for data in results.values():
+        yield from _result_events(data)
+    results.update((yield from _run_parts(parts, resume_text, job_description, document, api_key, cache,
+                                          bypass_cache, inputs)))
+
+    prompt_tokens = sum(count_tokens(part.build_prompt(inputs.resume_text, inputs.job_description))
+                        for part in parts)
+    report.update(prompt_tokens=prompt_tokens, tokens_saved=full_tokens - prompt_tokens,
+                  elapsed_s=round(time.perf_counter() - started, 3))
+    result = {}
+    for name in ("previous", "delta"):
+        result.update(results.get(name, {}))
+    if not delta.unchanged:
+        # Only the CV is taken from the rewrite call; a failed one must not replace the scores.
+        result["improved_cv"] = results.get("rewrite", {}).get("improved_cv", "")
+        if not result["improved_cv"]:
+            result["improved_cv"] = previous_result.get("improved_cv", "")
+            report.update(rewrite_reused=True, rewrite_stale=True)
+    result.setdefault("improved_cv", "")
+    result["incremental"] = report
+    logger.info("incremental re-analysis (%s, %d in a row): %d of %d prompt tokens", report["mode"],
+                report["delta_runs"], prompt_tokens, full_tokens)
+    yield "done", result
+
+
+@traced("analysis")
+def analyze_resume_stream(uploaded_file, job_description, api_key=None, use_mock=True, cache=None,
+                          bypass_cache=False, split=None, previous=None):
+    """
+    Streaming variant of analyze_resume. Yields (event, payload) tuples as soon as each part is known:
+
+    - ("resume_text", str) once the file is parsed
+    - ("field", (key, value)) for the overall score and each sub-score
+    - ("recommendation", (section, bullet)) for each finished recommendation
+    - ("improved_cv", str) chunks of the rewritten resume as they are generated
+    - ("done", dict) the complete result, same schema as analyze_resume
+
+    With the split analysis the scoring and rewrite calls run concurrently, so scores and
+    recommendations usually arrive while the CV is still being written.
+
+    `previous` ({"resume_text", "job_description", "result"} of an earlier run) enables
+    incremental re-analysis: after a small edit only the change is sent to the model
+    (see incremental.py).
+    """
+    try:
+        with span("parse"):
+            document = load_document(uploaded_file)
+    except Exception as e:
+        yield "resume_text", ""
+        yield "done", error_result(str(e), score="Error parsing file")
+        return
+    resume_text = document.text
+    yield "resume_text", resume_text
+
+    if use_mock or not api_key:
+        yield from _result_events(MOCK_RESULT)
+        yield "done", dict(MOCK_RESULT)
+        return
+
+    cache = cache or get_default_cache()
+    if previous and isinstance(previous.get("result", {}).get("score"), (int, float)):
+        with span("diff") as diff_span:
+            delta = diff_inputs(previous, resume_text, job_description)
+            diff_span.set(jd_change=delta.job_description.change, resume_change=delta.resume.change)
+        if delta.small and not delta.unchanged and delta_runs(previous) >= MAX_DELTA_RUNS:
+            logger.info("%d delta re-analyses in a row: running a full analysis", delta_runs(previous))
+        elif delta.small:
+            yield from _reanalyze(delta, previous, document, resume_text, job_description, api_key, cache,
+                                  bypass_cache, split)
+            return
 
-    except (OpenAIError, json.JSONDecodeError) as e:
-        return resume_text, {"score": "Error", "suggestions": [str(e)], "improved_cv": ""}
+    parts = analysis_parts(split)
+    results = yield from _run_parts(parts, resume_text, job_description, document, api_key, cache, bypass_cache)
+    yield "done", merge_parts(parts, results)
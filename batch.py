@@ -0,0 +1,244 @@
+"""
+Batch scoring: rank many resumes against one job description, or one resume against many.
+
+    python batch.py --jd posting.txt resumes/*.pdf > results.jsonl
+    python batch.py --resume cv.pdf postings/*.txt --concurrency 4
+
+Each result is written as one JSON line as soon as it completes; a failure in one
+item is reported on its own line and never aborts the rest of the batch.
+
+Resumes and job descriptions that are exact or near duplicates of an earlier one in the
+batch (the same CV as PDF and DOCX, a re-sent edit) reuse its analysis; see dedup.py.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import pdf_parser
+from analyze_resume import aanalyze_document
+from document import load_document
+from openai_client import get_client
+from scoring import LocalScorer
+from cache import get_default_cache
+from dedup import DEDUP_THRESHOLD, DedupIndex
+from candidate_store import get_candidate_store, owner_id
+
+DEFAULT_CONCURRENCY = 8
+
+
+def _read_document(path: str):
+    with open(path, "rb") as f:
+        return load_document(f)
+
+
+async def _analyze_item(client, semaphore, cache, bypass_cache, split, resume_path, document, jd_name, jd_text,
+                        store=None):
+    record = {"resume": resume_path, "job_description": jd_name}
+    started = time.perf_counter()
+    try:
+        document = await document
+        resume_text = document.text
+        data, info = await aanalyze_document(client, document, jd_text, cache, bypass_cache, split, semaphore)
+        record.update(info)
+        record.update(ok=True, score=data.get("score"), result=data)
+        if store is not None:
+            await asyncio.to_thread(store.add, resume_text, data, jd_text, os.path.basename(resume_path),
+                                    owner_id(client.api_key))
+    except Exception as e:
+        record.update(ok=False, error=f"{type(e).__name__}: {e}")
+    record["elapsed"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+async def _reuse_item(canonical, resume_path, jd_name, resume_match, jd_match):
+    """The record of a duplicate item: the canonical item's result, relabelled."""
+    record = dict(await canonical)
+    record.update(resume=resume_path, job_description=jd_name, elapsed=0.0,
+                  duplicate_of={"resume": record["resume"], "job_description": record["job_description"]})
+    if resume_match:
+        record["resume_similarity"] = resume_match.similarity
+    if jd_match:
+        record["job_description_similarity"] = jd_match.similarity
+    return record
+
+
+def _dedup_report(index: DedupIndex, duplicates: dict) -> dict:
+    return {"documents": len(index), "duplicates": len(duplicates), "clusters": index.clusters()}
+
+
+async def iter_batch(resume_paths, jd_items, api_key=None, base_url=None, concurrency=DEFAULT_CONCURRENCY,
+                     cache=None, bypass_cache=False, triage_top=None, jd_corpus=(), split=None,
+                     dedup_threshold=DEDUP_THRESHOLD, report=None, store=None):
+    """
+    Analyze every (resume, job description) combination and yield result records as they finish.
+
+    `jd_items` is a list of (name, text) pairs with distinct names. At most `concurrency` API calls are in flight
+    at once (retries and backoff are handled by the shared client, see openai_client.py);
+    each resume is parsed only once regardless of how many JDs it is scored against.
+    With `triage_top` and a single JD, resumes are ranked locally (see scoring.py) and only
+    the top N are analyzed by the LLM; the rest are reported with their local scores.
+    `jd_corpus` (texts of other postings) sharpens the local term weights. `split` overrides
+    analyze_resume.SPLIT_ANALYSIS (separate scoring and rewrite calls).
+
+    Resumes and job descriptions whose estimated similarity to an earlier one is at least
+    `dedup_threshold` (None disables this) reuse that item's analysis instead of calling
+    the LLM again; their records carry `duplicate_of`. The duplicate clusters are stored
+    in `report["dedup"]` when a `report` dict is passed. Analyzed items are indexed in
+    `store` (a candidate_store.CandidateStore) when given, under the API key's owner id.
+
+    The API client is the process-wide one from openai_client.get_client, which other
+    coroutines on the same loop may be using, so it is left open; whoever owns the event
+    loop closes it (see main).
+    """
+    jd_names = [name for name, _ in jd_items]
+    if len(set(jd_names)) != len(jd_names):
+        raise ValueError("job description names must be distinct (the CLI uses their paths)")
+    cache = cache or get_default_cache()
+    client = get_client(api_key, base_url)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    # Parse each resume once, off the event loop; items await the shared future.
+    parsed = {path: asyncio.ensure_future(asyncio.to_thread(_read_document, path)) for path in resume_paths}
+
+    documents = {}
+    if (triage_top and len(jd_items) == 1) or dedup_threshold is not None:
+        # Both stages need every resume's text up front; parsing still runs concurrently.
+        documents = dict(zip(resume_paths, await asyncio.gather(*parsed.values(), return_exceptions=True)))
+    texts = {path: doc.text for path, doc in documents.items() if not isinstance(doc, Exception)}
+
+    resume_duplicates, jd_duplicates = {}, {}
+    if dedup_threshold is not None:
+        resume_index, jd_index = DedupIndex(dedup_threshold), DedupIndex(dedup_threshold)
+        resume_duplicates = resume_index.assign(texts)
+        jd_duplicates = jd_index.assign(dict(jd_items))
+        if report is not None:
+            report["dedup"] = {"resumes": _dedup_report(resume_index, resume_duplicates),
+                               "job_descriptions": _dedup_report(jd_index, jd_duplicates)}
+
+    if triage_top and len(jd_items) == 1:
+        # Rank everything locally first and only send the best candidates to the LLM.
+        # Duplicates are not ranked themselves; they follow the resume they duplicate.
+        jd_name, jd_text = jd_items[0]
+        unique = {path: text for path, text in texts.items() if path not in resume_duplicates}
+        ranked = LocalScorer().fit([jd_text, *jd_corpus]).rank(unique, jd_text)
+        shortlisted = {path for path, _ in ranked[:triage_top]}
+        for path, local in ranked[triage_top:]:
+            for member in [path] + [p for p, match in resume_duplicates.items() if match.of == path]:
+                yield {"resume": member, "job_description": jd_name, "ok": True, "triaged_out": True,
+                       "score": local["score"], "local": local}
+        resume_paths = [path for path in resume_paths if path not in texts or path in shortlisted
+                        or (path in resume_duplicates and resume_duplicates[path].of in shortlisted)]
+
+    tasks, canonical = [], {}
+    for path in resume_paths:
+        for jd_name, jd_text in jd_items:
+            resume_match, jd_match = resume_duplicates.get(path), jd_duplicates.get(jd_name)
+            key = (resume_match.of if resume_match else path, jd_match.of if jd_match else jd_name)
+            if key in canonical:
+                task = _reuse_item(canonical[key], path, jd_name, resume_match, jd_match)
+            else:
+                task = _analyze_item(client, semaphore, cache, bypass_cache, split, path, parsed[path], jd_name,
+                                     jd_text, store)
+            tasks.append(asyncio.ensure_future(task))
+            canonical.setdefault(key, tasks[-1])
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def run_batch(resume_paths, jd_items, out=sys.stdout, **kwargs) -> dict:
+    """Stream results as JSONL to `out`; returns a summary of the run."""
+    summary = {"total": 0, "ok": 0, "failed": 0, "cached": 0, "triaged_out": 0, "reused": 0}
+    report = {}
+    async for record in iter_batch(resume_paths, jd_items, report=report, **kwargs):
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+        summary["total"] += 1
+        summary["ok" if record["ok"] else "failed"] += 1
+        summary["cached"] += bool(record.get("cached"))
+        summary["triaged_out"] += bool(record.get("triaged_out"))
+        summary["reused"] += "duplicate_of" in record
+    if "dedup" in report:
+        summary["duplicates"] = {kind: stats["duplicates"] for kind, stats in report["dedup"].items()}
+        summary["dedup"] = report["dedup"]
+    return summary
+
+
+def _load_jd(path: str):
+    # Named by path like the resumes: postings in different folders often share a file name.
+    with open(path, encoding="utf-8") as f:
+        return path, f.read()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score resumes against job descriptions in bulk.")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--jd", help="One job description file; positional arguments are resumes.")
+    mode.add_argument("--resume", help="One resume file; positional arguments are job description files.")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--output", "-o", help="JSONL output file (default: stdout).")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--api-key", default=os.environ.get("OPENAI_API_KEY"))
+    parser.add_argument("--base-url", default=os.environ.get("OPENAI_BASE_URL"),
+                        help="Override the API endpoint, e.g. a local stub (see llm_stub.py).")
+    parser.add_argument("--bypass-cache", action="store_true")
+    parser.add_argument("--triage-top", type=int,
+                        help="With --jd: rank resumes locally and only send the top N to the LLM.")
+    parser.add_argument("--jd-corpus", nargs="+", default=[], metavar="FILE",
+                        help="Other job descriptions used to weight terms for --triage-top.")
+    parser.add_argument("--parallel-pdf", action="store_true",
+                        help="Extract pages of long PDFs in a process pool.")
+    parser.add_argument("--single-call", dest="split", action="store_false", default=None,
+                        help="One combined prompt per item instead of separate scoring and rewrite calls.")
+    parser.add_argument("--dedup-threshold", type=float, default=DEDUP_THRESHOLD,
+                        help="Estimated similarity above which a resume / JD reuses an earlier one's analysis.")
+    parser.add_argument("--no-dedup", dest="dedup_threshold", action="store_const", const=None)
+    parser.add_argument("--dedup-report", metavar="FILE", help="Write the duplicate clusters as JSON to FILE.")
+    parser.add_argument("--store", action="store_true",
+                        help="Index the results in the candidate store (see candidate_store.py).")
+    args = parser.parse_args(argv)
+
+    if args.parallel_pdf:
+        pdf_parser.PARALLEL_EXTRACTION = True
+
+    if args.jd:
+        resume_paths, jd_items = args.files, [_load_jd(args.jd)]
+    else:
+        resume_paths, jd_items = [args.resume], [_load_jd(path) for path in args.files]
+
+    async def run():
+        try:
+            return await run_batch(
+                resume_paths, jd_items, out=out,
+                api_key=args.api_key, base_url=args.base_url,
+                concurrency=args.concurrency, bypass_cache=args.bypass_cache,
+                triage_top=args.triage_top, jd_corpus=[_load_jd(path)[1] for path in args.jd_corpus],
+                split=args.split, dedup_threshold=args.dedup_threshold,
+                store=get_candidate_store() if args.store else None,
+            )
+        finally:
+            # The loop is ours and ends with asyncio.run: release the client's connections to it.
+            await get_client(args.api_key, args.base_url).aclose()
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        summary = asyncio.run(run())
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    dedup = summary.pop("dedup", None)
+    if args.dedup_report and dedup:
+        with open(args.dedup_report, "w", encoding="utf-8") as f:
+            json.dump(dedup, f, indent=2)
+    print(json.dumps(summary), file=sys.stderr)
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Candidate store at scale: bulk indexing throughput and the latency of filtered full-text
+queries over a synthetic population of analyzed resumes.
+
+    python benchmarks/bench_candidate_store.py --count 100000
+    python benchmarks/bench_candidate_store.py --count 10000 --db /tmp/candidates.sqlite
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from candidate_store import CandidateStore
+from fixtures import make_cv_markdown
+from llm_response import SCORE_FIELDS
+
+QUERIES = [
+    "score > 80",
+    "mentions kubernetes",
+    "score > 80 and mentions kubernetes",
+    "score >= 70 and mentions kafka and mentions airflow",
+    "experience_score > 85 and skills_score > 85",
+    "machine learning and score > 60",
+    "mentions terraform and formatting_score < 50",
+]
+
+
+def synthetic_items(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    for i in range(count):
+        result = {field: rng.randint(20, 99) for field in SCORE_FIELDS}
+        yield make_cv_markdown(rng.randint(1, 4), seed=i), result, "Senior Data Engineer\nWe need Kafka.", f"cv_{i}.pdf"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=1000, help="Candidates per indexing transaction.")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--db", help="Database file (default: a temporary file).")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CandidateStore(args.db or os.path.join(tmp, "candidates.sqlite"))
+        started = time.perf_counter()
+        batch = []
+        for item in synthetic_items(args.count):
+            batch.append(item)
+            if len(batch) == args.batch:
+                store.add_many(batch)
+                batch = []
+        store.add_many(batch)
+        store.optimize()
+        elapsed = time.perf_counter() - started
+        print(f"indexed {store.count()} candidates in {elapsed:.1f}s ({args.count / elapsed:.0f}/s)")
+
+        # One more analysis landing on a large store: the incremental-indexing cost.
+        item = next(synthetic_items(1, seed=99))
+        started = time.perf_counter()
+        store.add(*item)
+        print(f"single add {(time.perf_counter() - started) * 1000:.2f}ms")
+
+        for query in QUERIES:
+            timings, hits = [], 0
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                hits = len(store.search(query, limit=20))
+                timings.append(time.perf_counter() - started)
+            timings.sort()
+            print(f"{query:<52} median {statistics.median(timings) * 1000:7.2f}ms  "
+                  f"p95 {timings[int(0.95 * (len(timings) - 1))] * 1000:7.2f}ms  ({hits} hits)")
+
+
+if __name__ == "__main__":
+    main()
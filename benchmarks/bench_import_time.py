@@ -0,0 +1,159 @@
+"""
+Cold-start cost: import time of every app module (from `python -X importtime`, each in
+a fresh interpreter) and the time to render the API key screen of a new session, which
+must stay under a target and must not load any of the heavy dependencies.
+
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --modules streamlit_app --top 15
+    python benchmarks/bench_import_time.py --target 0.3 --fail-over-target -o /tmp/imports.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ("plotly", "pandas", "numpy", "openai", "httpx", "docx", "reportlab", "PyPDF2")
+APP_MODULES = (
+    "analyze_resume", "batch", "bulk_export", "cache", "cv_markdown", "dedup", "document", "docx_parser",
+    "export", "governor", "jobs", "json_stream", "llm_response", "openai_client", "pdf_generator", "pdf_parser",
+    "prompt_builder", "scoring", "semantic", "service", "skill_index", "tracing", "utils",
+)
+# Seconds to run the script up to the API key screen in a fresh process, on top of
+# importing streamlit itself (which the app cannot avoid).
+KEY_SCREEN_TARGET_S = 0.3
+
+# Runs streamlit_app.py once with Streamlit's test harness, as a new session would.
+_KEY_SCREEN = """
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+loaded_before = set(sys.modules)
+app = AppTest.from_file("streamlit_app.py", default_timeout=60).run()
+rendered = time.perf_counter()
+print(json.dumps({
+    "streamlit_import_s": round(imported - started, 4),
+    "render_s": round(rendered - imported, 4),
+    "step": app.session_state["step"] if "step" in app.session_state else None,
+    "exceptions": [str(e.value) for e in app.exception],
+    "loaded": sorted(set(sys.modules) - loaded_before),
+}))
+"""
+
+
+def import_profile(code: str) -> dict:
+    """Run `code` under -X importtime in a fresh interpreter; rows are (module, self_us, cumulative_us, depth)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, capture_output=True,
+                          text=True)
+    rows, errors = [], []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            errors.append(line)
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():  # the header line
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2  # children are indented by two spaces per level
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return {"ok": proc.returncode == 0, "rows": rows, "stdout": proc.stdout,
+            "error": "\n".join(errors[-3:]) if proc.returncode else None}
+
+
+def subtree(rows, index: int) -> list:
+    """The row at `index` and everything it imported (importtime lists children first)."""
+    start = index
+    while start > 0 and rows[start - 1][3] > rows[index][3]:
+        start -= 1
+    return rows[start:index + 1]
+
+
+def heavy_modules(module_names) -> list:
+    return sorted({name.split(".")[0] for name in module_names} & set(HEAVY_MODULES))
+
+
+def by_package(rows, top: int) -> list:
+    """Self time summed per top-level package, largest first."""
+    totals = {}
+    for name, self_us, _, _ in rows:
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return [{"package": p, "self_ms": round(us / 1000, 2)}
+            for p, us in sorted(totals.items(), key=lambda item: -item[1])[:top]]
+
+
+def profile_module(module: str, top: int) -> dict:
+    profile = import_profile(f"import {module}")
+    index = next((i for i, row in enumerate(profile["rows"]) if row[0] == module and row[3] == 0), None)
+    rows = subtree(profile["rows"], index) if index is not None else []
+    report = {
+        "ok": profile["ok"],
+        "cumulative_ms": round(rows[-1][2] / 1000, 2) if rows else None,
+        "heavy": heavy_modules(row[0] for row in rows),
+        "packages": by_package(rows, top),
+    }
+    if not profile["ok"]:
+        report["error"] = profile["error"]
+    return report
+
+
+def profile_key_screen(top: int) -> dict:
+    profile = import_profile(_KEY_SCREEN)
+    if not profile["ok"]:
+        return {"ok": False, "error": profile["error"]}
+    result = json.loads(profile["stdout"].strip().splitlines()[-1])
+    loaded = set(result.pop("loaded"))
+    app_rows = [row for row in profile["rows"] if row[0] in loaded]
+    result.update(ok=True, heavy=heavy_modules(loaded), packages=by_package(app_rows, top))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=list(APP_MODULES) + ["streamlit_app"],
+                        help="Modules to profile; streamlit_app means the API key screen.")
+    parser.add_argument("--top", type=int, default=8, help="Packages listed per module.")
+    parser.add_argument("--target", type=float, default=KEY_SCREEN_TARGET_S,
+                        help="Seconds allowed to render the API key screen (after importing streamlit).")
+    parser.add_argument("--fail-over-target", action="store_true")
+    parser.add_argument("--output", "-o", help="Also write the report as JSON.")
+    args = parser.parse_args()
+
+    report = {"python": sys.version.split()[0], "modules": {}}
+    for module in args.modules:
+        if module == "streamlit_app":
+            continue
+        stats = report["modules"][module] = profile_module(module, args.top)
+        if stats["ok"]:
+            heavy = f"  loads {', '.join(stats['heavy'])}" if stats["heavy"] else ""
+            print(f"{module:<20} {stats['cumulative_ms']:>9.1f}ms{heavy}")
+        else:
+            print(f"{module:<20} import failed: {stats['error'].splitlines()[-1] if stats['error'] else '?'}")
+
+    failed = False
+    if "streamlit_app" in args.modules:
+        screen = report["key_screen"] = profile_key_screen(args.top)
+        if not screen["ok"]:
+            print(f"API key screen: could not run the app ({screen['error'].splitlines()[-1]})")
+            failed = True
+        else:
+            screen["target_s"] = args.target
+            screen["within_target"] = screen["render_s"] <= args.target and not screen["heavy"]
+            failed = not screen["within_target"]
+            print(f"\nAPI key screen: {screen['render_s'] * 1000:.0f} ms "
+                  f"(target {args.target * 1000:.0f} ms, streamlit import {screen['streamlit_import_s'] * 1000:.0f} ms)")
+            if screen["heavy"]:
+                print(f"  heavy modules loaded: {', '.join(screen['heavy'])}")
+            for package in screen["packages"]:
+                print(f"  {package['package']:<24} {package['self_ms']:>8.1f}ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 1 if failed and args.fail_over_target else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
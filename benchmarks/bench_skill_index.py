@@ -0,0 +1,91 @@
+"""
+Keyword coverage benchmark: the original `kw in resume_text_lower` loop vs. SkillIndex,
+with skill dictionaries of 10k+ entries.
+
+    python benchmarks/bench_skill_index.py --skills 10000 50000 --resume-words 2000
+"""
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from skill_index import SkillIndex
+
+REAL_SKILLS = ["python", "java", "javascript", "kubernetes", "machine learning", "sql", "spark",
+               "docker", "react", "aws", "terraform", "pytorch", "data engineering", "go"]
+
+
+def make_skills(n: int, rng: random.Random):
+    skills = list(REAL_SKILLS)
+    while len(skills) < n:
+        words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(rng.randint(1, 3))]
+        skills.append(" ".join(words))
+    return skills
+
+
+def make_resume(words: int, skills, rng: random.Random) -> str:
+    vocabulary = ["built", "led", "team", "pipeline", "service", "improved", "latency", "customers", "platform"]
+    tokens = []
+    while len(tokens) < words:
+        tokens.append(rng.choice(skills) if rng.random() < 0.05 else rng.choice(vocabulary))
+    return " ".join(tokens)
+
+
+def naive_coverage(skills, resume_text: str):
+    resume_text_lower = resume_text.lower()
+    return {kw: kw in resume_text_lower for kw in skills}
+
+
+def timed(fn):
+    started = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - started
+
+
+def run(skill_counts, resume_words: int, seed: int = 7):
+    rng = random.Random(seed)
+    results = []
+    for n in skill_counts:
+        skills = make_skills(n, rng)
+        resume = make_resume(resume_words, skills, rng) + " javascript developer"
+        naive, naive_s = timed(lambda: naive_coverage(skills, resume))
+        index, build_s = timed(lambda: SkillIndex(skills, aliases={}))
+        hits, find_s = timed(lambda: index.coverage(resume))
+        results.append({
+            "skills": n,
+            "resume_words": resume_words,
+            "naive_loop_s": naive_s,
+            "index_build_s": build_s,
+            "index_find_s": find_s,
+            "naive_matches": sum(naive.values()),
+            "index_matches": sum(1 for positions in hits.values() if positions),
+            # "java" inside "javascript" is the classic substring false positive.
+            "naive_java_false_positive": naive["java"] and "java " not in resume,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--skills", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--resume-words", type=int, default=2000)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results.")
+    args = parser.parse_args()
+
+    results = run(args.skills, args.resume_words)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'skills':>8} {'naive loop':>12} {'index build':>12} {'index find':>12} {'matches (naive/index)':>22}")
+    for row in results:
+        print(f"{row['skills']:>8} {row['naive_loop_s'] * 1000:>10.2f}ms {row['index_build_s'] * 1000:>10.2f}ms"
+              f" {row['index_find_s'] * 1000:>10.2f}ms {row['naive_matches']:>10}/{row['index_matches']}")
+
+
+if __name__ == "__main__":
+    main()
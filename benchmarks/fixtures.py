@@ -0,0 +1,118 @@
+"""
+Deterministic synthetic fixtures for the benchmarks: Markdown CVs of increasing size,
+the same CVs as PDF and DOCX, and a set of job descriptions.
+
+    python benchmarks/fixtures.py --out /tmp/cv_fixtures   # write them to disk to inspect
+"""
+import argparse
+import io
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from export import export_docx, export_pdf
+
+SIZES = {"small": 2, "medium": 6, "large": 24}  # roles per resume
+
+SKILLS = [
+    "Python", "SQL", "Spark", "Kafka", "Airflow", "dbt", "Docker", "Kubernetes", "Terraform", "AWS", "GCP",
+    "PyTorch", "TensorFlow", "scikit-learn", "pandas", "FastAPI", "PostgreSQL", "Redis", "React", "TypeScript",
+    "Go", "Java", "CI/CD", "machine learning", "data modeling", "A/B testing", "REST APIs", "GraphQL",
+]
+TITLES = ["Data Engineer", "Machine Learning Engineer", "Backend Engineer", "Data Scientist", "Platform Engineer"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Analytics", "Hooli", "Stark Industries", "Wayne Labs"]
+VERBS = ["Built", "Designed", "Led", "Migrated", "Automated", "Optimized", "Launched", "Scaled"]
+OBJECTS = ["streaming pipelines", "feature store", "recommendation service", "billing platform",
+           "data warehouse", "model serving stack", "internal analytics tooling", "ETL jobs"]
+
+EEO = ("We are an equal opportunity employer and value diversity. All qualified applicants will receive "
+       "consideration for employment without regard to race, color, religion, sex, sexual orientation, "
+       "gender identity, national origin, disability or veteran status.")
+
+
+class NamedBytesIO(io.BytesIO):
+    """In-memory upload with a file name, like Streamlit's UploadedFile."""
+
+    def __init__(self, data: bytes, name: str):
+        super().__init__(data)
+        self.name = name
+
+
+class Fixture:
+    def __init__(self, name: str, size: str, kind: str, data: bytes):
+        self.name = name
+        self.size = size
+        self.kind = kind
+        self.data = data
+
+    def open(self) -> NamedBytesIO:
+        return NamedBytesIO(self.data, self.name)
+
+
+def make_cv_markdown(roles: int, seed: int = 7) -> str:
+    """A CV in the Markdown shape the model returns, with `roles` positions."""
+    rng = random.Random(seed * 1000 + roles)
+    lines = ["# Jane Doe", "📧 jane.doe@example.com | 📞 +1 555 0100 | 🌐 linkedin.com/in/janedoe", "",
+             "## Summary",
+             f"{rng.choice(TITLES)} with {roles + 2} years of experience in {', '.join(rng.sample(SKILLS, 4))}.",
+             "", "## Experience"]
+    for i in range(roles):
+        lines.append(f"### {rng.choice(TITLES)} — {rng.choice(COMPANIES)} ({2024 - 2 * i - 2}–{2024 - 2 * i})")
+        for _ in range(rng.randint(3, 6)):
+            lines.append(f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} with {rng.choice(SKILLS)} and "
+                         f"{rng.choice(SKILLS)}, improving throughput by {rng.randint(10, 80)}%")
+        lines.append("")
+    lines += ["## Skills", "- " + ", ".join(rng.sample(SKILLS, 12)), "",
+              "## Education", "- M.Sc. Computer Science — Example University", ""]
+    return "\n".join(lines)
+
+
+def make_job_descriptions(seed: int = 7) -> dict:
+    """Job descriptions from a two-line posting to a long one full of boilerplate."""
+    rng = random.Random(seed)
+    short = f"Hiring a {TITLES[0]}: {', '.join(SKILLS[:5])}."
+    typical = "\n\n".join([
+        f"We are looking for a {TITLES[1]} to join our platform team.",
+        "Responsibilities:\n" + "\n".join(f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)}" for _ in range(6)),
+        "Requirements:\n" + "\n".join(f"- 3+ years with {skill}" for skill in rng.sample(SKILLS, 8)),
+        "Benefits:\n- Remote friendly\n- Learning budget",
+    ])
+    long = "\n\n".join([typical] + [
+        "Nice to have:\n" + "\n".join(f"- {skill}" for skill in rng.sample(SKILLS, 10)),
+        "About us:\n" + " ".join(f"We build {rng.choice(OBJECTS)} for customers worldwide." for _ in range(30)),
+        EEO,
+    ])
+    return {"short": short, "typical": typical, "long": long}
+
+
+def resume_corpus(sizes=None, seed: int = 7) -> list:
+    """One Markdown, PDF and DOCX fixture per size."""
+    fixtures = []
+    for size, roles in (sizes or SIZES).items():
+        markdown = make_cv_markdown(roles, seed)
+        fixtures.append(Fixture(f"resume_{size}.md", size, "md", markdown.encode("utf-8")))
+        fixtures.append(Fixture(f"resume_{size}.pdf", size, "pdf", export_pdf(markdown)))
+        fixtures.append(Fixture(f"resume_{size}.docx", size, "docx", export_docx(markdown)))
+    return fixtures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True, help="Directory to write the fixtures to.")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    for fixture in resume_corpus(seed=args.seed):
+        with open(os.path.join(args.out, fixture.name), "wb") as f:
+            f.write(fixture.data)
+    for name, text in make_job_descriptions(args.seed).items():
+        with open(os.path.join(args.out, f"jd_{name}.txt"), "w", encoding="utf-8") as f:
+            f.write(text)
+    print(f"Wrote fixtures to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Load test of the analysis service (service.py) against the local LLM stub: latency
+percentiles and throughput at increasing concurrency, plus how many upstream calls
+in-flight coalescing saved.
+
+By default it starts llm_stub.py in-process and service.py in a subprocess
+(needs uvicorn). Requests bypass the result cache, so every analysis that is not
+coalesced reaches the stub, and the rate-limit governor is off because the stub has
+no limits. Each level cycles through `--distinct` resumes, so concurrent requests
+for the same resume can be coalesced.
+
+    python benchmarks/load_service.py
+    python benchmarks/load_service.py --levels 1 8 32 128 --requests 400 --latency 0.5 --distinct 10
+    python benchmarks/load_service.py --url http://127.0.0.1:8080 -o /tmp/load.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+import llm_stub
+from fixtures import make_cv_markdown, make_job_descriptions
+
+
+def start_service(port: int, stub_url: str, tmp: str):
+    env = dict(os.environ, OPENAI_API_KEY="stub", CV_MATCHER_GOVERNOR="0",
+               CV_MATCHER_CACHE=os.path.join(tmp, "results.sqlite"))
+    return subprocess.Popen([sys.executable, "service.py", "--port", str(port), "--base-url", stub_url,
+                             "--concurrency", "256"], cwd=ROOT, env=env)
+
+
+async def wait_ready(client, url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get(f"{url}/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"service at {url} did not come up")
+        await asyncio.sleep(0.2)
+
+
+async def run_level(client, url: str, concurrency: int, count: int, resumes: list, job_description: str) -> dict:
+    latencies, errors = [], 0
+    indices = iter(range(count))
+
+    async def worker():
+        nonlocal errors
+        for i in indices:
+            started = time.perf_counter()
+            try:
+                response = await client.post(
+                    f"{url}/analyze",
+                    files={"resume": (f"cv_{i % len(resumes)}.txt", resumes[i % len(resumes)], "text/plain")},
+                    data={"job_description": job_description, "bypass_cache": "1"},
+                )
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    before = (await client.get(f"{url}/health")).json()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    after = (await client.get(f"{url}/health")).json()
+
+    latencies.sort()
+
+    def pct(p):
+        return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 4) if latencies else None
+
+    return {
+        "concurrency": concurrency, "requests": count, "ok": len(latencies), "errors": errors,
+        "p50_s": pct(0.5), "p99_s": pct(0.99), "throughput_rps": round(len(latencies) / elapsed, 1),
+        "upstream_calls": after["api"]["requests"] - before["api"]["requests"],
+        "coalesced": after["coalesced"] - before["coalesced"],
+    }
+
+
+async def run(args, url: str) -> list:
+    resumes = [make_cv_markdown(3, seed=i).encode() for i in range(args.distinct)]
+    job_description = make_job_descriptions()["typical"]
+    limits = httpx.Limits(max_connections=max(args.levels), max_keepalive_connections=max(args.levels))
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        await wait_ready(client, url)
+        await run_level(client, url, 1, 2, resumes, job_description)  # warm-up: imports, connections
+        rows = []
+        for level in args.levels:
+            row = await run_level(client, url, level, args.requests, resumes, job_description)
+            rows.append(row)
+            if not row["ok"]:
+                print(f"{level:>6} all {row['errors']} requests failed")
+                continue
+            print(f"{level:>6} {row['ok']:>6} {row['errors']:>6} {row['p50_s'] * 1000:>9.0f} "
+                  f"{row['p99_s'] * 1000:>9.0f} {row['throughput_rps']:>8.1f} {row['upstream_calls']:>9} "
+                  f"{row['coalesced']:>9}")
+        return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level.")
+    parser.add_argument("--distinct", type=int, default=20, help="Different resumes cycled through.")
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds the stub takes per completion.")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the service subprocess.")
+    parser.add_argument("--url", help="Test a running service instead of starting one.")
+    parser.add_argument("--output", "-o", help="Also write the results as JSON.")
+    args = parser.parse_args()
+
+    print(f"{'conc':>6} {'ok':>6} {'errors':>6} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>8} {'upstream':>9} "
+          f"{'coalesced':>9}")
+    if args.url:
+        rows = asyncio.run(run(args, args.url.rstrip("/")))
+    else:
+        stub = llm_stub.serve(port=0, latency=args.latency)
+        stub_url = f"http://127.0.0.1:{stub.server_address[1]}/v1"
+        with tempfile.TemporaryDirectory() as tmp:
+            service = start_service(args.port, stub_url, tmp)
+            try:
+                rows = asyncio.run(run(args, f"http://127.0.0.1:{args.port}"))
+            finally:
+                service.terminate()
+                service.wait()
+                stub.shutdown()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"latency_s": args.latency, "distinct": args.distinct, "levels": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
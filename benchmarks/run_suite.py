@@ -0,0 +1,211 @@
+"""
+Benchmark suite: times every stage of the pipeline on the synthetic fixtures and writes
+the results as JSON, so a regression in any stage shows up when two commits are compared.
+
+Covers parse_pdf / parse_docx, extract_keywords, normalize_cv_markdown,
+generate_pdf_from_markdown, export_pdf / export_docx, and analyze_resume end to end
+against the local LLM stub (llm_stub.py) with a configurable latency.
+
+    python benchmarks/run_suite.py                      # -> benchmarks/results/<commit>.json
+    python benchmarks/run_suite.py --quick --latency 0.05 -o /tmp/bench.json
+    python benchmarks/run_suite.py --compare benchmarks/results/1a2b3c4.json --fail-on-regression
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import document
+import llm_stub
+import tracing
+from analyze_resume import analyze_resume
+from cache import ResultCache
+from cv_markdown import parse_cv
+from docx_parser import parse_docx
+from export import export_docx, export_pdf
+from fixtures import SIZES, make_job_descriptions, resume_corpus
+from pdf_generator import generate_pdf_from_markdown
+from pdf_parser import parse_pdf
+from utils import extract_keywords, normalize_cv_markdown
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+REGRESSION_THRESHOLD = 0.25  # a stage 25% slower than the baseline counts as a regression
+
+
+def measure(fn, repeat: int, setup=None) -> dict:
+    """Run `fn` `repeat` times (after one warm-up call); `setup` runs untimed before each call."""
+    if setup:
+        setup()
+    fn()
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return summarize(timings)
+
+
+def summarize(timings) -> dict:
+    timings = sorted(timings)
+    return {
+        "runs": len(timings),
+        "min_s": round(timings[0], 6),
+        "median_s": round(statistics.median(timings), 6),
+        "p95_s": round(timings[min(len(timings) - 1, int(0.95 * len(timings)))], 6),
+    }
+
+
+def bench_stages(fixtures, job_descriptions, repeat: int) -> dict:
+    results = {}
+    for fixture in fixtures:
+        if fixture.kind == "pdf":
+            results[f"parse_pdf/{fixture.size}"] = measure(lambda: parse_pdf(fixture.open()), repeat)
+        elif fixture.kind == "docx":
+            results[f"parse_docx/{fixture.size}"] = measure(lambda: parse_docx(fixture.open()), repeat)
+        else:
+            markdown = fixture.data.decode("utf-8")
+            # parse_cv is memoized; clear it so every run pays for parsing like a fresh CV would.
+            results[f"normalize_cv_markdown/{fixture.size}"] = measure(
+                lambda: normalize_cv_markdown(markdown), repeat, setup=parse_cv.cache_clear)
+            results[f"generate_pdf_from_markdown/{fixture.size}"] = measure(
+                lambda: generate_pdf_from_markdown(markdown), repeat, setup=parse_cv.cache_clear)
+            results[f"export_pdf/{fixture.size}"] = measure(
+                lambda: export_pdf(markdown), repeat, setup=parse_cv.cache_clear)
+            results[f"export_docx/{fixture.size}"] = measure(
+                lambda: export_docx(markdown), repeat, setup=parse_cv.cache_clear)
+    for name, text in job_descriptions.items():
+        results[f"extract_keywords/{name}"] = measure(lambda: extract_keywords(text, top_n=20), repeat)
+    return results
+
+
+def bench_end_to_end(fixtures, job_description: str, runs: int, latency: float) -> dict:
+    """analyze_resume against the stub: wall time plus the per-stage split from the traces."""
+    server = llm_stub.serve(port=0, latency=latency)
+    previous_base_url = os.environ.get("OPENAI_BASE_URL")
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResultCache(os.path.join(tmp, "results.sqlite"))
+            for fixture in fixtures:
+                if fixture.kind != "pdf":
+                    continue
+                timings = []
+                tracing.recorder.reset()
+                for _ in range(runs + 1):  # the first run warms up the client connection
+                    document._cache.clear()
+                    started = time.perf_counter()
+                    _, result = analyze_resume(fixture.open(), job_description, api_key="stub", use_mock=False,
+                                               cache=cache, bypass_cache=True)
+                    timings.append(time.perf_counter() - started)
+                    if not isinstance(result.get("score"), (int, float)):
+                        raise RuntimeError(f"analyze_resume failed on {fixture.name}: {result}")
+                results[f"analyze_resume/{fixture.size}"] = summarize(timings[1:])
+                traces = tracing.recorder.recent(runs, name="analysis")
+                for stage in ("parse", "prompt", "llm", "decode"):
+                    stage_timings = [t.stages().get(stage, 0.0) for t in traces]
+                    results[f"analyze_resume/{fixture.size}/{stage}"] = summarize(stage_timings)
+    finally:
+        server.shutdown()
+        if previous_base_url is None:
+            os.environ.pop("OPENAI_BASE_URL", None)
+        else:
+            os.environ["OPENAI_BASE_URL"] = previous_base_url
+    return results
+
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: dict, baseline: dict, threshold: float = REGRESSION_THRESHOLD) -> list:
+    """Print median ratios against `baseline`; returns the names of regressed stages."""
+    regressions = []
+    print(f"{'stage':<48} {'baseline':>11} {'current':>11} {'ratio':>7}")
+    for name, stats in current["results"].items():
+        old = baseline["results"].get(name)
+        if not old or not old["median_s"]:
+            continue
+        ratio = stats["median_s"] / old["median_s"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<48} {old['median_s'] * 1000:>9.2f}ms {stats['median_s'] * 1000:>9.2f}ms {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", "-o", help="Result file (default: benchmarks/results/<commit>.json).")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--e2e-runs", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub LLM latency in seconds.")
+    parser.add_argument("--quick", action="store_true", help="Small and medium fixtures only, fewer runs.")
+    parser.add_argument("--compare", help="Baseline result file to compare against.")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    sizes = {k: v for k, v in SIZES.items() if k != "large"} if args.quick else SIZES
+    repeat = min(args.repeat, 3) if args.quick else args.repeat
+    e2e_runs = min(args.e2e_runs, 3) if args.quick else args.e2e_runs
+    fixtures = resume_corpus(sizes)
+    job_descriptions = make_job_descriptions()
+
+    commit = git_commit()
+    results = bench_stages(fixtures, job_descriptions, repeat)
+    results.update(bench_end_to_end(fixtures, job_descriptions["typical"], e2e_runs, args.latency))
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": repeat,
+            "e2e_runs": e2e_runs,
+            "stub_latency_s": args.latency,
+            "sizes": sizes,
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} results to {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions and args.fail_on_regression:
+            return 1
+    else:
+        for name, stats in results.items():
+            print(f"{name:<48} median {stats['median_s'] * 1000:>9.2f}ms  p95 {stats['p95_s'] * 1000:>9.2f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
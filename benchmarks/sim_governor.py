@@ -0,0 +1,186 @@
+"""
+Rate-limit governor under contention, on a simulated clock against a fake backend that
+enforces RPM / TPM over a sliding minute and answers 429 beyond it.
+
+One user runs a large batch while a few interactive users submit single analyses. Like
+batch.py, the batch keeps at most `--batch-concurrency` calls in flight, each taking
+`--latency` seconds once accepted. The same arrivals are replayed with and without the
+governor. The report shows 429s, calls that waited longer than the governor's MAX_WAIT,
+the busiest minute seen by the backend, and each user's queueing delay. It runs in well
+under a second because no real time passes.
+
+    python benchmarks/sim_governor.py
+    python benchmarks/sim_governor.py --rpm 60 --tpm 40000 --batch 300 --interactive 5
+    python benchmarks/sim_governor.py --batch-concurrency 200   # the whole batch queued at once
+"""
+import argparse
+import os
+import random
+import sys
+from collections import defaultdict, deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from governor import MAX_WAIT, Governor
+
+STEP = 0.05  # simulated seconds per tick
+
+
+class SimulatedClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class FakeBackend:
+    """Accepts a call only if the last 60 simulated seconds stay within both limits."""
+
+    def __init__(self, rpm: int, tpm: int, clock):
+        self.rpm, self.tpm, self.clock = rpm, tpm, clock
+        self.window = deque()  # (time, tokens) of accepted calls
+        self.accepted = self.rejected = 0
+        self.peak_rpm = self.peak_tpm = 0
+
+    def call(self, tokens: int) -> bool:
+        now = self.clock()
+        while self.window and self.window[0][0] <= now - 60:
+            self.window.popleft()
+        used = sum(t for _, t in self.window)
+        if len(self.window) + 1 > self.rpm or used + tokens > self.tpm:
+            self.rejected += 1
+            return False
+        self.window.append((now, tokens))
+        self.accepted += 1
+        self.peak_rpm = max(self.peak_rpm, len(self.window))
+        self.peak_tpm = max(self.peak_tpm, used + tokens)
+        return True
+
+
+def arrivals(batch: int, interactive: int, duration: float, seed: int):
+    """(time, user, estimated tokens, actual tokens), sorted by time."""
+    rng = random.Random(seed)
+    calls = [(0.0, "batch", 3000) for _ in range(batch)]
+    for user in range(interactive):
+        t = rng.uniform(0, 10)
+        while t < duration:
+            calls.append((t, f"user{user}", 2500))
+            t += rng.uniform(15, 45)
+    # Real usage differs from the up-front estimate; settle() corrects the charge.
+    return sorted((t, user, estimate, int(estimate * rng.uniform(0.6, 1.1))) for t, user, estimate in calls)
+
+
+def run(calls, rpm: int, tpm: int, governed: bool, max_retries: int = 4, batch_concurrency: int = 8,
+        latency: float = 5.0, max_wait: float = MAX_WAIT) -> dict:
+    clock = SimulatedClock()
+    backend = FakeBackend(rpm, tpm, clock)
+    governor = Governor(rpm=rpm, tpm=tpm, clock=clock, max_wait=max_wait)
+    pending = deque(call for call in calls if call[1] != "batch")
+    backlog = deque(call for call in calls if call[1] == "batch")
+    releases = []  # times at which accepted batch calls finish and free their slot
+    in_flight = 0  # batch calls submitted and not finished
+    tickets = {}  # ticket -> (actual tokens, attempt, first submitted)
+    retries = deque()  # ungoverned 429s: (retry at, user, actual tokens, attempt, first submitted)
+    waits = defaultdict(list)
+    failed = defaultdict(int)
+    timed_out = defaultdict(int)
+
+    def finish(user, ok: bool):
+        nonlocal in_flight
+        if user == "batch":
+            if ok:
+                releases.append(clock() + latency)
+            else:
+                in_flight -= 1
+
+    while pending or backlog or tickets or retries or releases:
+        in_flight -= sum(1 for t in releases if t <= clock())
+        releases[:] = [t for t in releases if t > clock()]
+        arrived = []
+        while pending and pending[0][0] <= clock():
+            arrived.append(pending.popleft())
+        while backlog and in_flight < batch_concurrency:
+            arrived.append(backlog.popleft())
+            in_flight += 1
+        for _, user, estimate, actual in arrived:
+            if governed:
+                tickets[governor.submit(user, estimate)] = (actual, 0, clock())
+            else:
+                retries.append((clock(), user, actual, 0, clock()))
+        if governed:
+            for ticket in governor.dispatch():
+                actual, attempt, submitted = tickets.pop(ticket)
+                if backend.call(actual):
+                    governor.settle(ticket, actual)
+                    waits[ticket.user].append(clock() - submitted)
+                    finish(ticket.user, True)
+                elif attempt < max_retries:  # as ManagedClient does, a retry is admitted again
+                    tickets[governor.submit(ticket.user, ticket.estimate)] = (actual, attempt + 1, submitted)
+                else:
+                    failed[ticket.user] += 1
+                    finish(ticket.user, False)
+            for ticket in [t for t in tickets if clock() - t.submitted_at >= governor.max_wait]:
+                governor.cancel(ticket)  # as acquire does when it raises GovernorTimeout
+                del tickets[ticket]
+                timed_out[ticket.user] += 1
+                finish(ticket.user, False)
+        else:
+            due = [r for r in retries if r[0] <= clock()]
+            for item in due:
+                retries.remove(item)
+                _, user, actual, attempt, submitted = item
+                if backend.call(actual):
+                    waits[user].append(clock() - submitted)
+                    finish(user, True)
+                elif attempt < max_retries:
+                    retries.append((clock() + min(30.0, 0.5 * 2 ** attempt * random.random()), user, actual,
+                                    attempt + 1, submitted))
+                else:
+                    failed[user] += 1
+                    finish(user, False)
+        clock.advance(STEP)
+    return {"backend": backend, "waits": waits, "failed": failed, "timed_out": timed_out, "elapsed": clock()}
+
+
+def report(name: str, outcome: dict):
+    backend = outcome["backend"]
+    print(f"\n{name}: {backend.accepted} calls accepted, {backend.rejected} 429s, "
+          f"{sum(outcome['failed'].values())} failed after retries, "
+          f"{sum(outcome['timed_out'].values())} timed out in the queue, {outcome['elapsed']:.0f}s simulated")
+    print(f"  busiest minute: {backend.peak_rpm} requests, {backend.peak_tpm} tokens")
+    for user in sorted(set(outcome["waits"]) | set(outcome["failed"]) | set(outcome["timed_out"])):
+        waits = sorted(outcome["waits"][user])
+        lost = f"failed {outcome['failed'][user]}  timed out {outcome['timed_out'][user]}"
+        if waits:
+            print(f"  {user:<10} {len(waits):>4} done  wait p50 {waits[len(waits) // 2]:7.1f}s  "
+                  f"p95 {waits[int(0.95 * (len(waits) - 1))]:7.1f}s  {lost}")
+        else:
+            print(f"  {user:<10}    0 done  {lost}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rpm", type=int, default=60)
+    parser.add_argument("--tpm", type=int, default=60_000)
+    parser.add_argument("--batch", type=int, default=200, help="Calls the batch user makes.")
+    parser.add_argument("--batch-concurrency", type=int, default=8, help="Batch calls in flight at once.")
+    parser.add_argument("--latency", type=float, default=5.0, help="Seconds an accepted call takes.")
+    parser.add_argument("--max-wait", type=float, default=MAX_WAIT, help="Seconds before a queued call gives up.")
+    parser.add_argument("--interactive", type=int, default=4, help="Interactive users submitting now and then.")
+    parser.add_argument("--duration", type=float, default=300, help="Seconds over which interactive calls arrive.")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    calls = arrivals(args.batch, args.interactive, args.duration, args.seed)
+    print(f"{len(calls)} calls, limits {args.rpm} RPM / {args.tpm} TPM")
+    options = dict(batch_concurrency=args.batch_concurrency, latency=args.latency, max_wait=args.max_wait)
+    report("without governor", run(calls, args.rpm, args.tpm, governed=False, **options))
+    report("with governor", run(calls, args.rpm, args.tpm, governed=True, **options))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Bulk export: render many improved CVs to PDF/DOCX in a process pool and stream them into
+a ZIP archive. Only a bounded number of documents is in flight at any time and each one
+is written to the archive as soon as it is rendered, so memory stays flat however large
+the batch is.
+
+    python bulk_export.py results.jsonl -o improved_cvs.zip --formats pdf docx
+
+(`results.jsonl` as written by batch.py.)
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import sys
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from export import export_docx
+from pdf_generator import generate_pdf_from_markdown
+
+RENDERERS = {
+    "pdf": generate_pdf_from_markdown,
+    "docx": export_docx,
+}
+
+
+def _render(fmt: str, text: str) -> bytes:
+    return RENDERERS[fmt](text)
+
+
+def _safe_name(name: str) -> str:
+    name = os.path.splitext(os.path.basename(name))[0]
+    return re.sub(r"[^\w.-]+", "_", name).strip("._") or "cv"
+
+
+def render_stream(items, formats=("pdf",), max_workers=None, max_in_flight=None):
+    """
+    Render (name, markdown) items and yield (archive_name, data, error) as each finishes.
+    `data` is None when rendering failed; `error` describes why.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * max_workers
+    used_names = set()
+    # Spawn, not fork: callers (the app, service.py) run threads, and a forked child can
+    # inherit a lock one of them held and hang.
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        pending = {}
+        items = iter(items)
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < max_in_flight:
+                try:
+                    name, text = next(items)
+                except StopIteration:
+                    exhausted = True
+                    break
+                base = _safe_name(name)
+                unique, n = base, 1
+                while unique in used_names:
+                    n += 1
+                    unique = f"{base}-{n}"
+                used_names.add(unique)
+                for fmt in formats:
+                    pending[executor.submit(_render, fmt, text)] = f"{unique}.{fmt}"
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                archive_name = pending.pop(future)
+                try:
+                    yield archive_name, future.result(), None
+                except Exception as e:
+                    yield archive_name, None, f"{type(e).__name__}: {e}"
+
+
+def write_zip(items, out, formats=("pdf",), progress=None, **kwargs) -> dict:
+    """
+    Render `items` into a ZIP written to `out` (a path or a writable binary file, which
+    need not be seekable). `progress(done, archive_name, ok)` is called after each document.
+    Returns {"written": [...], "failed": [{"name", "error"}]}; failures are also listed in
+    `_failures.json` inside the archive.
+    """
+    report = {"written": [], "failed": []}
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for done, (archive_name, data, error) in enumerate(render_stream(items, formats, **kwargs), start=1):
+            if data is None:
+                report["failed"].append({"name": archive_name, "error": error})
+            else:
+                archive.writestr(archive_name, data)
+                report["written"].append(archive_name)
+            if progress is not None:
+                progress(done, archive_name, data is not None)
+        if report["failed"]:
+            archive.writestr("_failures.json", json.dumps(report["failed"], indent=2))
+    return report
+
+
+class _ChunkSink:
+    """Write-only, unseekable file object that hands written bytes back out in chunks."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def iter_zip(items, formats=("pdf",), progress=None, **kwargs):
+    """Yield the ZIP archive as byte chunks, e.g. as a streaming HTTP response body."""
+    sink = _ChunkSink()
+    failed = []
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for done, (archive_name, data, error) in enumerate(render_stream(items, formats, **kwargs), start=1):
+            if data is None:
+                failed.append({"name": archive_name, "error": error})
+            else:
+                archive.writestr(archive_name, data)
+            if progress is not None:
+                progress(done, archive_name, data is not None)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+        if failed:
+            archive.writestr("_failures.json", json.dumps(failed, indent=2))
+    yield sink.drain()
+
+
+def _batch_items(path: str):
+    """(resume name, improved_cv) pairs from a batch.py JSONL file, skipping failed records."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            cv = (record.get("result") or {}).get("improved_cv")
+            if record.get("ok") and cv:
+                name = record["resume"]
+                if record.get("job_description"):
+                    name = f"{_safe_name(name)}__{_safe_name(record['job_description'])}"
+                yield name, cv
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export improved CVs from a batch run into a ZIP archive.")
+    parser.add_argument("results", help="JSONL file written by batch.py")
+    parser.add_argument("--output", "-o", required=True)
+    parser.add_argument("--formats", nargs="+", choices=sorted(RENDERERS), default=["pdf"])
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args(argv)
+
+    def progress(done, name, ok):
+        print(f"[{done}] {'ok  ' if ok else 'FAIL'} {name}", file=sys.stderr)
+
+    report = write_zip(_batch_items(args.results), args.output, args.formats, progress=progress,
+                       max_workers=args.workers)
+    print(json.dumps({"written": len(report["written"]), "failed": len(report["failed"])}), file=sys.stderr)
+    return 0 if not report["failed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
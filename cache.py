@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.environ.get("CV_MATCHER_CACHE", os.path.join(".cache", "results.sqlite"))
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_TTL = 7 * 24 * 3600  # one week
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so cosmetic differences don't produce new cache keys."""
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def make_cache_key(resume_text: str, job_description: str, model: str, prompt_version: str) -> str:
+    """Content-addressed key for one analysis: sha256 over all inputs that affect the output."""
+    h = hashlib.sha256()
+    for part in (normalize_text(resume_text), normalize_text(job_description), model, prompt_version):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Persistent analysis cache backed by a single SQLite file.
+    Entries expire after `ttl` seconds; once `max_entries` is exceeded the
+    least recently used rows are evicted.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results(accessed_at)")
+
+    def _connect(self):
+        # A fresh connection per operation keeps the cache safe to share
+        # between Streamlit script threads.
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT value, created_at FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: dict):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        if self.ttl:
+            conn.execute("DELETE FROM results WHERE created_at < ?", (now - self.ttl,))
+        if self.max_entries:
+            conn.execute(
+                "DELETE FROM results WHERE key IN ("
+                " SELECT key FROM results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM results")
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+_default_cache = None
+
+
+def get_default_cache() -> ResultCache:
+    """Process-wide cache shared by every Streamlit session."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResultCache()
+    return _default_cache
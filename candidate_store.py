@@ -0,0 +1,256 @@
+"""
+Persistent store of analyzed candidates, searchable across sessions.
+
+With CV_MATCHER_INDEX_CANDIDATES=1 every successful analysis is indexed as it lands: the
+parsed resume text, its extracted keywords, and the score breakdown. Indexing is off by
+default because resumes are personal data. Each row belongs to an owner (a hash of the API
+key that ran the analysis), and the app only searches the current key's candidates.
+Full-text search uses an SQLite FTS5 index (kept in sync by triggers) ranked by BM25, and
+score filters use ordinary column indexes:
+
+    store = get_candidate_store()
+    owner = owner_id(api_key)
+    store.add(resume_text, result, job_description=jd, name="jane_doe.pdf", owner=owner)
+    store.search("score > 80 and mentions kubernetes", owner=owner)
+    store.search("python spark", min_score=70, owner=owner)
+
+    python candidate_store.py "score >= 75 and mentions kafka and experience_score > 60"
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+from cache import normalize_text
+from llm_response import SCORE_FIELDS
+from utils import extract_keywords
+
+logger = logging.getLogger(__name__)
+
+INDEX_CANDIDATES = os.environ.get("CV_MATCHER_INDEX_CANDIDATES", "0") == "1"
+CANDIDATES_DB_PATH = os.environ.get("CV_MATCHER_CANDIDATES_DB", os.path.join(".cache", "candidates.sqlite"))
+KEYWORDS_PER_RESUME = 30
+DEFAULT_LIMIT = 20
+
+_COMPARISON = re.compile(r"^(\w+)\s*(>=|<=|!=|=|>|<)\s*(\d+(?:\.\d+)?)$")
+_MENTIONS = re.compile(r"^(?:mentions|has)\s+(.+)$", re.IGNORECASE)
+_AND = re.compile(r"\s+and\s+", re.IGNORECASE)
+_FTS_WORD = re.compile(r"[\w+#.]+")
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def owner_id(api_key) -> str:
+    """The owner of the candidates indexed with `api_key`, so the key itself is never stored."""
+    return hashlib.sha256((api_key or "").encode()).hexdigest()[:16]
+
+
+def _phrase(term: str) -> str:
+    """An FTS5 phrase for `term`: its words in order, with no query syntax left in it."""
+    words = _FTS_WORD.findall(term.strip().strip('"').lower())
+    return '"' + " ".join(words) + '"' if words else ""
+
+
+def parse_query(query: str):
+    """
+    "score > 80 and mentions kubernetes and python" -> (["kubernetes", "python"], [("score", ">", 80)]).
+
+    Clauses are joined by "and": `<score field> <op> <number>` filters on a score, and
+    `mentions <term>` (or any other text) must appear in the resume or its keywords.
+    """
+    terms, filters = [], []
+    for clause in _AND.split(query.strip()) if query.strip() else []:
+        clause = clause.strip()
+        comparison = _COMPARISON.match(clause)
+        if comparison and comparison.group(1).lower() in SCORE_FIELDS:
+            filters.append((comparison.group(1).lower(), comparison.group(2), float(comparison.group(3))))
+            continue
+        mentions = _MENTIONS.match(clause)
+        terms.append(mentions.group(1) if mentions else clause)
+    return terms, filters
+
+
+class CandidateStore:
+    """
+    Candidates keyed by owner and (resume, job description) content hash; re-analyzing the
+    same pair updates its row instead of adding a duplicate.
+    """
+
+    def __init__(self, path=CANDIDATES_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        score_columns = "".join(f" {name} INTEGER," for name in SCORE_FIELDS)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(candidates)")]
+            if columns and "owner" not in columns:
+                # Rows from before owners existed could be searched by anyone; drop them.
+                logger.warning("dropping %s: candidates indexed without an owner", path)
+                conn.executescript("DROP TABLE IF EXISTS candidates_fts; DROP TABLE candidates;")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS candidates ("
+                " id INTEGER PRIMARY KEY,"
+                " owner TEXT NOT NULL,"
+                " resume_hash TEXT NOT NULL,"
+                " jd_hash TEXT NOT NULL,"
+                " name TEXT NOT NULL,"
+                " job_title TEXT NOT NULL,"
+                f"{score_columns}"
+                " keywords TEXT NOT NULL,"
+                " resume_text TEXT NOT NULL,"
+                " result TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " UNIQUE (owner, resume_hash, jd_hash))"
+            )
+            for name in SCORE_FIELDS:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS candidates_{name} ON candidates({name})")
+            conn.execute("CREATE INDEX IF NOT EXISTS candidates_owner ON candidates(owner, score)")
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS candidates_fts USING fts5("
+                " resume_text, keywords, content='candidates', content_rowid='id',"
+                " tokenize=\"porter unicode61 tokenchars '+#'\")"
+            )
+            # External-content FTS: these triggers keep the index in step with the table.
+            conn.executescript("""
+                CREATE TRIGGER IF NOT EXISTS candidates_ai AFTER INSERT ON candidates BEGIN
+                    INSERT INTO candidates_fts (rowid, resume_text, keywords)
+                    VALUES (new.id, new.resume_text, new.keywords);
+                END;
+                CREATE TRIGGER IF NOT EXISTS candidates_ad AFTER DELETE ON candidates BEGIN
+                    INSERT INTO candidates_fts (candidates_fts, rowid, resume_text, keywords)
+                    VALUES ('delete', old.id, old.resume_text, old.keywords);
+                END;
+                CREATE TRIGGER IF NOT EXISTS candidates_au AFTER UPDATE ON candidates BEGIN
+                    INSERT INTO candidates_fts (candidates_fts, rowid, resume_text, keywords)
+                    VALUES ('delete', old.id, old.resume_text, old.keywords);
+                    INSERT INTO candidates_fts (rowid, resume_text, keywords)
+                    VALUES (new.id, new.resume_text, new.keywords);
+                END;
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def _row(resume_text, result, job_description, name, owner, now):
+        scores = [result.get(field) if isinstance(result.get(field), (int, float)) else None
+                  for field in SCORE_FIELDS]
+        job_title = next((line.strip() for line in job_description.splitlines() if line.strip()), "")[:200]
+        keywords = " ".join(extract_keywords(resume_text, top_n=KEYWORDS_PER_RESUME))
+        return (owner, _hash(resume_text), _hash(job_description), name, job_title, *scores, keywords, resume_text,
+                json.dumps(result), now)
+
+    def add_many(self, items, owner: str = "") -> int:
+        """Index (resume_text, result, job_description, name) tuples in one transaction; returns the count."""
+        now = time.time()
+        rows = [self._row(resume_text, result, job_description or "", name or "", owner, now)
+                for resume_text, result, job_description, name in items
+                if isinstance(result.get("score"), (int, float))]
+        columns = ("owner", "resume_hash", "jd_hash", "name", "job_title", *SCORE_FIELDS, "keywords", "resume_text",
+                   "result", "created_at")
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns[3:])
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                f"INSERT INTO candidates ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+                f" ON CONFLICT (owner, resume_hash, jd_hash) DO UPDATE SET {updates}",
+                rows,
+            )
+        return len(rows)
+
+    def add(self, resume_text: str, result: dict, job_description: str = "", name: str = "",
+            owner: str = "") -> bool:
+        """Index one analysis; results without a numeric score (errors) are skipped."""
+        return bool(self.add_many([(resume_text, result, job_description, name)], owner))
+
+    def search(self, query: str = "", min_score=None, limit: int = DEFAULT_LIMIT, owner=None) -> list:
+        """
+        Candidates matching `query` (see parse_query), best first: by BM25 relevance when
+        the query has search terms, by overall score otherwise. With `owner`, only that
+        owner's candidates; None searches all of them (the command line).
+        """
+        terms, filters = parse_query(query)
+        if min_score is not None:
+            filters.append(("score", ">=", float(min_score)))
+        where = [f"c.{field} {op} ?" for field, op, _ in filters]
+        params = [value for _, _, value in filters]
+        if owner is not None:
+            where.append("c.owner = ?")
+            params.append(owner)
+        columns = "c.id, c.name, c.job_title, " + ", ".join(f"c.{f}" for f in SCORE_FIELDS) + ", c.keywords"
+        match = " AND ".join(p for p in map(_phrase, terms) if p)
+        if match:
+            sql = (f"SELECT {columns}, bm25(candidates_fts, 1.0, 2.0) AS rank"
+                   " FROM candidates_fts JOIN candidates c ON c.id = candidates_fts.rowid"
+                   f" WHERE candidates_fts MATCH ? {''.join(' AND ' + w for w in where)}"
+                   " ORDER BY rank, c.score DESC LIMIT ?")
+            params = [match, *params]
+        else:
+            sql = (f"SELECT {columns}, NULL AS rank FROM candidates c"
+                   f" {'WHERE ' + ' AND '.join(where) if where else ''}"
+                   " ORDER BY c.score DESC, c.id DESC LIMIT ?")
+        with self._connect() as conn:
+            rows = conn.execute(sql, (*params, limit)).fetchall()
+        names = ("id", "name", "job_title", *SCORE_FIELDS, "keywords", "rank")
+        return [dict(zip(names, row)) for row in rows]
+
+    def get(self, candidate_id: int, owner=None):
+        """The stored result and resume text of one candidate (only if it is `owner`'s when given), or None."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT name, resume_text, result, owner FROM candidates WHERE id = ?",
+                               (candidate_id,)).fetchone()
+        if row is not None and owner is not None and row[3] != owner:
+            row = None
+        if row is None:
+            return None
+        return {"id": candidate_id, "name": row[0], "resume_text": row[1], "result": json.loads(row[2])}
+
+    def count(self, owner=None) -> int:
+        with self._connect() as conn:
+            if owner is None:
+                return conn.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+            return conn.execute("SELECT COUNT(*) FROM candidates WHERE owner = ?", (owner,)).fetchone()[0]
+
+    def optimize(self):
+        """Merge the FTS index segments; worth running after a large bulk load."""
+        with self._lock, self._connect() as conn:
+            conn.execute("INSERT INTO candidates_fts (candidates_fts) VALUES ('optimize')")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_candidate_store() -> CandidateStore:
+    """Process-wide store shared by every Streamlit session and the job workers."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CandidateStore()
+        return _store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search previously analyzed candidates.")
+    parser.add_argument("query", nargs="?", default="", help='e.g. "score > 80 and mentions kubernetes"')
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    parser.add_argument("--db", default=CANDIDATES_DB_PATH)
+    parser.add_argument("--api-key", help="Only candidates analyzed with this key (default: all of them).")
+    args = parser.parse_args(argv)
+    owner = owner_id(args.api_key) if args.api_key else None
+    for row in CandidateStore(args.db).search(args.query, limit=args.limit, owner=owner):
+        print(json.dumps(row, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
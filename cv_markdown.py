@@ -0,0 +1,164 @@
+"""
+Single-pass parser for the Markdown CVs produced by the model.
+
+`parse_cv` turns the text into a CVDocument once (memoized per text) and every consumer
+works from that tree: `utils.normalize_cv_markdown`, the PDF renderer and the plain DOCX /
+PDF exporters. Nodes use __slots__ to stay small.
+
+Each line (as `str.splitlines()` splits them) becomes exactly one node, and every node
+keeps its original line, so consumers can reproduce the previous line-by-line output
+exactly. On top of the flat node list the document exposes the structure: name, contacts
+and sections with their positions and bullets.
+"""
+import re
+from functools import lru_cache
+
+CONTACT_PREFIXES = ("📧", "📞", "🌐")
+
+_HEADING = re.compile(r"^(#{1,6})\s+")
+
+
+class Node:
+    __slots__ = ("raw", "line")
+
+    def __init__(self, raw: str):
+        self.raw = raw            # the line as written (may include indentation)
+        self.line = raw.strip()   # the line with surrounding whitespace removed
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.line!r})"
+
+
+class Blank(Node):
+    __slots__ = ()
+
+
+class Heading(Node):
+    """`#`..`######` followed by whitespace."""
+    __slots__ = ("level", "text")
+
+    def __init__(self, raw, level, text):
+        super().__init__(raw)
+        self.level = level
+        self.text = text
+
+
+class Contact(Node):
+    """A line starting with one of CONTACT_PREFIXES."""
+    __slots__ = ()
+
+
+class BoldLine(Node):
+    """
+    A line starting with "**": either a fully bold line ("**Engineer — Acme**", `closed`)
+    or one that merely opens with bold text ("**Engineer** — Acme").
+    """
+    __slots__ = ("closed",)
+
+    def __init__(self, raw):
+        super().__init__(raw)
+        self.closed = self.line.endswith("**")
+
+
+class Bullet(Node):
+    """A list item starting with "-" or "*"."""
+    __slots__ = ("text",)
+
+    def __init__(self, raw):
+        super().__init__(raw)
+        self.text = self.line.lstrip("-* ").strip()
+
+
+class Paragraph(Node):
+    __slots__ = ()
+
+
+class Position:
+    """A role / company header with the bullets and paragraphs under it."""
+    __slots__ = ("title", "items")
+
+    def __init__(self, title):
+        self.title = title
+        self.items = []
+
+
+class Section:
+    """A `##` section: free items first, then positions."""
+    __slots__ = ("title", "items", "positions")
+
+    def __init__(self, title):
+        self.title = title
+        self.items = []
+        self.positions = []
+
+
+def is_position(node) -> bool:
+    """Role / company header: `### ...`, or a line opening in bold that contains an em dash."""
+    return node.line.startswith("### ") or ("—" in node.line and node.line.startswith("**"))
+
+
+def position_title(node) -> str:
+    return node.line.replace("*", "").replace("### ", "").strip()
+
+
+def _parse_line(raw: str) -> Node:
+    line = raw.strip()
+    if not line:
+        return Blank(raw)
+    match = _HEADING.match(line)
+    if match:
+        return Heading(raw, len(match.group(1)), line[match.end():])
+    if line.startswith(CONTACT_PREFIXES):
+        return Contact(raw)
+    if line.startswith("**"):
+        return BoldLine(raw)
+    if line.startswith(("-", "*")):
+        return Bullet(raw)
+    return Paragraph(raw)
+
+
+class CVDocument:
+    __slots__ = ("nodes", "_sections")
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self._sections = None
+
+    @property
+    def name(self):
+        for node in self.nodes:
+            if isinstance(node, Heading) and node.level == 1:
+                return node.text
+        return None
+
+    @property
+    def contacts(self):
+        return [node.line for node in self.nodes if isinstance(node, Contact)]
+
+    @property
+    def sections(self):
+        """Sections with their positions and bullets (built lazily, once)."""
+        if self._sections is None:
+            sections = []
+            section = position = None
+            for node in self.nodes:
+                if isinstance(node, Heading) and node.level == 2:
+                    section = Section(node.text)
+                    sections.append(section)
+                    position = None
+                elif section is None or isinstance(node, (Blank, Contact)) or (
+                        isinstance(node, Heading) and node.level == 1):
+                    continue
+                elif is_position(node):
+                    position = Position(position_title(node))
+                    section.positions.append(position)
+                else:
+                    (position.items if position else section.items).append(node)
+            self._sections = sections
+        return self._sections
+
+
+@lru_cache(maxsize=256)
+def parse_cv(md_text: str) -> CVDocument:
+    """Parse CV markdown in one pass; memoized, so each distinct text is parsed only once."""
+    return CVDocument(tuple(_parse_line(raw) for raw in md_text.splitlines()))
@@ -0,0 +1,167 @@
+"""
+Exact and near-duplicate detection for bulk intake.
+
+The same CV often arrives several times: as PDF and DOCX, or re-sent with a few edits.
+Every text is reduced to word shingles, and those are summarized by a MinHash signature
+whose agreement estimates Jaccard similarity. Signatures are split into LSH bands, so
+only documents sharing a band bucket are compared, and lookups stay sub-linear in the
+size of the index.
+
+    index = DedupIndex(threshold=0.85)
+    for key, text in texts.items():
+        match = index.add(key, text)   # None, or the earlier document this one duplicates
+    index.clusters()                   # groups of duplicates, for reporting
+"""
+import hashlib
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+from cache import normalize_text
+from utils import tokenize
+
+DEDUP_THRESHOLD = float(os.environ.get("CV_MATCHER_DEDUP_THRESHOLD", "0.85"))
+# Shorter normalized texts are always treated as unique: every empty or near-empty extraction
+# (a scanned PDF, a failed upload) would otherwise be a "duplicate" of the first one.
+MIN_TEXT_LENGTH = int(os.environ.get("CV_MATCHER_DEDUP_MIN_CHARS", "100"))
+SHINGLE_SIZE = 5  # words per shingle
+NUM_PERM = 128
+BANDS = 32  # 32 bands x 4 rows: pairs above ~0.45 Jaccard almost always share a bucket
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def shingles(text: str, k: int = SHINGLE_SIZE) -> set:
+    """Overlapping k-word shingles of the lowercased tokens (the whole text if it is shorter)."""
+    tokens = tokenize(text)
+    if len(tokens) <= k:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+
+
+def _hash64(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class MinHasher:
+    """NUM_PERM universal hash functions (a * x + b mod p, truncated to 32 bits)."""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 31, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set) -> np.ndarray:
+        if not shingle_set:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        hashes = np.fromiter((_hash64(s) for s in shingle_set), dtype=np.uint64, count=len(shingle_set))
+        hashes &= _MAX_HASH  # keep a * x below 2**63 so the products never wrap
+        permuted = (hashes[:, None] * self.a + self.b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+
+def estimated_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return float(np.mean(a == b))
+
+
+@dataclass(frozen=True)
+class DuplicateMatch:
+    of: str  # key of the earlier (canonical) document
+    similarity: float  # 1.0 for identical normalized text
+    exact: bool
+
+
+class DedupIndex:
+    """
+    Documents by key, with their MinHash signatures bucketed by LSH band. `add` returns the
+    canonical document a new one duplicates (estimated similarity >= `threshold`), so its
+    analysis can be reused; duplicates themselves are never candidates. Texts shorter than
+    `min_length` once normalized are neither matched nor indexed.
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, num_perm: int = NUM_PERM, bands: int = BANDS,
+                 hasher: MinHasher = None, min_length: int = MIN_TEXT_LENGTH):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.min_length = min_length
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = hasher or MinHasher(num_perm)
+        self._exact = {}  # sha256(normalized text) -> canonical key
+        self._signatures = {}  # canonical key -> signature
+        self._buckets = [{} for _ in range(bands)]  # band -> {band bytes: [canonical keys]}
+        self._members = {}  # canonical key -> [(duplicate key, DuplicateMatch)]
+
+    def __len__(self):
+        return len(self._signatures) + sum(len(m) for m in self._members.values())
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def _digest(self, text: str):
+        """sha256 of the normalized text, or None when it is too short to deduplicate."""
+        normalized = normalize_text(text).lower()
+        if len(normalized) < self.min_length:
+            return None
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def find(self, text: str):
+        """The best matching canonical document for `text`, without adding it."""
+        digest = self._digest(text)
+        if digest is None:
+            return None
+        return self._find(digest, self.hasher.signature(shingles(text)))
+
+    def _find(self, digest: str, signature: np.ndarray):
+        if digest in self._exact:
+            return DuplicateMatch(self._exact[digest], 1.0, True)
+        candidates = set()
+        for band, key in self._band_keys(signature):
+            candidates.update(self._buckets[band].get(key, ()))
+        best = None
+        for candidate in candidates:
+            similarity = estimated_similarity(signature, self._signatures[candidate])
+            if similarity >= self.threshold and (best is None or similarity > best.similarity):
+                best = DuplicateMatch(candidate, round(similarity, 3), False)
+        return best
+
+    def add(self, key: str, text: str):
+        """Index `text` under `key`; returns a DuplicateMatch if it duplicates an earlier document."""
+        digest = self._digest(text)
+        if digest is None:
+            return None
+        signature = self.hasher.signature(shingles(text))
+        match = self._find(digest, signature)
+        if match is not None:
+            self._members[match.of].append((key, match))
+            return match
+        self._exact[digest] = key
+        self._signatures[key] = signature
+        self._members[key] = []
+        for band, band_key in self._band_keys(signature):
+            self._buckets[band].setdefault(band_key, []).append(key)
+        return None
+
+    def assign(self, texts: dict) -> dict:
+        """Add every {key: text} in order; returns {duplicate key: DuplicateMatch}."""
+        duplicates = {}
+        for key, text in texts.items():
+            match = self.add(key, text)
+            if match is not None:
+                duplicates[key] = match
+        return duplicates
+
+    def clusters(self) -> list:
+        """Groups of duplicates, largest first: the canonical document and each duplicate with its similarity."""
+        report = [
+            {"canonical": key, "size": len(members) + 1,
+             "duplicates": [{"key": k, "similarity": m.similarity, "exact": m.exact} for k, m in members]}
+            for key, members in self._members.items() if members
+        ]
+        return sorted(report, key=lambda cluster: -cluster["size"])
@@ -0,0 +1,164 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from pdf_parser import extract_pdf_pages
+from docx_parser import extract_docx
+
+MAX_CACHED_DOCUMENTS = 64
+
+
+@dataclass(frozen=True)
+class Block:
+    """A paragraph or table row, located in `ParsedDocument.text` by character offsets."""
+    kind: str  # "paragraph" or "table_row"
+    start: int
+    end: int
+    page: int = 0
+
+
+@dataclass(frozen=True)
+class ParsedDocument:
+    """
+    Structured result of parsing an uploaded resume.
+
+    `pages` holds (start, end) offsets of each page inside `text`, `blocks` the
+    paragraphs and table rows in reading order, and `tables` the raw cell texts.
+    `complete` is False when PDF pages timed out during extraction and came back empty.
+    """
+    content_hash: str
+    kind: str  # "pdf", "docx" or "text"
+    text: str
+    pages: tuple
+    blocks: tuple
+    tables: tuple = ()
+    complete: bool = True
+
+    @property
+    def paragraphs(self):
+        return [self.text[b.start:b.end] for b in self.blocks if b.kind == "paragraph"]
+
+    def page_text(self, index: int) -> str:
+        start, end = self.pages[index]
+        return self.text[start:end]
+
+    @property
+    def page_texts(self):
+        return [self.text[start:end] for start, end in self.pages]
+
+
+class _TextBuilder:
+    """Collects text pieces in a list and joins once, tracking offsets as it goes."""
+
+    def __init__(self):
+        self.parts = []
+        self.pos = 0
+        self.blocks = []
+
+    def add(self, text: str):
+        start = self.pos
+        self.parts.append(text)
+        self.pos += len(text)
+        return start, self.pos
+
+    def add_lines(self, text: str, page: int):
+        for line in text.split("\n"):
+            start, end = self.add(line)
+            if line.strip():
+                self.blocks.append(Block("paragraph", start, end, page))
+            self.add("\n")
+
+    def build(self) -> str:
+        return "".join(self.parts)
+
+
+def _read_bytes(uploaded_file) -> bytes:
+    if hasattr(uploaded_file, "getvalue"):
+        return uploaded_file.getvalue()
+    if hasattr(uploaded_file, "seek"):
+        uploaded_file.seek(0)
+    return uploaded_file.read()
+
+
+def _document_kind(filename: str) -> str:
+    filename = filename.lower()
+    if filename.endswith(".pdf"):
+        return "pdf"
+    if filename.endswith(".docx"):
+        return "docx"
+    return "text"
+
+
+def _parse(data: bytes, kind: str, content_hash: str) -> ParsedDocument:
+    builder = _TextBuilder()
+    pages = []
+    tables = ()
+    complete = True
+
+    if kind == "pdf":
+        page_texts = extract_pdf_pages(io.BytesIO(data))
+        complete = not page_texts.timed_out
+        for index, page_text in enumerate(page_texts):
+            start = builder.pos
+            builder.add_lines(page_text, index)
+            pages.append((start, builder.pos))
+    elif kind == "docx":
+        paragraphs, tables = extract_docx(io.BytesIO(data))
+        for para in paragraphs:
+            start, end = builder.add(para)
+            if para.strip():
+                builder.blocks.append(Block("paragraph", start, end))
+            builder.add("\n")
+        for table in tables:
+            for row in table:
+                start, end = builder.add(" | ".join(cell.strip() for cell in row))
+                builder.blocks.append(Block("table_row", start, end))
+                builder.add("\n")
+        pages.append((0, builder.pos))
+        tables = tuple(tables)
+    else:
+        builder.add_lines(data.decode(), 0)
+        pages.append((0, builder.pos))
+
+    text = builder.build()
+    if kind == "text":
+        text = text[:-1]  # add_lines terminates every line; keep plain text identical to the upload
+        pages[-1] = (0, len(text))
+    return ParsedDocument(content_hash, kind, text, tuple(pages), tuple(builder.blocks), tables, complete)
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+cache_stats = {"hits": 0, "misses": 0}
+
+
+def load_document(uploaded_file) -> ParsedDocument:
+    """
+    Parse an uploaded PDF, DOCX or text file into a ParsedDocument.
+
+    Results are memoized by content hash, so Streamlit reruns and repeated
+    analyses of the same upload skip extraction entirely. Documents with timed-out
+    pages are not memoized, so the next upload gets another chance at them.
+    """
+    data = _read_bytes(uploaded_file)
+    kind = _document_kind(uploaded_file.name)
+    key = (hashlib.sha256(data).hexdigest(), kind)
+
+    with _cache_lock:
+        document = _cache.get(key)
+        if document is not None:
+            _cache.move_to_end(key)
+            cache_stats["hits"] += 1
+            return document
+        cache_stats["misses"] += 1
+
+    document = _parse(data, kind, key[0])
+    if not document.complete:
+        return document
+    with _cache_lock:
+        _cache[key] = document
+        while len(_cache) > MAX_CACHED_DOCUMENTS:
+            _cache.popitem(last=False)
+    return document
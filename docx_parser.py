@@ -1,9 +1,13 @@
-from docx import Document
+def extract_docx(uploaded_file):
+    """Return (paragraph texts, tables) where each table is a list of rows of cell texts."""
+    from docx import Document  # imported on first use, like the other document backends
+    doc = Document(uploaded_file)
+    paragraphs = [para.text for para in doc.paragraphs]
+    tables = [[[cell.text for cell in row.cells] for row in table.rows] for table in doc.tables]
+    return paragraphs, tables
 
 
 def parse_docx(uploaded_file):
+    from docx import Document
     doc = Document(uploaded_file)
-    text = ""
-    for para in doc.paragraphs:
-        text += para.text + "\n"
-    return text
+    return "".join(f"{para.text}\n" for para in doc.paragraphs)
@@ -1,15 +1,23 @@
 import io
-from docx import Document
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+
+from cv_markdown import parse_cv
+
+# python-docx and reportlab are imported on first export: they are slow to import and most
+# sessions never export.
+#
+# Both exporters write one paragraph / text line per CV line, as written (`node.raw`). Lines
+# are split like everywhere else that reads the CV, with str.splitlines(): a trailing newline
+# adds no empty paragraph at the end, and "\r\n" or form feeds end a line instead of being
+# written into it. For "\n"-separated text the output is the same as splitting on "\n".
 
 
 def export_docx(text: str) -> bytes:
     """Export improved CV to DOCX."""
+    from docx import Document
     buffer = io.BytesIO()
     doc = Document()
-    for line in text.split("\n"):
-        doc.add_paragraph(line)
+    for node in parse_cv(text).nodes:
+        doc.add_paragraph(node.raw)
     doc.save(buffer)
     buffer.seek(0)
     return buffer.getvalue()
@@ -17,12 +25,14 @@ def export_docx(text: str) -> bytes:
 
 def export_pdf(text: str) -> bytes:
     """Export improved CV to PDF."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
     buffer = io.BytesIO()
     c = canvas.Canvas(buffer, pagesize=letter)
     width, height = letter
     y = height - 40
-    for line in text.split("\n"):
-        c.drawString(40, y, line)
+    for node in parse_cv(text).nodes:
+        c.drawString(40, y, node.raw)
         y -= 15
         if y < 40:  # new page
             c.showPage()
@@ -0,0 +1,279 @@
+"""
+Process-wide admission control for OpenAI requests.
+
+Each call's token cost is estimated before it is sent: the prompt is counted locally and
+the expected completion is added. The call then waits for capacity in two token buckets,
+one for requests per minute and one for tokens per minute, so the whole process stays
+under the organization's RPM / TPM limits instead of collecting 429s. Waiting calls queue
+per user (the request's `user` field, else the API key) and are admitted round-robin
+across users, so a session submitting a batch cannot starve the others. A user whose next
+call does not fit yet (a large prompt waiting for the token bucket to refill) can be
+overtaken by smaller calls of other users that do, for up to OVERTAKE_LIMIT seconds; after
+that the rotation holds for it, so it cannot starve either. When a response reports its
+real usage, the difference from the estimate is charged or refunded.
+
+A queued call gives up after MAX_WAIT seconds (GovernorTimeout). Queueing more than about
+MAX_WAIT * TPM / 60 tokens at once therefore fails, so bulk callers bound the calls they
+have in flight (batch.py runs `concurrency` at a time) instead of submitting everything.
+
+The scheduler never sleeps: `submit` queues a call and `dispatch` admits whatever fits at
+the clock's current time. It can therefore be driven by a simulated clock and a fake
+backend (see benchmarks/sim_governor.py). `acquire` and `aacquire` are the blocking and
+asyncio front ends used by openai_client.ManagedClient.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+from prompt_builder import count_tokens
+from tracing import percentiles
+
+ENABLED = os.environ.get("CV_MATCHER_GOVERNOR", "1") != "0"
+RPM_LIMIT = int(os.environ.get("CV_MATCHER_RPM", "500"))
+TPM_LIMIT = int(os.environ.get("CV_MATCHER_TPM", "200000"))
+# Share of each limit that may be spent in a burst. The rest refills evenly over the minute, so no
+# 60-second window can exceed the limit (a bucket holding a full minute could pass twice the limit).
+BURST = float(os.environ.get("CV_MATCHER_GOVERNOR_BURST", "0.1"))
+MAX_WAIT = float(os.environ.get("CV_MATCHER_GOVERNOR_MAX_WAIT", "600"))  # seconds before a queued call gives up
+OVERTAKE_LIMIT = float(os.environ.get("CV_MATCHER_GOVERNOR_OVERTAKE", "10"))  # seconds a blocked call may be passed
+DEFAULT_COMPLETION_TOKENS = int(os.environ.get("CV_MATCHER_EXPECTED_COMPLETION_TOKENS", "1000"))
+ASYNC_POLL_INTERVAL = 0.25  # async waiters re-check at least this often (refunds can free capacity early)
+
+
+class GovernorTimeout(TimeoutError):
+    """A call waited longer than its timeout for rate-limit capacity."""
+
+
+def estimate_tokens(request: dict) -> int:
+    """Tokens a chat / embeddings request will count against TPM: its prompt plus the expected completion."""
+    if "input" in request:  # embeddings
+        texts = request["input"] if isinstance(request["input"], list) else [request["input"]]
+        return sum(count_tokens(str(text)) for text in texts)
+    prompt = 0
+    for message in request.get("messages", ()):
+        content = message.get("content")
+        prompt += 4 + count_tokens(content if isinstance(content, str) else str(content or ""))
+    completion = request.get("max_tokens") or request.get("max_completion_tokens") or DEFAULT_COMPLETION_TOKENS
+    return prompt + completion
+
+
+class TokenBucket:
+    """`capacity` units refilled continuously at `per_second`; the level may go negative after a late charge."""
+
+    def __init__(self, capacity: float, per_second: float, clock=time.monotonic):
+        self.capacity = capacity
+        self.rate = per_second
+        self.clock = clock
+        self.level = float(capacity)
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (amounts above capacity wait for a full bucket)."""
+        self._refill()
+        return max(0.0, (min(amount, self.capacity) - self.level) / self.rate)
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= amount
+
+    def give(self, amount: float):
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class Ticket:
+    __slots__ = ("user", "estimate", "charged", "submitted_at", "blocked_since", "admitted_at")
+
+    def __init__(self, user, estimate: int, submitted_at: float):
+        self.user = user
+        self.estimate = estimate
+        self.charged = 0
+        self.submitted_at = submitted_at
+        self.blocked_since = None  # first time it was next for its user but did not fit
+        self.admitted_at = None
+
+    @property
+    def wait(self):
+        return None if self.admitted_at is None else self.admitted_at - self.submitted_at
+
+
+class Governor:
+    def __init__(self, rpm: int = RPM_LIMIT, tpm: int = TPM_LIMIT, clock=time.monotonic, max_wait: float = MAX_WAIT,
+                 burst: float = BURST, window: int = 1000, overtake_limit: float = OVERTAKE_LIMIT):
+        self.clock = clock
+        self.max_wait = max_wait
+        self.overtake_limit = overtake_limit
+        self.requests = TokenBucket(max(1.0, rpm * burst), rpm * (1 - burst) / 60.0, clock)
+        self.tokens = TokenBucket(tpm * burst, tpm * (1 - burst) / 60.0, clock)
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._queues = OrderedDict()  # user -> deque of waiting tickets, in round-robin order
+        self.waits = deque(maxlen=window)  # seconds waited by recently admitted calls
+        self.counters = {"admitted": 0, "timed_out": 0, "estimated_tokens": 0, "actual_tokens": 0}
+
+    # --- scheduler (non-blocking) ---
+
+    def submit(self, user, tokens: int) -> Ticket:
+        """Queue a call costing an estimated `tokens`; it is admitted by a later `dispatch`."""
+        with self._lock:
+            return self._enqueue(user, tokens)
+
+    def _enqueue(self, user, tokens):
+        ticket = Ticket(user, int(tokens), self.clock())
+        self._queues.setdefault(user, deque()).append(ticket)
+        return ticket
+
+    def dispatch(self) -> list:
+        """Admit queued calls while both buckets allow, one user at a time in round-robin order."""
+        with self._lock:
+            return self._dispatch()
+
+    def _candidates(self):
+        """Each user's next ticket in rotation order, up to the first one that may no longer be overtaken."""
+        now = self.clock()
+        for queue in self._queues.values():
+            ticket = queue[0]
+            yield ticket
+            if ticket.blocked_since is not None and now - ticket.blocked_since >= self.overtake_limit:
+                return
+
+    def _next_fitting(self):
+        for ticket in self._candidates():
+            if self.tokens.wait_time(ticket.estimate) <= 0:
+                return ticket
+            if ticket.blocked_since is None:
+                ticket.blocked_since = self.clock()
+        return None
+
+    def _dispatch(self) -> list:
+        admitted = []
+        while self._queues and self.requests.wait_time(1) <= 0:
+            ticket = self._next_fitting()
+            if ticket is None:
+                break
+            user, queue = ticket.user, self._queues[ticket.user]
+            queue.popleft()
+            del self._queues[user]
+            if queue:
+                self._queues[user] = queue  # back of the rotation
+            self.requests.take(1)
+            self.tokens.take(ticket.estimate)
+            ticket.charged = ticket.estimate
+            ticket.admitted_at = self.clock()
+            self.waits.append(ticket.wait)
+            self.counters["admitted"] += 1
+            self.counters["estimated_tokens"] += ticket.estimate
+            admitted.append(ticket)
+        if admitted:
+            self._changed.notify_all()
+        return admitted
+
+    def next_delay(self):
+        """Seconds until the next queued call could be admitted, or None when nothing is queued."""
+        with self._lock:
+            return self._next_delay()
+
+    def _next_delay(self):
+        if not self._queues:
+            return None
+        tokens = min(self.tokens.wait_time(ticket.estimate) for ticket in self._candidates())
+        return max(self.requests.wait_time(1), tokens)
+
+    def cancel(self, ticket: Ticket):
+        """Withdraw a queued call whose caller gave up waiting; counted as timed out."""
+        with self._lock:
+            self._remove(ticket)
+
+    def _remove(self, ticket: Ticket):
+        queue = self._queues.get(ticket.user)
+        if queue is not None and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del self._queues[ticket.user]
+        self.counters["timed_out"] += 1
+
+    def settle(self, ticket: Ticket, actual_tokens):
+        """Correct the charge of an admitted call to what the API reported (None keeps the estimate)."""
+        if actual_tokens is None or ticket.admitted_at is None:
+            return
+        with self._lock:
+            difference = actual_tokens - ticket.charged
+            if difference > 0:
+                self.tokens.take(difference)
+            else:
+                self.tokens.give(-difference)
+            ticket.charged = actual_tokens
+            self.counters["actual_tokens"] += actual_tokens
+            self._changed.notify_all()
+
+    # --- front ends ---
+
+    def acquire(self, user, tokens: int, timeout=None) -> Ticket:
+        """Block until the call is admitted; raises GovernorTimeout after `timeout` (default max_wait) seconds."""
+        deadline = self.clock() + (self.max_wait if timeout is None else timeout)
+        with self._lock:
+            ticket = self._enqueue(user, tokens)
+            while True:
+                self._dispatch()
+                if ticket.admitted_at is not None:
+                    return ticket
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    self._remove(ticket)
+                    raise GovernorTimeout(f"Waited {self.clock() - ticket.submitted_at:.0f}s for API capacity")
+                self._changed.wait(min(self._next_delay(), remaining))
+
+    async def aacquire(self, user, tokens: int, timeout=None) -> Ticket:
+        """`acquire` for coroutines: waits with asyncio.sleep instead of blocking the event loop."""
+        deadline = self.clock() + (self.max_wait if timeout is None else timeout)
+        ticket = self.submit(user, tokens)
+        while True:
+            with self._lock:
+                self._dispatch()
+                if ticket.admitted_at is not None:
+                    return ticket
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    self._remove(ticket)
+                    raise GovernorTimeout(f"Waited {self.clock() - ticket.submitted_at:.0f}s for API capacity")
+                delay = min(self._next_delay(), remaining, ASYNC_POLL_INTERVAL)
+            await asyncio.sleep(delay)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            now = self.clock()
+            waiting = [ticket for queue in self._queues.values() for ticket in queue]
+            waits = list(self.waits)
+            self.requests.wait_time(0), self.tokens.wait_time(0)  # refill both buckets up to now
+            snapshot = dict(self.counters)
+            snapshot.update(
+                queued=len(waiting),
+                queued_users=len(self._queues),
+                oldest_wait_s=round(max((now - t.submitted_at for t in waiting), default=0.0), 3),
+                requests_available=round(self.requests.level, 1),
+                tokens_available=round(self.tokens.level),
+            )
+        snapshot.update(percentiles(waits, "wait"))
+        return snapshot
+
+
+_governor = None
+_governor_lock = threading.Lock()
+
+
+def get_governor():
+    """The process-wide governor, or None when disabled with CV_MATCHER_GOVERNOR=0."""
+    global _governor
+    if not ENABLED:
+        return None
+    with _governor_lock:
+        if _governor is None:
+            _governor = Governor()
+        return _governor
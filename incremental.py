@@ -0,0 +1,186 @@
+"""
+Incremental re-analysis after the job description or the resume is edited.
+
+`diff_inputs` compares the new inputs with those of the previous run, line by line and
+grouped by section. What goes back to the model then depends on the size of the edit
+(see analyze_resume_stream's `previous` argument):
+
+- nothing changed: the previous result is reused as is;
+- a small edit: one delta call gets the previous scores and recommendations, the
+  changed lines and the unchanged input. This replaces the full scoring prompt. The
+  CV is rewritten for the new inputs alongside it;
+- more than DELTA_MAX_CHANGE of either input changed, or MAX_DELTA_RUNS delta calls in
+  a row already: a normal full analysis.
+
+Keyword coverage is also recomputed incrementally: `job_keywords` tokenizes each line of
+the job description only once, and `keyword_coverage` only scans the resume for
+keywords it has not checked yet.
+"""
+import json
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+
+from skill_index import keyword_index
+from utils import BULLET_PATTERN, STOPWORDS, tokenize
+
+# Share of either input's lines that may change before a full analysis is cheaper and safer.
+DELTA_MAX_CHANGE = float(os.environ.get("CV_MATCHER_DELTA_MAX_CHANGE", "0.5"))
+# Each delta call builds on the previous answer, so its errors compound: after this many in a
+# row the next edit gets a full analysis.
+MAX_DELTA_RUNS = int(os.environ.get("CV_MATCHER_MAX_DELTA_RUNS", "3"))
+MAX_COVERAGE_RESUMES = 32
+
+_HEADING = re.compile(r"^\s*(#+\s+\S.*|[A-Z][\w &/,-]{1,60}:)\s*$")
+
+
+def _normalize_line(line: str) -> str:
+    return re.sub(r"\s+", " ", BULLET_PATTERN.sub("", line)).strip().lower()
+
+
+def section_lines(text: str) -> list:
+    """(section heading, line) for every non-empty line; lines before the first heading have section ""."""
+    section, lines = "", []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        if _HEADING.match(line):
+            section = line.strip().lstrip("#").strip().rstrip(":")
+            continue
+        lines.append((section, line.strip()))
+    return lines
+
+
+@dataclass(frozen=True)
+class TextDelta:
+    added: tuple  # (section, line) pairs only in the new text
+    removed: tuple  # (section, line) pairs only in the old text
+    change: float  # changed lines / lines of the longer version, 0.0-1.0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed)
+
+    def sections(self) -> list:
+        """Names of the sections touched by the edit, in order."""
+        return list(OrderedDict.fromkeys(section for section, _ in self.added + self.removed))
+
+
+def diff_text(old: str, new: str) -> TextDelta:
+    """Line-level difference of two versions of a text; reordering and whitespace are not changes."""
+    old_lines, new_lines = section_lines(old), section_lines(new)
+    old_keys = Counter(_normalize_line(line) for _, line in old_lines)
+    new_keys = Counter(_normalize_line(line) for _, line in new_lines)
+    added, removed = [], []
+    for lines, other, out in ((new_lines, old_keys, added), (old_lines, new_keys, removed)):
+        remaining = Counter(other)
+        for section, line in lines:
+            key = _normalize_line(line)
+            if remaining[key]:
+                remaining[key] -= 1
+            else:
+                out.append((section, line))
+    longest = max(len(old_lines), len(new_lines), 1)
+    return TextDelta(tuple(added), tuple(removed), round(min(1.0, max(len(added), len(removed)) / longest), 3))
+
+
+@dataclass(frozen=True)
+class InputDelta:
+    job_description: TextDelta
+    resume: TextDelta
+
+    @property
+    def unchanged(self) -> bool:
+        return not (self.job_description.changed or self.resume.changed)
+
+    @property
+    def small(self) -> bool:
+        return max(self.job_description.change, self.resume.change) <= DELTA_MAX_CHANGE
+
+    def summary(self) -> dict:
+        return {
+            "jd_lines_added": len(self.job_description.added), "jd_lines_removed": len(self.job_description.removed),
+            "resume_lines_added": len(self.resume.added), "resume_lines_removed": len(self.resume.removed),
+            "jd_change": self.job_description.change, "resume_change": self.resume.change,
+            "sections": self.job_description.sections() + self.resume.sections(),
+        }
+
+
+def diff_inputs(previous: dict, resume_text: str, job_description: str) -> InputDelta:
+    """`previous` holds the "resume_text" and "job_description" of the earlier run."""
+    return InputDelta(diff_text(previous.get("job_description", ""), job_description),
+                      diff_text(previous.get("resume_text", ""), resume_text))
+
+
+def _format_changes(delta: TextDelta) -> str:
+    lines = [f"+ [{section or 'General'}] {BULLET_PATTERN.sub('', line)}" for section, line in delta.added]
+    lines += [f"- [{section or 'General'}] {BULLET_PATTERN.sub('', line)}" for section, line in delta.removed]
+    return "\n    ".join(lines) or "(none)"
+
+
+def build_delta_prompt(resume_text: str, job_description: str, previous_result: dict, delta: InputDelta) -> str:
+    """
+    Update an earlier analysis for an edit. Only the unchanged input is included in full
+    (the resume when both changed); the edited one is described by its added and removed lines.
+    """
+    if delta.resume.changed and not delta.job_description.changed:
+        context = f"Job Description:\n    {job_description}"
+    else:
+        context = f"Resume:\n    {resume_text}"
+    return f"""
+    You are a professional career consultant. You already analyzed a resume against a job description; this
+    was your analysis:
+    {json.dumps(previous_result, ensure_ascii=False)}
+
+    Since then the inputs were edited ("+" lines were added, "-" lines were removed, section in brackets).
+    Job description changes:
+    {_format_changes(delta.job_description)}
+    Resume changes:
+    {_format_changes(delta.resume)}
+
+    Update the analysis for these changes only: adjust the scores the changes affect and keep the others,
+    drop recommendations that no longer apply and add recommendations for new requirements. Respond ONLY
+    with valid JSON with the same keys as the analysis above.
+
+    {context}
+    """
+
+
+@lru_cache(maxsize=2048)
+def _line_counts(line: str) -> Counter:
+    words = [w for w in tokenize(line) if w not in STOPWORDS and len(w) > 2 and not w.isdigit()]
+    return Counter(words)
+
+
+def job_keywords(job_description: str, top_n: int = 20) -> list:
+    """
+    Same result as utils.extract_keywords, but word counts are memoized per line, so after
+    an edit only the changed lines are tokenized again.
+    """
+    freq = Counter()
+    for line in job_description.splitlines():
+        if line.strip():
+            freq.update(_line_counts(line))
+    return [word for word, _ in freq.most_common(top_n)]
+
+
+_coverage = OrderedDict()  # resume text -> {keyword: covered}
+_coverage_lock = threading.Lock()
+
+
+def keyword_coverage(resume_text: str, keywords) -> dict:
+    """{keyword: covered by the resume}; only keywords not checked before against this resume are scanned."""
+    with _coverage_lock:
+        known = _coverage.pop(resume_text, {})
+        _coverage[resume_text] = known
+        while len(_coverage) > MAX_COVERAGE_RESUMES:
+            _coverage.popitem(last=False)
+        missing = tuple(kw for kw in keywords if kw not in known)
+    if missing:
+        hits = keyword_index(missing).coverage(resume_text)
+        with _coverage_lock:
+            known.update((kw, bool(hits[kw])) for kw in missing)
+    return {kw: known[kw] for kw in keywords}
@@ -0,0 +1,257 @@
+"""
+Background analysis jobs.
+
+Streamlit sessions submit an analysis and get a job id back immediately; a pool of worker
+threads picks jobs from a SQLite-backed queue and runs `analyze_resume_stream`, writing
+partial results as they stream in. Sessions poll `get()` for status, so the script thread
+is never blocked on the LLM and a reloaded page can reattach to its job by id. With
+CV_MATCHER_INDEX_CANDIDATES=1, finished analyses are also indexed in the candidate store
+(candidate_store.py) under their API key, for later search.
+
+The semantic coverage table (semantic.py) runs in the background too, on its own thread
+pool, through `submit_semantic` / `get_semantic`: embedding a JD and a resume can take as long as a
+retried, rate-limited API call, so it must not run on the script thread either. Its
+results are small and keyed by their inputs, so they are kept in memory, not in SQLite.
+
+API keys are kept in memory only and never written to the queue database; jobs still
+queued when the server restarts fail with a message asking to resubmit.
+
+analyze_resume (and with it the OpenAI SDK and the document parsers) is imported when
+the queue is first created, not when this module is, so importing it stays cheap.
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import candidate_store
+
+logger = logging.getLogger(__name__)
+JOBS_DB_PATH = os.environ.get("CV_MATCHER_JOBS_DB", os.path.join(".cache", "jobs.sqlite"))
+DEFAULT_WORKERS = int(os.environ.get("CV_MATCHER_WORKERS", "4"))
+PARTIAL_FLUSH_INTERVAL = 0.3  # seconds between partial-result writes
+JOB_RETENTION = 24 * 3600  # finished jobs older than this are purged
+MAX_SEMANTIC_RESULTS = 256  # semantic matches kept in memory, least recently used dropped first
+
+
+class _NamedBytesIO(io.BytesIO):
+    """An upload as load_document expects it: file-like with a `.name` (also used by service.py)."""
+
+    def __init__(self, data: bytes, name: str):
+        super().__init__(data)
+        self.name = name
+
+
+class JobQueue:
+    def __init__(self, path=JOBS_DB_PATH, workers=DEFAULT_WORKERS):
+        self.path = path
+        self._secrets = {}  # job id -> api key, memory only
+        self._wakeup = threading.Condition()
+        self._stopped = False
+        self._semantic = OrderedDict()  # task id -> {"status": ..., "result": ...}
+        self._semantic_lock = threading.Lock()
+        self._semantic_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="semantic-worker")
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " status TEXT NOT NULL,"  # queued -> running -> done | failed
+                " filename TEXT NOT NULL,"
+                " file BLOB NOT NULL,"
+                " job_description TEXT NOT NULL,"
+                " options TEXT NOT NULL,"
+                " partial TEXT,"
+                " result TEXT,"
+                " resume_text TEXT,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, created_at)")
+            from analyze_resume import error_result
+            # Anything left running or queued by a previous process lost its worker and API key.
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', result = ?, updated_at = ? WHERE status IN ('queued', 'running')",
+                (json.dumps(error_result("The server restarted before this analysis finished. Please resubmit.")),
+                 time.time()),
+            )
+            conn.execute("DELETE FROM jobs WHERE updated_at < ?", (time.time() - JOB_RETENTION,))
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"analysis-worker-{i}", daemon=True) for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def submit(self, uploaded_file, job_description: str, api_key=None, **options) -> str:
+        """Queue an analysis and return its job id. `options` are passed to analyze_resume_stream."""
+        job_id = uuid.uuid4().hex
+        data = uploaded_file.getvalue() if hasattr(uploaded_file, "getvalue") else uploaded_file.read()
+        now = time.time()
+        self._secrets[job_id] = api_key
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, filename, file, job_description, options, created_at, updated_at)"
+                " VALUES (?, 'queued', ?, ?, ?, ?, ?, ?)",
+                (job_id, uploaded_file.name, data, job_description, json.dumps(options), now, now),
+            )
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id: str):
+        """Current state of a job as a dict, or None if the id is unknown."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT status, filename, job_description, partial, result, resume_text, created_at, updated_at"
+                " FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": job_id,
+            "status": row[0],
+            "filename": row[1],
+            "job_description": row[2],
+            "partial": json.loads(row[3]) if row[3] else {},
+            "result": json.loads(row[4]) if row[4] else None,
+            "resume_text": row[5] or "",
+            "created_at": row[6],
+            "updated_at": row[7],
+        }
+
+    def submit_semantic(self, resume_text: str, job_description: str, api_key=None) -> str:
+        """
+        Start a semantic match in the background and return its task id. The id is derived
+        from the inputs, so submitting the same match again (every rerun does) reuses it.
+        """
+        key_hash = hashlib.sha256((api_key or "").encode()).hexdigest()
+        task_id = hashlib.sha256(json.dumps([key_hash, resume_text, job_description]).encode()).hexdigest()
+        with self._semantic_lock:
+            if task_id in self._semantic:
+                self._semantic.move_to_end(task_id)
+                return task_id
+            self._semantic[task_id] = {"status": "running", "result": None}
+            while len(self._semantic) > MAX_SEMANTIC_RESULTS:
+                self._semantic.popitem(last=False)
+        self._semantic_pool.submit(self._run_semantic, task_id, resume_text, job_description, api_key)
+        return task_id
+
+    def get_semantic(self, task_id: str):
+        """{"status": "running" | "done" | "failed", "result": SemanticMatch.to_dict() or None}, or None."""
+        with self._semantic_lock:
+            task = self._semantic.get(task_id)
+            return dict(task) if task is not None else None
+
+    def _run_semantic(self, task_id, resume_text, job_description, api_key):
+        from semantic import get_matcher
+        try:
+            try:
+                match = get_matcher(api_key).match(resume_text, job_description)
+            except Exception as e:
+                logger.warning("semantic match with embeddings failed, using the lexical fallback: %s", e)
+                match = get_matcher(embedder="hashing").match(resume_text, job_description)
+            task = {"status": "done", "result": match.to_dict()}
+        except Exception as e:
+            logger.warning("semantic match %s failed: %s", task_id, e)
+            task = {"status": "failed", "result": None}
+        with self._semantic_lock:
+            if task_id in self._semantic:
+                self._semantic[task_id] = task
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def stop(self):
+        self._stopped = True
+        self._semantic_pool.shutdown(wait=False)
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+    def _claim(self):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, filename, file, job_description, options FROM jobs"
+                " WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ?", (time.time(), row[0]))
+            return row
+
+    def _update(self, job_id, **fields):
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def _worker(self):
+        while not self._stopped:
+            job = self._claim()
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(timeout=1.0)
+                continue
+            self._run(*job)
+
+    def _run(self, job_id, filename, data, job_description, options):
+        from analyze_resume import analyze_resume_stream, error_result
+        api_key = self._secrets.pop(job_id, None)
+        partial = {"scores": {}, "recommendations": [], "improved_cv": ""}
+        last_flush = 0.0
+        result = None
+        resume_text = ""
+        try:
+            events = analyze_resume_stream(_NamedBytesIO(data, filename), job_description, api_key,
+                                           **json.loads(options))
+            for event, payload in events:
+                if event == "resume_text":
+                    resume_text = payload
+                    self._update(job_id, resume_text=payload)
+                elif event == "field":
+                    partial["scores"][payload[0]] = payload[1]
+                elif event == "recommendation":
+                    partial["recommendations"].append(list(payload))
+                elif event == "improved_cv":
+                    partial["improved_cv"] += payload
+                elif event == "done":
+                    result = payload
+                if time.monotonic() - last_flush > PARTIAL_FLUSH_INTERVAL:
+                    self._update(job_id, partial=json.dumps(partial))
+                    last_flush = time.monotonic()
+        except Exception as e:
+            result = error_result(str(e))
+        failed = result is None or not isinstance(result.get("score"), (int, float))
+        if not failed and api_key and candidate_store.INDEX_CANDIDATES:
+            try:
+                candidate_store.get_candidate_store().add(resume_text, result, job_description, filename,
+                                                          owner=candidate_store.owner_id(api_key))
+            except Exception as e:  # the analysis itself succeeded; searchability is best effort
+                logger.warning("could not index job %s in the candidate store: %s", job_id, e)
+        self._update(job_id, status="failed" if failed else "done", partial=json.dumps(partial),
+                     result=json.dumps(result or error_result("Analysis produced no result")))
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Process-wide queue shared by every Streamlit session."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
@@ -0,0 +1,140 @@
+import json
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_WHITESPACE = " \t\r\n"
+
+
+class IncrementalJSONParser:
+    """
+    Push parser for a JSON document that arrives in arbitrary chunks.
+
+    `feed(chunk)` returns the events that became available with that chunk:
+
+    - ("value", path, value): a scalar (string, number, bool, null) has been fully read.
+    - ("delta", path, text): more characters of a still-open string whose path is in
+      `stream_paths`, so long strings can be shown while they are generated.
+
+    `path` is a tuple of object keys / array indices from the root, e.g.
+    ("recommendations", "Impact & Metrics", 0). Anything before the first "{" or "["
+    (such as a ```json fence) and anything after the root value closes is ignored.
+    """
+
+    def __init__(self, stream_paths=()):
+        self.stream_paths = {tuple(p) for p in stream_paths}
+        self.done = False
+        self._stack = []        # [container_type, key_or_index, expecting_key]
+        self._started = False
+        self._string = None     # list of decoded chars of the current string
+        self._string_is_key = False
+        self._streamed = 0      # chars of the current string already emitted as deltas
+        self._escape = None     # None, "" after a backslash, or collected \\u hex digits
+        self._literal = None    # list of chars of the current number / true / false / null
+
+    def _path(self):
+        return tuple(entry[1] for entry in self._stack)
+
+    def _value_done(self, value, events):
+        events.append(("value", self._path(), value))
+        self._after_value()
+
+    def _after_value(self):
+        if not self._stack:
+            self.done = True
+
+    def _finish_literal(self, events):
+        text = "".join(self._literal)
+        self._literal = None
+        self._value_done(json.loads(text), events)
+
+    def _finish_string(self, events):
+        text = "".join(self._string)
+        self._string = None
+        if self._string_is_key:
+            self._stack[-1][1] = text
+            self._stack[-1][2] = False
+            return
+        path = self._path()
+        if path in self.stream_paths and self._streamed < len(text):
+            events.append(("delta", path, text[self._streamed:]))
+        self._value_done(text, events)
+
+    def _start_value(self):
+        # Arrays advance their index for every new element; objects already hold the key.
+        if self._stack and self._stack[-1][0] == "array":
+            self._stack[-1][1] += 1
+
+    def feed(self, chunk: str):
+        events = []
+        for ch in chunk:
+            if self.done:
+                break
+            if self._string is not None:
+                self._feed_string_char(ch, events)
+                continue
+            if self._literal is not None:
+                if ch in ",}]" or ch in _WHITESPACE:
+                    self._finish_literal(events)
+                    if self.done:
+                        break
+                else:
+                    self._literal.append(ch)
+                    continue
+            if not self._started:
+                if ch in "{[":
+                    self._started = True
+                else:
+                    continue
+            if ch in _WHITESPACE or ch == ":":
+                continue
+            if ch == ",":
+                if self._stack and self._stack[-1][0] == "object":
+                    self._stack[-1][2] = True
+                continue
+            if ch in "{[":
+                self._start_value()
+                self._stack.append(["object", None, True] if ch == "{" else ["array", -1, False])
+            elif ch in "}]":
+                self._stack.pop()
+                self._after_value()
+            elif ch == '"':
+                self._string_is_key = bool(self._stack) and self._stack[-1][0] == "object" and self._stack[-1][2]
+                if not self._string_is_key:
+                    self._start_value()
+                self._string = []
+                self._streamed = 0
+            else:
+                self._start_value()
+                self._literal = [ch]
+
+        # Flush the visible part of a streamed string at the end of each chunk.
+        if self._string is not None and not self._string_is_key:
+            path = self._path()
+            end = len(self._string)
+            if end and 0xD800 <= ord(self._string[-1]) <= 0xDBFF:
+                end -= 1  # hold back half a surrogate pair until its partner arrives
+            if path in self.stream_paths and self._streamed < end:
+                events.append(("delta", path, "".join(self._string[self._streamed:end])))
+                self._streamed = end
+        return events
+
+    def _feed_string_char(self, ch, events):
+        if self._escape is None:
+            if ch == "\\":
+                self._escape = ""
+            elif ch == '"':
+                self._finish_string(events)
+            else:
+                self._string.append(ch)
+        elif self._escape == "" and ch != "u":
+            self._string.append(_ESCAPES.get(ch, ch))
+            self._escape = None
+        else:
+            self._escape += ch
+            if len(self._escape) == 5:  # "u" + 4 hex digits
+                code = int(self._escape[1:], 16)
+                if 0xDC00 <= code <= 0xDFFF and self._string and 0xD800 <= ord(self._string[-1]) <= 0xDBFF:
+                    # Second half of a surrogate pair, e.g. an escaped emoji.
+                    high = ord(self._string.pop())
+                    code = 0x10000 + ((high - 0xD800) << 10) + (code - 0xDC00)
+                self._string.append(chr(code))
+                self._escape = None
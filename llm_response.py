@@ -0,0 +1,326 @@
+"""
+Turning model output into an analysis result without throwing away an expensive call.
+
+1. Requests use strict structured output (`response_format`), so well-behaved models
+   return exactly RESULT_SCHEMA.
+2. `parse_response` still accepts output that is not clean JSON: it strips ```json fences
+   and surrounding prose and tolerates trailing commas. It also recovers every complete
+   value from truncated output with the incremental parser.
+3. Fields that are still missing or invalid are fetched with one small follow-up request
+   for just those fields (`complete_missing` / `acomplete_missing`), instead of re-running
+   the whole analysis.
+
+`recovery_stats()` counts how responses were parsed and how often follow-ups saved them.
+"""
+import json
+import logging
+import math
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+
+from json_stream import IncrementalJSONParser
+
+logger = logging.getLogger(__name__)
+
+SCORE_FIELDS = ("score", "skills_score", "education_score", "experience_score", "keyword_score",
+                "formatting_score")
+RECOMMENDATION_SECTIONS = ("Skills & Keywords", "Experience Relevance", "Impact & Metrics",
+                           "Formatting & Clarity")
+REQUIRED_FIELDS = SCORE_FIELDS + ("recommendations", "improved_cv")
+# Set CV_MATCHER_STRUCTURED_OUTPUT=0 for models / endpoints without json_schema support.
+STRUCTURED_OUTPUT = os.environ.get("CV_MATCHER_STRUCTURED_OUTPUT", "1") != "0"
+FOLLOWUP_MAX_TOKENS = 300  # follow-ups without improved_cv only need a few scores / bullets
+
+_PROPERTY_SCHEMAS = {
+    **{name: {"type": "integer"} for name in SCORE_FIELDS},
+    "recommendations": {
+        "type": "object",
+        "properties": {section: {"type": "array", "items": {"type": "string"}}
+                       for section in RECOMMENDATION_SECTIONS},
+        "required": list(RECOMMENDATION_SECTIONS),
+        "additionalProperties": False,
+    },
+    "improved_cv": {"type": "string"},
+}
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.S)
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+_decoder = json.JSONDecoder()
+
+
+def result_schema(fields=REQUIRED_FIELDS) -> dict:
+    return {
+        "type": "object",
+        "properties": {name: _PROPERTY_SCHEMAS[name] for name in fields},
+        "required": list(fields),
+        "additionalProperties": False,
+    }
+
+
+def response_format(fields=REQUIRED_FIELDS) -> dict:
+    """`response_format` for chat.completions.create asking for exactly `fields`."""
+    return {"type": "json_schema",
+            "json_schema": {"name": "cv_analysis", "strict": True, "schema": result_schema(fields)}}
+
+
+RESULT_SCHEMA = result_schema()
+
+
+def request_options(fields=REQUIRED_FIELDS) -> dict:
+    """Extra chat.completions.create arguments: strict structured output unless disabled."""
+    return {"response_format": response_format(fields)} if STRUCTURED_OUTPUT else {}
+
+
+@dataclass
+class ParsedResponse:
+    data: dict
+    missing: list = field(default_factory=list)  # required fields absent or invalid
+    method: str = "json"  # json | extracted | partial | failed
+
+    @property
+    def complete(self) -> bool:
+        return not self.missing
+
+    @property
+    def usable(self) -> bool:
+        """Enough to show: the overall score is known (everything else has UI fallbacks)."""
+        return "score" not in self.missing
+
+
+class RecoveryStats:
+    """
+    How responses were parsed (json / extracted / partial / failed), how many were clean
+    (plain JSON with every field), and for the rest how many follow-ups were needed and
+    how many responses still ended up incomplete.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {"responses": 0, "clean": 0, "json": 0, "extracted": 0, "partial": 0, "failed": 0,
+                         "followups": 0, "followup_recovered": 0, "unrecovered": 0}
+
+    def add(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                self.counters[name] += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            snapshot = dict(self.counters)
+        needed_recovery = snapshot["responses"] - snapshot["clean"]
+        snapshot["clean_rate"] = round(snapshot["clean"] / snapshot["responses"], 3) if snapshot["responses"] else None
+        snapshot["recovery_rate"] = (round(1 - snapshot["unrecovered"] / needed_recovery, 3)
+                                     if needed_recovery else None)
+        return snapshot
+
+
+stats = RecoveryStats()
+
+
+def recovery_stats() -> dict:
+    return stats.snapshot()
+
+
+def extract_json(text: str):
+    """Best-effort JSON object from model output. Returns (dict, "json" | "extracted") or (None, None)."""
+    try:
+        value = json.loads(text)
+        if isinstance(value, dict):
+            return value, "json"
+    except ValueError:
+        pass
+    candidates = [m.group(1) for m in _FENCE.finditer(text)] + [text]
+    for candidate in candidates:
+        start = candidate.find("{")
+        if start < 0:
+            continue
+        for attempt in (candidate, _TRAILING_COMMA.sub(r"\1", candidate)):
+            try:
+                value, _ = _decoder.raw_decode(attempt, start)
+            except ValueError:
+                continue
+            if isinstance(value, dict):
+                return value, "extracted"
+    return None, None
+
+
+def recover_partial(text: str) -> dict:
+    """Every complete value of a truncated / malformed document, rebuilt into nested dicts and lists."""
+    parser = IncrementalJSONParser()
+    try:
+        events = parser.feed(text)
+    except ValueError:
+        events = []
+    data = {}
+    for kind, path, value in events:
+        if kind != "value" or not path or not isinstance(path[0], str):
+            continue
+        node = data
+        for key, next_key in zip(path, path[1:]):
+            if isinstance(node, list):
+                while len(node) <= key:
+                    node.append(None)
+                if node[key] is None:
+                    node[key] = [] if isinstance(next_key, int) else {}
+                node = node[key]
+            else:
+                node = node.setdefault(key, [] if isinstance(next_key, int) else {})
+        if isinstance(node, list):
+            while len(node) <= path[-1]:
+                node.append(None)
+            node[path[-1]] = value
+        else:
+            node[path[-1]] = value
+    return data
+
+
+def _score(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        value = value.strip().rstrip("%")
+        try:
+            value = float(value)
+        except ValueError:
+            return None
+    if isinstance(value, (int, float)) and math.isfinite(value):
+        return max(0, min(100, int(round(value))))
+    return None
+
+
+def validate(data: dict, fields=REQUIRED_FIELDS):
+    """
+    Coerce `fields` to the schema (numeric strings, out-of-range scores) and drop result
+    fields that were not asked for. Returns (clean, missing).
+    """
+    clean = {name: value for name, value in data.items() if name in fields or name not in REQUIRED_FIELDS}
+    missing = []
+    for name in SCORE_FIELDS:
+        if name not in fields:
+            continue
+        score = _score(data.get(name))
+        if score is None:
+            clean.pop(name, None)
+            missing.append(name)
+        else:
+            clean[name] = score
+    if "recommendations" in fields:
+        _validate_recommendations(data, clean, missing)
+    if "improved_cv" in fields:
+        if isinstance(data.get("improved_cv"), str) and data["improved_cv"].strip():
+            clean["improved_cv"] = data["improved_cv"]
+        else:
+            clean.pop("improved_cv", None)
+            missing.append("improved_cv")
+    return clean, missing
+
+
+def _validate_recommendations(data, clean, missing):
+    recommendations = data.get("recommendations")
+    if isinstance(recommendations, dict):
+        recommendations = {str(section): [b for b in bullets if isinstance(b, str) and b.strip()]
+                           for section, bullets in recommendations.items() if isinstance(bullets, list)}
+        recommendations = {section: bullets for section, bullets in recommendations.items() if bullets}
+    else:
+        recommendations = None
+    if recommendations:
+        clean["recommendations"] = recommendations
+    else:
+        clean.pop("recommendations", None)
+        missing.append("recommendations")
+
+
+def parse_response(text: str, record: bool = True, fields=REQUIRED_FIELDS) -> ParsedResponse:
+    """
+    Parse and validate model output that should contain `fields`; `record=False` keeps it
+    out of the recovery stats.
+    """
+    data, method = extract_json(text or "")
+    if data is None:
+        data = recover_partial(text or "")
+        method = "partial" if data else "failed"
+    clean, missing = validate(data, fields)
+    if record:
+        stats.add(responses=1, clean=int(method == "json" and not missing), **{method: 1})
+    return ParsedResponse(clean, missing, method)
+
+
+def followup_prompt(resume_text: str, job_description: str, fields, known: dict) -> str:
+    known = {name: value for name, value in known.items() if name != "improved_cv"}
+    return f"""
+    You are a professional career consultant. An earlier analysis of this resume against the job description
+    is missing some fields. Respond ONLY with valid JSON containing exactly these keys: {", ".join(fields)}.
+    Scores are integers 0-100; "recommendations" maps each of {", ".join(RECOMMENDATION_SECTIONS)} to a list of
+    short bullets; "improved_cv" is the resume rewritten in clean Markdown with clear sections.
+    Stay consistent with the fields already known:
+    {json.dumps(known, ensure_ascii=False)}
+
+    Resume:
+    {resume_text}
+
+    Job Description:
+    {job_description}
+    """
+
+
+def _followup_request(model: str, parsed: ParsedResponse, resume_text: str, job_description: str) -> dict:
+    request = {
+        "model": model,
+        "messages": [{"role": "user", "content": followup_prompt(resume_text, job_description, parsed.missing,
+                                                                 parsed.data)}],
+        "temperature": 0.2,
+        **request_options(parsed.missing),
+    }
+    if "improved_cv" not in parsed.missing:
+        request["max_tokens"] = FOLLOWUP_MAX_TOKENS
+    return request
+
+
+def _merge_followup(parsed: ParsedResponse, content: str) -> ParsedResponse:
+    followup = parse_response(content, record=False, fields=parsed.missing)
+    merged = dict(parsed.data)
+    for name in parsed.missing:
+        if name not in followup.missing:
+            merged[name] = followup.data[name]
+    missing = [name for name in parsed.missing if name in followup.missing]
+    stats.add(followup_recovered=int(not missing), unrecovered=int(bool(missing)))
+    return ParsedResponse(merged, missing, parsed.method)
+
+
+def _followup_failed(parsed: ParsedResponse, error) -> ParsedResponse:
+    # The main answer is still worth returning; the follow-up was only meant to complete it.
+    logger.warning("follow-up for %s failed: %s", ", ".join(parsed.missing), error)
+    stats.add(unrecovered=1)
+    return parsed
+
+
+def _no_followup(parsed: ParsedResponse) -> bool:
+    if parsed.complete:
+        return True
+    stats.add(followups=1)
+    return False
+
+
+def complete_missing(client, model: str, parsed: ParsedResponse, resume_text: str,
+                     job_description: str) -> ParsedResponse:
+    """Fetch just the missing fields with one follow-up call (`client` is an openai_client.ManagedClient)."""
+    if _no_followup(parsed):
+        return parsed
+    try:
+        response = client.chat(**_followup_request(model, parsed, resume_text, job_description))
+    except Exception as e:
+        return _followup_failed(parsed, e)
+    return _merge_followup(parsed, response.choices[0].message.content)
+
+
+async def acomplete_missing(client, model: str, parsed: ParsedResponse, resume_text: str,
+                            job_description: str) -> ParsedResponse:
+    if _no_followup(parsed):
+        return parsed
+    try:
+        response = await client.achat(**_followup_request(model, parsed, resume_text, job_description))
+    except Exception as e:
+        return _followup_failed(parsed, e)
+    return _merge_followup(parsed, response.choices[0].message.content)
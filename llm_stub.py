@@ -0,0 +1,178 @@
+"""
+Local stand-in for the OpenAI chat completions endpoint.
+
+Used to exercise batch runs, benchmarks and load tests without spending tokens:
+
+    python llm_stub.py --port 8000 --latency 0.5 --rate-limit-every 10
+    python batch.py --base-url http://127.0.0.1:8000/v1 --api-key stub --jd posting.txt resumes/*.pdf
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_RESULT = {
+    "score": 72,
+    "skills_score": 70,
+    "education_score": 80,
+    "experience_score": 68,
+    "keyword_score": 75,
+    "formatting_score": 85,
+    "recommendations": {
+        "Skills & Keywords": ["Mention Kubernetes explicitly", "Add Python packaging experience"],
+        "Experience Relevance": ["Lead with the most relevant role"],
+        "Impact & Metrics": ["Quantify latency improvements"],
+        "Formatting & Clarity": ["Use consistent bullet style"]
+    },
+    "improved_cv": "# Jane Doe\n📧 jane@example.com\n\n## Experience\n### Engineer — Acme\n- Built things\n"
+}
+
+
+class StubState:
+    def __init__(self, latency=0.0, rate_limit_every=0, content=None):
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.custom_content = content is not None
+        self.content = content if content is not None else json.dumps(STUB_RESULT)
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def content_for(self, request: dict) -> str:
+        """The canned answer, narrowed to the fields a structured-output request asks for."""
+        schema = ((request.get("response_format") or {}).get("json_schema") or {}).get("schema")
+        if self.custom_content or not schema:
+            return self.content
+        return json.dumps({name: STUB_RESULT[name] for name in schema.get("required", []) if name in STUB_RESULT})
+
+    def next_request(self) -> int:
+        with self.lock:
+            self.requests += 1
+            return self.requests
+
+
+def completion_body(content: str, model: str, prompt_tokens: int) -> dict:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(content) // 4,
+            "total_tokens": prompt_tokens + len(content) // 4,
+        },
+    }
+
+
+def chunk_bodies(content: str, model: str, chunk_size: int = 16):
+    """Split `content` into chat.completion.chunk payloads, like a streamed response."""
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    for i in range(0, len(content), chunk_size):
+        yield {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": content[i:i + chunk_size]}, "finish_reason": None}],
+        }
+    yield {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+    }
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, body, headers=None):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _send_stream(self, model, content):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            events = [f"data: {json.dumps(body)}\n\n" for body in chunk_bodies(content, model)]
+            events.append("data: [DONE]\n\n")
+            for event in events:
+                data = event.encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            n = state.next_request()
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+                return
+            if state.rate_limit_every and n % state.rate_limit_every == 0:
+                self._send_json(
+                    429,
+                    {"error": {"message": "Rate limit reached (stub)", "type": "requests", "code": "rate_limit_exceeded"}},
+                    headers={"Retry-After": "0.1"},
+                )
+                return
+            if state.latency:
+                time.sleep(state.latency)
+            content = state.content_for(request)
+            if request.get("stream"):
+                self._send_stream(request.get("model", "stub"), content)
+                return
+            prompt = "".join(m.get("content") or "" for m in request.get("messages", []))
+            body = completion_body(content, request.get("model", "stub"), len(prompt) // 4)
+            self._send_json(200, body)
+
+    return Handler
+
+
+def serve(host="127.0.0.1", port=8000, latency=0.0, rate_limit_every=0, content=None):
+    """Start the stub in a background thread and return the server (call `.shutdown()` to stop)."""
+    state = StubState(latency=latency, rate_limit_every=rate_limit_every, content=content)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stub of the OpenAI chat completions API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to sleep before each response.")
+    parser.add_argument("--rate-limit-every", type=int, default=0,
+                        help="Answer every Nth request with HTTP 429 (0 disables).")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.latency, args.rate_limit_every)
+    print(f"LLM stub listening on http://{args.host}:{server.server_address[1]}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
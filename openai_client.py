@@ -0,0 +1,360 @@
+"""
+Shared OpenAI clients.
+
+One client per (API key, base URL) is shared so HTTP connections (and their TLS sessions)
+are reused between analyses; the MAX_CLIENTS most recently used are kept, and an evicted
+one closes its connections once the last caller holding it lets go. Calls go through `ManagedClient.chat`
+/ `achat`, which add:
+
+- exponential backoff with full jitter on 429 / 5xx / connection errors, honoring Retry-After
+- a circuit breaker that fails fast after repeated upstream failures
+- metrics: request latency, retries, failures and token usage
+- admission through the process-wide governor (governor.py), which queues calls fairly
+  per user until they fit the RPM / TPM budget
+
+Point OPENAI_BASE_URL at a local fake (see llm_stub.py) to exercise all of this offline.
+"""
+import asyncio
+import hashlib
+import os
+import random
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+
+import httpx
+from openai import AsyncOpenAI, OpenAI, APIConnectionError, APIStatusError, APITimeoutError, OpenAIError
+
+from governor import estimate_tokens, get_governor
+from tracing import percentiles, span
+
+REQUEST_TIMEOUT = float(os.environ.get("CV_MATCHER_OPENAI_TIMEOUT", "120"))
+CONNECT_TIMEOUT = 10.0
+MAX_CONNECTIONS = 20
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+BREAKER_THRESHOLD = 5  # consecutive failed calls before the circuit opens
+BREAKER_COOLDOWN = 30.0  # seconds before a trial call is let through again
+MAX_CLIENTS = int(os.environ.get("CV_MATCHER_MAX_CLIENTS", "64"))  # shared clients (API keys) kept
+
+
+class CircuitOpenError(OpenAIError):
+    """Raised without calling the API while the circuit breaker is open."""
+
+
+def retry_delay(error, attempt: int) -> float:
+    """Honor Retry-After when the server sends it, otherwise exponential backoff with full jitter."""
+    response = getattr(error, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(float(retry_after), BACKOFF_MAX)
+            except ValueError:
+                pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def is_retryable(error) -> bool:
+    if isinstance(error, (APIConnectionError, APITimeoutError)):
+        return True
+    return isinstance(error, APIStatusError) and (error.status_code in (408, 409, 429) or error.status_code >= 500)
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures. After `cooldown` seconds it is half-open:
+    a single trial call (the probe) goes through and its outcome closes or reopens the
+    circuit; other calls are rejected meanwhile.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if self.clock() - self.opened_at >= self.cooldown else "open"
+
+    def admit(self):
+        """"closed" or "probe" when a call may go ahead, None when it must be rejected."""
+        with self._lock:
+            state = self.state
+            if state == "half-open" and not self.probing:
+                self.probing = True
+                return "probe"
+            return "closed" if state == "closed" else None
+
+    def allow(self) -> bool:
+        return self.admit() is not None
+
+    def release(self):
+        """End the probe without a verdict (e.g. a client error), so the next call probes again."""
+        with self._lock:
+            self.probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = self.clock()
+            self.probing = False
+
+
+class Metrics:
+    """Thread-safe counters plus a window of recent latencies."""
+
+    def __init__(self, window=500):
+        self._lock = threading.Lock()
+        self.latencies = deque(maxlen=window)
+        self.counters = {"requests": 0, "failures": 0, "retries": 0, "rejected": 0,
+                         "prompt_tokens": 0, "completion_tokens": 0}
+
+    def add(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                self.counters[name] += value
+
+    def observe(self, latency: float, usage=None):
+        with self._lock:
+            self.latencies.append(latency)
+            if usage is not None:
+                self.counters["prompt_tokens"] += usage.prompt_tokens or 0
+                # Embedding responses only report prompt tokens.
+                self.counters["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = list(self.latencies)
+            snapshot = dict(self.counters)
+        snapshot.update(percentiles(latencies, "latency"))
+        return snapshot
+
+
+def _usage_tokens(usage):
+    if usage is None:
+        return None
+    return (usage.prompt_tokens or 0) + (getattr(usage, "completion_tokens", 0) or 0)
+
+
+class ManagedClient:
+    def __init__(self, api_key, base_url=None, timeout=REQUEST_TIMEOUT, max_retries=MAX_RETRIES, governor=None):
+        self.api_key = api_key
+        self.base_url = base_url
+        # Calls are queued per user for fairness; without a `user` field that is the API key.
+        self.user = hashlib.sha256((api_key or "").encode()).hexdigest()[:16]
+        self.governor = governor if governor is not None else get_governor()
+        self.timeout = httpx.Timeout(timeout, connect=CONNECT_TIMEOUT)
+        self.limits = httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS)
+        self.max_retries = max_retries
+        self.breaker = CircuitBreaker()
+        self.metrics = Metrics()
+        # The SDK's own retries are disabled so backoff, breaker and metrics all live here.
+        self.http_client = httpx.Client(timeout=self.timeout, limits=self.limits)
+        self.client = OpenAI(
+            api_key=api_key, base_url=base_url, max_retries=0, timeout=self.timeout, http_client=self.http_client,
+        )
+        self._async_clients = weakref.WeakKeyDictionary()  # event loop -> AsyncOpenAI
+        # Pooled connections are closed when the client is dropped (e.g. evicted by get_client).
+        weakref.finalize(self, self.http_client.close)
+
+    def async_client(self) -> AsyncOpenAI:
+        """AsyncOpenAI bound to the running event loop (httpx async pools cannot cross loops)."""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = AsyncOpenAI(
+                api_key=self.api_key, base_url=self.base_url, max_retries=0, timeout=self.timeout,
+                http_client=httpx.AsyncClient(timeout=self.timeout, limits=self.limits),
+            )
+            self._async_clients[loop] = client
+        return client
+
+    async def aclose(self):
+        """Close the async client of the running loop (call before the loop shuts down)."""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+
+    def _check_breaker(self) -> bool:
+        """Raise while the circuit is open; returns whether this call is the half-open probe."""
+        admission = self.breaker.admit()
+        if admission is None:
+            self.metrics.add(rejected=1)
+            raise CircuitOpenError("OpenAI API is failing repeatedly; pausing requests for a moment.")
+        return admission == "probe"
+
+    def _record_stream(self, stream, started, ticket, probe):
+        """Yield the chunks; the breaker only counts the call as a success once all arrived."""
+        usage = None
+        try:
+            for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                yield chunk
+            self.breaker.record_success()
+            self.metrics.observe(time.perf_counter() - started, usage)
+        except OpenAIError as e:  # e.g. the connection dropped mid-stream
+            self._failed(e)
+            raise
+        finally:
+            self._settle(ticket, usage)  # a stream cut short keeps its estimate
+            if probe:
+                self.breaker.release()  # no-op once the outcome is recorded
+
+    def _admit(self, kwargs):
+        """Wait for the governor to admit this call; returns its ticket (None without a governor)."""
+        if self.governor is None:
+            return None
+        with span("queue") as queued:
+            ticket = self.governor.acquire(kwargs.get("user") or self.user, estimate_tokens(kwargs))
+            queued.set(tokens=ticket.estimate)
+        return ticket
+
+    async def _aadmit(self, kwargs):
+        if self.governor is None:
+            return None
+        return await self.governor.aacquire(kwargs.get("user") or self.user, estimate_tokens(kwargs))
+
+    def _settle(self, ticket, usage):
+        if ticket is not None:
+            self.governor.settle(ticket, _usage_tokens(usage))
+
+    def _refund(self, ticket):
+        """Give a failed attempt's tokens back to the governor: the API does not bill them."""
+        if ticket is not None:
+            self.governor.settle(ticket, 0)
+
+    def _request(self, create, kwargs):
+        """
+        Call `create(**kwargs)` with retries; returns (response, start time of the successful
+        attempt, governor ticket, whether the call is the half-open probe). Every attempt is
+        admitted by the governor first. A streamed response is judged by the breaker once
+        consumed (see _record_stream), anything else as soon as it arrives.
+        """
+        probe = self._check_breaker()
+        try:
+            for attempt in range(self.max_retries + 1):
+                ticket = self._admit(kwargs)
+                started = time.perf_counter()
+                self.metrics.add(requests=1)
+                try:
+                    response = create(**kwargs)
+                except OpenAIError as e:
+                    self._refund(ticket)
+                    if attempt < self.max_retries and is_retryable(e):
+                        self.metrics.add(retries=1)
+                        time.sleep(retry_delay(e, attempt))
+                        continue
+                    self._failed(e)
+                    raise
+                if not kwargs.get("stream"):
+                    self.breaker.record_success()
+                return response, started, ticket, probe
+        except BaseException:
+            if probe:  # e.g. a client error or a governor timeout: no verdict on upstream health
+                self.breaker.release()
+            raise
+
+    def chat(self, **kwargs):
+        """chat.completions.create with retries; streamed responses are wrapped to record usage."""
+        if kwargs.get("stream"):
+            kwargs.setdefault("stream_options", {"include_usage": True})
+        response, started, ticket, probe = self._request(self.client.chat.completions.create, kwargs)
+        if kwargs.get("stream"):
+            return self._record_stream(response, started, ticket, probe)
+        self.metrics.observe(time.perf_counter() - started, response.usage)
+        self._settle(ticket, response.usage)
+        return response
+
+    def embed(self, **kwargs):
+        """embeddings.create with the same retry / breaker / metrics policy."""
+        response, started, ticket, _ = self._request(self.client.embeddings.create, kwargs)
+        self.metrics.observe(time.perf_counter() - started, response.usage)
+        self._settle(ticket, response.usage)
+        return response
+
+    async def achat(self, **kwargs):
+        """Async chat.completions.create with the same retry / breaker / metrics policy."""
+        probe = self._check_breaker()
+        try:
+            client = self.async_client()
+            for attempt in range(self.max_retries + 1):
+                ticket = await self._aadmit(kwargs)
+                started = time.perf_counter()
+                self.metrics.add(requests=1)
+                try:
+                    response = await client.chat.completions.create(**kwargs)
+                except OpenAIError as e:
+                    self._refund(ticket)
+                    if attempt < self.max_retries and is_retryable(e):
+                        self.metrics.add(retries=1)
+                        await asyncio.sleep(retry_delay(e, attempt))
+                        continue
+                    self._failed(e)
+                    raise
+                self.breaker.record_success()
+                self.metrics.observe(time.perf_counter() - started, response.usage)
+                self._settle(ticket, response.usage)
+                return response
+        except BaseException:
+            if probe:
+                self.breaker.release()
+            raise
+
+    def _failed(self, error):
+        self.metrics.add(failures=1)
+        # Client-side mistakes (bad request, auth) say nothing about upstream health.
+        if is_retryable(error):
+            self.breaker.record_failure()
+
+
+_clients = OrderedDict()  # (sha256 of the API key, base URL) -> ManagedClient, least recently used first
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key, base_url=None) -> ManagedClient:
+    """Shared client for this API key and endpoint (OPENAI_BASE_URL is used when base_url is None)."""
+    base_url = base_url or os.environ.get("OPENAI_BASE_URL")
+    key = (hashlib.sha256((api_key or "").encode()).hexdigest(), base_url)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = ManagedClient(api_key, base_url)
+            while len(_clients) > MAX_CLIENTS:
+                # Not closed here: a caller may still be using it. Its connections close
+                # when the last reference goes (see ManagedClient.__init__).
+                _clients.popitem(last=False)
+        else:
+            _clients.move_to_end(key)
+        return client
+
+
+def metrics_snapshot() -> dict:
+    """Metrics summed over every shared client (latency percentiles over all recent calls)."""
+    combined = Metrics(window=10_000)
+    with _clients_lock:
+        clients = list(_clients.values())
+    for client in clients:
+        combined.add(**client.metrics.counters)
+        combined.latencies.extend(client.metrics.latencies)
+    snapshot = combined.snapshot()
+    snapshot["open_circuits"] = sum(1 for client in clients if client.breaker.state == "open")
+    governor = get_governor()
+    snapshot["governor"] = governor.snapshot() if governor is not None else None
+    return snapshot
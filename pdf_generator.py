@@ -1,114 +1,143 @@
+from functools import lru_cache
 from io import BytesIO
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.styles import ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, HRFlowable
 from reportlab.lib.pagesizes import LETTER
 from reportlab.lib import colors
 
-
-def generate_pdf_from_markdown(md_text: str) -> bytes:
-    buffer = BytesIO()
-
-    # Create PDF document
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=LETTER,
-        rightMargin=50,
-        leftMargin=50,
-        topMargin=50,
-        bottomMargin=50
-    )
-
-    styles = getSampleStyleSheet()
-
-    # Custom styles
-    styles.add(ParagraphStyle(
-        name="NameHeader",
-        fontSize=30,
-        leading=32,
-        alignment=1,  # center
-        fontName="Times-Bold",
-        spaceAfter=6
-    ))
-
-    styles.add(ParagraphStyle(
-        name="Contact",
-        fontSize=10,
-        leading=12,
-        alignment=1,  # center
-        textColor=colors.grey,
-        fontName="Times-Italic",
-        spaceAfter=10
-    ))
-
-    styles.add(ParagraphStyle(
-        name="SectionHeader",
-        fontSize=14,
-        leading=16,
-        fontName="Times-Bold",
-        spaceBefore=12,
-        spaceAfter=6
-    ))
-
-    styles.add(ParagraphStyle(
-        name="PositionHeader",
-        fontSize=11,
-        leading=13,
-        fontName="Times-Bold",
-        spaceBefore=4,
-        spaceAfter=2
-    ))
-
-    styles.add(ParagraphStyle(
-        name="BodyTextCustom",
-        fontSize=10.5,
-        leading=13,
-        fontName="Times-Roman",
-        spaceAfter=4,
-        alignment=4  # justify
-    ))
-
-    flow = []
-    contact_inserted = False
-
-    lines = md_text.splitlines()
-    for i, line in enumerate(lines):
-        line = line.strip()
-        if not line:
-            flow.append(Spacer(1, 4))
-            continue
-
-        # Name header
-        if line.startswith("# "):
-            flow.append(Paragraph(line[2:].strip(), styles["NameHeader"]))
-            flow.append(HRFlowable(width="100%", thickness=0.8, color=colors.grey, spaceBefore=6, spaceAfter=10))
-
-        # Contacts
-        elif line.startswith(("📧", "📞", "🌐")):
-            flow.append(Paragraph(line, styles["Contact"]))
-            if not contact_inserted:
-                flow.append(HRFlowable(width="100%", thickness=0.6, color=colors.grey, spaceBefore=4, spaceAfter=10))
-                contact_inserted = True
-
-        # Section headers (Career Objective, Core Competencies, Professional Experience, etc.)
-        elif line.startswith("## "):
-            flow.append(HRFlowable(width="100%", thickness=0.5, color=colors.grey, spaceBefore=6, spaceAfter=4))
-            flow.append(Paragraph(line[3:].strip(), styles["SectionHeader"]))
-
-        # Position / Company
-        elif line.startswith("### ") or ("—" in line and line.startswith("**")):
-            clean_line = line.replace("*", "").replace("### ", "").strip()
-            flow.append(Paragraph(clean_line, styles["PositionHeader"]))
-            flow.append(Spacer(1, 2))
-
-        # Body text or bullets
-        else:
-            # Standardize bullet lists
-            if line.startswith("- "):
-                flow.append(Paragraph(line, styles["BodyTextCustom"]))
+from cv_markdown import Blank, Contact, is_position, parse_cv, position_title
+
+# Fonts, sizes and colours per theme; "classic" is the original look.
+THEMES = {
+    "classic": {
+        "font": "Times-Roman", "bold": "Times-Bold", "italic": "Times-Italic",
+        "name_size": 30, "section_size": 14, "position_size": 11, "body_size": 10.5,
+        "accent": colors.black, "rule": colors.grey,
+    },
+    "modern": {
+        "font": "Helvetica", "bold": "Helvetica-Bold", "italic": "Helvetica-Oblique",
+        "name_size": 26, "section_size": 13, "position_size": 11, "body_size": 10,
+        "accent": colors.HexColor("#2c7be5"), "rule": colors.HexColor("#2c7be5"),
+    },
+    "compact": {
+        "font": "Helvetica", "bold": "Helvetica-Bold", "italic": "Helvetica-Oblique",
+        "name_size": 20, "section_size": 11.5, "position_size": 10, "body_size": 9,
+        "accent": colors.black, "rule": colors.lightgrey,
+    },
+}
+
+
+class CVRenderer:
+    """
+    Renders parsed CVs (see cv_markdown.parse_cv) to PDF.
+    Styles are built once per renderer, so rendering many CVs only pays for layout.
+    """
+
+    def __init__(self, theme: str = "classic", pagesize=LETTER, margin: float = 50):
+        t = THEMES[theme]
+        self.theme = theme
+        self.pagesize = pagesize
+        self.margin = margin
+        self.rule_color = t["rule"]
+        self.styles = {
+            "NameHeader": ParagraphStyle(
+                name="NameHeader",
+                fontSize=t["name_size"],
+                leading=t["name_size"] + 2,
+                alignment=1,  # center
+                fontName=t["bold"],
+                textColor=t["accent"],
+                spaceAfter=6
+            ),
+            "Contact": ParagraphStyle(
+                name="Contact",
+                fontSize=10,
+                leading=12,
+                alignment=1,  # center
+                textColor=colors.grey,
+                fontName=t["italic"],
+                spaceAfter=10
+            ),
+            "SectionHeader": ParagraphStyle(
+                name="SectionHeader",
+                fontSize=t["section_size"],
+                leading=t["section_size"] + 2,
+                fontName=t["bold"],
+                textColor=t["accent"],
+                spaceBefore=12,
+                spaceAfter=6
+            ),
+            "PositionHeader": ParagraphStyle(
+                name="PositionHeader",
+                fontSize=t["position_size"],
+                leading=t["position_size"] + 2,
+                fontName=t["bold"],
+                spaceBefore=4,
+                spaceAfter=2
+            ),
+            "BodyTextCustom": ParagraphStyle(
+                name="BodyTextCustom",
+                fontSize=t["body_size"],
+                leading=t["body_size"] + 2.5,
+                fontName=t["font"],
+                spaceAfter=4,
+                alignment=4  # justify
+            ),
+        }
+
+    def _rule(self, thickness, space_before, space_after):
+        return HRFlowable(width="100%", thickness=thickness, color=self.rule_color,
+                          spaceBefore=space_before, spaceAfter=space_after)
+
+    def flowables(self, document) -> list:
+        styles = self.styles
+        flow = []
+        contact_inserted = False
+        for node in document.nodes:
+            line = node.line
+            if isinstance(node, Blank):
+                flow.append(Spacer(1, 4))
+            elif line.startswith("# "):
+                flow.append(Paragraph(line[2:].strip(), styles["NameHeader"]))
+                flow.append(self._rule(0.8, 6, 10))
+            elif isinstance(node, Contact):
+                flow.append(Paragraph(line, styles["Contact"]))
+                if not contact_inserted:
+                    flow.append(self._rule(0.6, 4, 10))
+                    contact_inserted = True
+            elif line.startswith("## "):
+                flow.append(self._rule(0.5, 6, 4))
+                flow.append(Paragraph(line[3:].strip(), styles["SectionHeader"]))
+            elif is_position(node):
+                flow.append(Paragraph(position_title(node), styles["PositionHeader"]))
+                flow.append(Spacer(1, 2))
             else:
                 flow.append(Paragraph(line, styles["BodyTextCustom"]))
-
-    doc.build(flow)
-    pdf = buffer.getvalue()
-    buffer.close()
-    return pdf
+        return flow
+
+    def render(self, document, out=None) -> bytes:
+        """Render to PDF bytes, or into the binary file object `out` (returns b"" then)."""
+        buffer = out if out is not None else BytesIO()
+        doc = SimpleDocTemplate(
+            buffer,
+            pagesize=self.pagesize,
+            rightMargin=self.margin,
+            leftMargin=self.margin,
+            topMargin=self.margin,
+            bottomMargin=self.margin
+        )
+        doc.build(self.flowables(document))
+        if out is not None:
+            return b""
+        pdf = buffer.getvalue()
+        buffer.close()
+        return pdf
+
+
+@lru_cache(maxsize=None)
+def get_renderer(theme: str = "classic") -> CVRenderer:
+    return CVRenderer(theme)
+
+
+def generate_pdf_from_markdown(md_text: str, theme: str = "classic") -> bytes:
+    return get_renderer(theme).render(parse_cv(md_text))
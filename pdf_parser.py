@@ -1,9 +1,92 @@
-from PyPDF2 import PdfReader
+import io
+import math
+import multiprocessing
+import os
+import time
+
+from tracing import span
+
+# Opt-in parallel extraction for long PDFs (portfolios, publication lists).
+PARALLEL_EXTRACTION = os.environ.get("CV_MATCHER_PARALLEL_PDF", "") == "1"
+PARALLEL_PAGE_THRESHOLD = 24  # below this many pages process start-up costs more than it saves
+PAGE_TIMEOUT = 10.0  # seconds per page and worker; pages still running at the deadline come back empty
+
+_worker_reader = None
+
+
+class PdfPages(list):
+    """Page texts in order; `timed_out` holds the indices of pages given up on (returned as "")."""
+
+    timed_out = ()
+
+
+def _init_worker(data: bytes):
+    # Each worker parses the document once and then serves page indices.
+    global _worker_reader
+    from PyPDF2 import PdfReader
+    _worker_reader = PdfReader(io.BytesIO(data))
+
+
+def _extract_page(index: int) -> str:
+    return _worker_reader.pages[index].extract_text() or ""
+
+
+def _extract_parallel(data: bytes, page_count: int, max_workers=None, page_timeout=PAGE_TIMEOUT) -> PdfPages:
+    max_workers = min(max_workers or os.cpu_count() or 1, page_count)
+    # One deadline for the whole document: as long as the pages would take if each used its full
+    # timeout on a fully busy pool. Waiting page by page instead could add up to far more.
+    deadline = time.monotonic() + page_timeout * math.ceil(page_count / max_workers)
+    # spawn: forking a process that runs threads (Streamlit, the service) can deadlock the children.
+    context = multiprocessing.get_context("spawn")
+    pages = PdfPages()
+    timed_out = []
+    # Leaving the block terminates the pool, so a stuck worker stops burning a core once we move on.
+    with context.Pool(max_workers, initializer=_init_worker, initargs=(data,)) as pool:
+        results = [pool.apply_async(_extract_page, (index,)) for index in range(page_count)]
+        for index, result in enumerate(results):
+            result.wait(max(0.0, deadline - time.monotonic()))
+            if not result.ready():
+                timed_out.append(index)
+                pages.append("")
+                continue
+            try:
+                pages.append(result.get())
+            except Exception:  # a page PyPDF2 cannot read must not cost the rest of the document
+                pages.append("")
+    pages.timed_out = tuple(timed_out)
+    return pages
+
+
+def extract_pdf_pages(uploaded_file, parallel=None, max_workers=None,
+                      threshold=PARALLEL_PAGE_THRESHOLD, page_timeout=PAGE_TIMEOUT) -> list:
+    """
+    Extract the text of every page, in order.
+
+    With `parallel` (default: PARALLEL_EXTRACTION) documents of at least `threshold` pages
+    are split across a process pool. Pages that fail, or are still running when the deadline
+    (`page_timeout` per page and worker) passes, come back empty; the result's `timed_out`
+    lists the latter.
+    """
+    from PyPDF2 import PdfReader  # imported on first use: it is slow to import and only needed for PDFs
+
+    with span("pdf_extract") as pdf_span:
+        reader = PdfReader(uploaded_file)
+        page_count = len(reader.pages)
+        parallel = PARALLEL_EXTRACTION if parallel is None else parallel
+        parallel = parallel and page_count >= max(threshold, 2)
+        pdf_span.set(pages=page_count, parallel=parallel)
+        if not parallel:
+            return PdfPages(page.extract_text() or "" for page in reader.pages)
+
+        if hasattr(uploaded_file, "getvalue"):
+            data = uploaded_file.getvalue()
+        else:
+            uploaded_file.seek(0)
+            data = uploaded_file.read()
+        pages = _extract_parallel(data, page_count, max_workers=max_workers, page_timeout=page_timeout)
+        pdf_span.set(timed_out=len(pages.timed_out))
+        return pages
 
 
 def parse_pdf(uploaded_file):
-    reader = PdfReader(uploaded_file)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() + "\n"
-    return text
+    return "".join(f"{page}\n" for page in extract_pdf_pages(uploaded_file))
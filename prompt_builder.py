@@ -0,0 +1,202 @@
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+try:
+    import tiktoken
+except ImportError:  # optional: fall back to a character-based estimate
+    tiktoken = None
+
+PROMPT_TOKEN_BUDGET = int(os.environ.get("CV_MATCHER_PROMPT_BUDGET", "12000"))
+# Share of the input budget the job description may use before the resume is cut.
+JD_BUDGET_SHARE = 0.35
+
+_PAGE_NUMBER = re.compile(r"^\s*(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?\s*$", re.IGNORECASE)
+_EEO = re.compile(
+    r"equal (employment )?opportunity|\beeo\b|affirmative action|regardless of (race|gender|age)|"
+    r"without regard to|reasonable accommodation|e-?verify",
+    re.IGNORECASE,
+)
+# A heading line on its own ("Benefits", "What we offer:"), not a sentence that starts with the word.
+_BENEFITS_HEADING = re.compile(
+    r"^\W*(benefits|perks|what we offer|why join us|compensation (and|&) benefits)\W*$", re.IGNORECASE
+)
+_HEADING = re.compile(r"^\s*(#+\s+\S.*|[A-Z][\w &/,-]{1,60}:)\s*$")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+_encodings = {}
+
+
+def _encoding(model: str):
+    """The tiktoken encoding for `model`, or None when tiktoken is missing or cannot load it."""
+    if tiktoken is None:
+        return None
+    if model not in _encodings:
+        try:
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:  # e.g. offline, with the BPE file not downloaded yet; don't retry every call
+            encoding = None
+        _encodings[model] = encoding
+    return _encodings[model]
+
+
+def count_tokens(text: str, model: str = "gpt-4.1-nano") -> int:
+    """Count tokens locally with tiktoken when available, else estimate ~4 characters per token."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _collapse_whitespace(text: str) -> str:
+    text = re.sub(r"[ \t\u00a0]+", " ", text)
+    text = re.sub(r" ?\n ?", "\n", text)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def _repeated_edge_lines(pages) -> set:
+    """Lines that appear at the top or bottom of most pages (running headers / footers)."""
+    if len(pages) < 3:
+        return set()
+    counts = Counter()
+    for page in pages:
+        lines = [line.strip() for line in page.splitlines() if line.strip()]
+        counts.update(set(lines[:2] + lines[-2:]))
+    return {line for line, n in counts.items() if n > len(pages) / 2}
+
+
+def compress_resume(resume_text: str, pages=None) -> str:
+    """Drop page numbers and running headers/footers, and collapse whitespace."""
+    repeated = _repeated_edge_lines(pages or [])
+    kept = [
+        line for line in resume_text.splitlines()
+        if not _PAGE_NUMBER.match(line) and line.strip() not in repeated
+    ]
+    return _collapse_whitespace("\n".join(kept))
+
+
+def _drop_boilerplate(job_description: str) -> list:
+    """
+    Lines of the job description without EEO sentences and benefits sections. A benefits
+    section is a heading line and the paragraph under it (on the next lines, or after one
+    blank line); it also ends at the next heading.
+    """
+    kept = []
+    benefits = None  # None, "heading" (body not started yet) or "body"
+    for line in job_description.split("\n"):
+        if _BENEFITS_HEADING.match(line):
+            benefits = "heading"
+            continue
+        if benefits is not None:
+            if _HEADING.match(line):
+                benefits = None
+            elif not line.strip():
+                if benefits == "body":
+                    benefits = None
+                    kept.append(line)
+                continue
+            else:
+                benefits = "body"
+                continue
+        if _EEO.search(line):
+            line = " ".join(s for s in _SENTENCE.split(line.strip()) if not _EEO.search(s))
+            if not line:
+                continue
+        kept.append(line)
+    return kept
+
+
+def compress_job_description(job_description: str) -> str:
+    """
+    Drop EEO sentences, benefits sections and paragraphs repeated verbatim. Filtering is
+    line by line, so a posting without blank lines keeps its requirements; a posting that
+    would come out empty is returned whole.
+    """
+    seen = set()
+    kept = []
+    for block in re.split(r"\n\s*\n", "\n".join(_drop_boilerplate(job_description))):
+        key = re.sub(r"\W+", " ", block).strip().lower()
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        kept.append(block)
+    return _collapse_whitespace("\n\n".join(kept)) or _collapse_whitespace(job_description)
+
+
+def _head(text: str, max_tokens: int, model: str) -> str:
+    """The longest start of `text` that fits in `max_tokens`, cut mid-line if need be."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _encoding(model)
+    if encoding is None:
+        head = text[:max_tokens * 4]
+    else:
+        # A cut inside a multi-byte character decodes to U+FFFD.
+        head = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens]).rstrip("\ufffd")
+    while head and count_tokens(head, model) > max_tokens:  # re-encoding can merge tokens differently
+        head = head[:-1]
+    return head.rstrip()
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-4.1-nano") -> str:
+    """
+    Keep whole lines from the start of `text` until `max_tokens` is reached; the line that
+    overflows is cut inside, so text pasted as one long line keeps its head.
+    """
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    kept, used = [], 0
+    for line in text.split("\n"):
+        cost = count_tokens(line + "\n", model)
+        if used + cost > max_tokens:
+            head = _head(line, max_tokens - used, model)
+            if head:
+                kept.append(head)
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept)
+
+
+@dataclass
+class PromptBuild:
+    resume_text: str
+    job_description: str
+    original_tokens: int
+    input_tokens: int
+    truncated: bool
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.original_tokens - self.input_tokens
+
+
+def prepare_inputs(resume_text: str, job_description: str, pages=None,
+                   budget: int = PROMPT_TOKEN_BUDGET, model: str = "gpt-4.1-nano") -> PromptBuild:
+    """
+    Compress resume and job description and fit them into `budget` input tokens.
+
+    The job description keeps up to JD_BUDGET_SHARE of the budget (more if the resume
+    is short); the resume gets the rest. Cuts happen at the end, at a line boundary where possible.
+    """
+    original = count_tokens(resume_text, model) + count_tokens(job_description, model)
+    resume = compress_resume(resume_text, pages)
+    jd = compress_job_description(job_description)
+
+    resume_tokens = count_tokens(resume, model)
+    jd_tokens = count_tokens(jd, model)
+    truncated = False
+    if budget and resume_tokens + jd_tokens > budget:
+        jd_limit = max(int(budget * JD_BUDGET_SHARE), budget - resume_tokens)
+        if jd_tokens > jd_limit:
+            jd = truncate_to_tokens(jd, jd_limit, model)
+            jd_tokens = count_tokens(jd, model)
+        if resume_tokens > budget - jd_tokens:
+            resume = truncate_to_tokens(resume, budget - jd_tokens, model)
+            resume_tokens = count_tokens(resume, model)
+        truncated = True
+
+    return PromptBuild(resume, jd, original, resume_tokens + jd_tokens, truncated)
@@ -0,0 +1,138 @@
+"""
+Local, deterministic pre-scoring of resumes against a job description.
+
+Scores are computed from stemmed n-grams weighted by inverse document frequency over a
+corpus of job descriptions, with BM25-style term saturation on the resume side. No network
+calls are made, so thousands of resumes can be ranked in seconds and only the best
+candidates sent to `analyze_resume`.
+"""
+import math
+import re
+from collections import Counter
+
+from utils import BULLET_PATTERN, STOPWORDS, ngrams, stem, tokenize
+
+
+def stemmed_tokens(text: str):
+    return [stem(token) for token in tokenize(text)]
+
+
+def term_counts(text: str, n_max: int = 3) -> Counter:
+    """Counts of stemmed 1..n_max-grams (stopword-trimmed)."""
+    return Counter(ngrams(stemmed_tokens(text), n_max))
+
+
+def skill_phrases(job_description: str) -> set:
+    """
+    Candidate skill phrases from the bullet / requirement lines of a posting (the whole
+    text when it has no bullets). Short list items ("CI/CD", "machine learning") are kept
+    as phrases; longer clauses contribute their individual content words.
+    """
+    # List items usually carry the concrete requirements of a posting.
+    lines = [line for line in job_description.splitlines() if BULLET_PATTERN.match(line)]
+    phrases = set()
+    for line in lines or job_description.splitlines():
+        # Commas, semicolons, parentheses and "and"/"or" separate items inside one bullet.
+        for part in re.split(r"[,;()]|\band\b|\bor\b", line.lower()):
+            tokens = tokenize(part)
+            while tokens and tokens[0] in STOPWORDS:
+                tokens.pop(0)
+            while tokens and tokens[-1] in STOPWORDS:
+                tokens.pop()
+            if 1 <= len(tokens) <= 3 and not any(t in STOPWORDS for t in tokens):
+                phrases.add(" ".join(stem(t) for t in tokens))
+            else:
+                phrases.update(stem(t) for t in tokens if t not in STOPWORDS)
+    return {p for p in phrases if len(p) > 2 and not p.replace("+", "").isdigit()}
+
+
+class LocalScorer:
+    """
+    TF-IDF / BM25 keyword matcher.
+
+    `fit()` learns inverse document frequencies from a corpus of job descriptions so that
+    words common to every posting ("team", "communication") weigh less than distinctive
+    ones ("kubernetes", "pyspark"). Without a corpus every term weighs the same.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, top_terms: int = 40):
+        self.k1 = k1
+        self.b = b
+        self.top_terms = top_terms
+        self.doc_freq = Counter()
+        self.n_docs = 0
+        self.avg_resume_len = 500.0
+
+    def fit(self, job_descriptions):
+        for jd in job_descriptions:
+            self.doc_freq.update(set(term_counts(jd)))
+            self.n_docs += 1
+        return self
+
+    def idf(self, term: str) -> float:
+        df = self.doc_freq.get(term, 0)
+        return math.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+
+    def jd_terms(self, job_description: str) -> dict:
+        """Top JD terms by tf-idf, mapped to their weights."""
+        counts = term_counts(job_description)
+        weighted = {
+            term: (1 + math.log(tf)) * self.idf(term)
+            for term, tf in counts.items()
+            if term not in STOPWORDS and len(term) > 2
+        }
+        top = sorted(weighted.items(), key=lambda kv: -kv[1])[:self.top_terms]
+        return dict(top)
+
+    def _bm25(self, resume_counts: Counter, resume_len: int, terms: dict) -> float:
+        norm = self.k1 * (1 - self.b + self.b * resume_len / self.avg_resume_len)
+        total = 0.0
+        for term, weight in terms.items():
+            tf = resume_counts.get(term, 0)
+            if tf:
+                total += weight * tf * (self.k1 + 1) / (tf + norm)
+        return total
+
+    def score(self, resume_text: str, job_description: str, jd_terms=None, jd_skills=None) -> dict:
+        """
+        Returns {"score", "skills_score", "keyword_score", "bm25", "matched_skills", "missing_skills"}.
+        Scores are 0-100 coverage percentages weighted by idf.
+        """
+        resume_counts = term_counts(resume_text)
+        resume_len = sum(1 for _ in tokenize(resume_text))
+        jd_terms = jd_terms if jd_terms is not None else self.jd_terms(job_description)
+        jd_skills = jd_skills if jd_skills is not None else skill_phrases(job_description)
+
+        def coverage(terms):
+            total = sum(self.idf(t) for t in terms) or 1.0
+            return 100.0 * sum(self.idf(t) for t in terms if t in resume_counts) / total
+
+        keyword_score = coverage(jd_terms)
+        skills_score = coverage(jd_skills)
+        matched = sorted(s for s in jd_skills if s in resume_counts)
+        return {
+            "score": round(0.5 * keyword_score + 0.5 * skills_score),
+            "skills_score": round(skills_score),
+            "keyword_score": round(keyword_score),
+            "bm25": round(self._bm25(resume_counts, resume_len, jd_terms), 3),
+            "matched_skills": matched,
+            "missing_skills": sorted(jd_skills.difference(matched)),
+        }
+
+    def rank(self, resumes, job_description: str, top_n=None):
+        """
+        Score `resumes` (mapping of name -> text) against one job description and return
+        [(name, scores), ...] best first, ordered by overall score then BM25.
+        """
+        if not self.n_docs:
+            self.fit([job_description])
+        lengths = [sum(1 for _ in tokenize(text)) for text in resumes.values()]
+        if lengths:
+            self.avg_resume_len = sum(lengths) / len(lengths) or 1.0
+        jd_terms = self.jd_terms(job_description)
+        jd_skills = skill_phrases(job_description)
+        ranked = sorted(
+            ((name, self.score(text, job_description, jd_terms, jd_skills)) for name, text in resumes.items()),
+            key=lambda item: (-item[1]["score"], -item[1]["bm25"]),
+        )
+        return ranked[:top_n] if top_n else ranked
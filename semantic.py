@@ -0,0 +1,286 @@
+"""
+Semantic match between a resume and a job description.
+
+Both texts are split into units (bullet / requirement lines, sentences of prose) and every
+unit is embedded. One cosine-similarity matrix then pairs each requirement with its
+closest resume unit, so "built REST services" can count for "API development" even though
+no keyword matches.
+
+Embeddings are stored per unit by content hash (SQLite, see EmbeddingStore), and the
+vector index of each distinct text is kept in memory. A job description is therefore
+embedded once and reused for every candidate scored against it, and a resume bullet is
+never embedded twice.
+
+Embedders are pluggable: OpenAI embeddings (batched), a local sentence-transformers model
+(optional dependency), or a hashing embedder that works offline but is only lexical.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+from openai_client import get_client
+from tracing import span
+from utils import BULLET_PATTERN, STOPWORDS, stem, tokenize
+
+EMBEDDING_MODEL = os.environ.get("CV_MATCHER_EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDINGS_DB_PATH = os.environ.get("CV_MATCHER_EMBEDDINGS_DB", os.path.join(".cache", "embeddings.sqlite"))
+EMBED_BATCH_SIZE = 256  # units per embeddings request
+MAX_CACHED_INDEXES = 128  # vector indexes of distinct texts kept in memory
+MIN_UNIT_WORDS = 3
+MAX_UNIT_WORDS = 60
+
+_SENTENCE = re.compile(r"(?<=[.!?;])\s+")
+
+
+def split_units(text: str) -> list:
+    """
+    Bullet / requirement lines and sentences of prose, deduplicated, headings dropped. A
+    bullet is kept whatever its length ("- Kafka" is a requirement); prose shorter than
+    MIN_UNIT_WORDS is not.
+    """
+    units, seen = [], set()
+    for line in text.splitlines():
+        bullet = bool(BULLET_PATTERN.match(line))
+        line = BULLET_PATTERN.sub("", line).strip().lstrip("#").strip().strip("*").strip()
+        if not line or line.endswith(":"):
+            continue
+        for sentence in _SENTENCE.split(line) if len(line.split()) > MAX_UNIT_WORDS // 2 else [line]:
+            words = sentence.split()
+            if not words or (len(words) < MIN_UNIT_WORDS and not bullet):
+                continue
+            unit = " ".join(words[:MAX_UNIT_WORDS])
+            if unit.lower() not in seen:
+                seen.add(unit.lower())
+                units.append(unit)
+    return units
+
+
+def unit_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class HashingEmbedder:
+    """Offline fallback: signed feature hashing of stemmed unigrams and bigrams (lexical only)."""
+    persistent = False  # cheaper to recompute than to look up
+    threshold = 0.3
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = [stem(t) for t in tokenize(text) if t not in STOPWORDS]
+            for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+                h = zlib.crc32(feature.encode("utf-8"))
+                matrix[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        return matrix
+
+
+class OpenAIEmbedder:
+    """OpenAI embeddings through the shared client, EMBED_BATCH_SIZE units per request."""
+    persistent = True
+    threshold = 0.45
+
+    def __init__(self, api_key, model: str = EMBEDDING_MODEL, base_url=None, batch_size: int = EMBED_BATCH_SIZE):
+        # The shared client is looked up per call rather than kept, so get_client can evict it.
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.batch_size = batch_size
+        self.name = f"openai:{model}"
+
+    def embed(self, texts) -> np.ndarray:
+        vectors = []
+        client = get_client(self.api_key, self.base_url)
+        for start in range(0, len(texts), self.batch_size):
+            response = client.embed(model=self.model, input=list(texts[start:start + self.batch_size]))
+            vectors.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+        return np.asarray(vectors, dtype=np.float32)
+
+
+class SentenceTransformerEmbedder:
+    """A local sentence-transformers model (pip install sentence-transformers)."""
+    persistent = True
+    threshold = 0.5
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+        self.name = f"st:{model_name}"
+
+    def embed(self, texts) -> np.ndarray:
+        return np.asarray(self.model.encode(list(texts), batch_size=64, convert_to_numpy=True), dtype=np.float32)
+
+
+class EmbeddingStore:
+    """Unit embeddings by (embedder, content hash), as float32 blobs in SQLite."""
+
+    def __init__(self, path=EMBEDDINGS_DB_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " embedder TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL,"
+                " PRIMARY KEY (embedder, hash))"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get_many(self, embedder: str, hashes) -> dict:
+        found = {}
+        hashes = list(hashes)
+        with self._connect() as conn:
+            for start in range(0, len(hashes), 500):  # stay below SQLite's host-parameter limit
+                chunk = hashes[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE embedder = ? AND hash IN ({','.join('?' * len(chunk))})",
+                    (embedder, *chunk),
+                ).fetchall()
+                found.update((h, np.frombuffer(blob, dtype=np.float32)) for h, blob in rows)
+        return found
+
+    def put_many(self, embedder: str, vectors: dict):
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (embedder, hash, vector) VALUES (?, ?, ?)",
+                [(embedder, h, np.asarray(v, dtype=np.float32).tobytes()) for h, v in vectors.items()],
+            )
+
+
+class VectorIndex:
+    """Units of one text with their L2-normalized embeddings as rows of a float32 matrix."""
+    __slots__ = ("units", "matrix")
+
+    def __init__(self, units, vectors: np.ndarray):
+        self.units = list(units)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True) if len(self.units) else 1.0
+        self.matrix = (vectors / np.maximum(norms, 1e-12)).astype(np.float32)
+
+    def __len__(self):
+        return len(self.units)
+
+    def similarity(self, other: "VectorIndex") -> np.ndarray:
+        """Cosine similarities, shape (len(self), len(other))."""
+        return self.matrix @ other.matrix.T
+
+
+@dataclass
+class RequirementMatch:
+    requirement: str
+    evidence: str  # closest resume unit ("" if the resume has none)
+    similarity: float
+    covered: bool
+
+
+@dataclass
+class SemanticMatch:
+    requirements: list
+    score: int  # 0-100, partial credit for requirements that are close but below the threshold
+    coverage: float  # share of requirements at or above the threshold
+
+    def to_dict(self) -> dict:
+        return {"score": self.score, "coverage": self.coverage,
+                "requirements": [vars(r) for r in self.requirements]}
+
+
+class SemanticMatcher:
+    def __init__(self, embedder, store=None, threshold=None, max_indexes: int = MAX_CACHED_INDEXES):
+        self.embedder = embedder
+        self.store = store if store is not None or not embedder.persistent else EmbeddingStore()
+        self.threshold = embedder.threshold if threshold is None else threshold
+        self.max_indexes = max_indexes
+        self._indexes = OrderedDict()  # sha256(text) -> VectorIndex
+        self._lock = threading.Lock()
+
+    def _embed_units(self, units) -> np.ndarray:
+        hashes = [unit_hash(u) for u in units]
+        known = self.store.get_many(self.embedder.name, set(hashes)) if self.store else {}
+        todo = [(h, u) for h, u in dict(zip(hashes, units)).items() if h not in known]
+        if todo:
+            vectors = self.embedder.embed([u for _, u in todo])
+            fresh = dict(zip((h for h, _ in todo), vectors))
+            if self.store:
+                self.store.put_many(self.embedder.name, fresh)
+            known.update(fresh)
+        return np.vstack([known[h] for h in hashes])
+
+    def index(self, text: str) -> VectorIndex:
+        """Vector index of `text`, built once per distinct text."""
+        key = unit_hash(text)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+                return index
+        units = split_units(text)
+        vectors = self._embed_units(units) if units else np.zeros((0, 1), dtype=np.float32)
+        index = VectorIndex(units, vectors)
+        with self._lock:
+            self._indexes[key] = index
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+        return index
+
+    def match(self, resume_text: str, job_description: str) -> SemanticMatch:
+        with span("semantic", embedder=self.embedder.name) as semantic_span:
+            requirements = self.index(job_description)
+            resume = self.index(resume_text)
+            semantic_span.set(requirements=len(requirements), resume_units=len(resume))
+            if not len(requirements):
+                return SemanticMatch([], 0, 0.0)
+            if not len(resume):
+                best_sims = np.zeros(len(requirements), dtype=np.float32)
+                best = np.zeros(len(requirements), dtype=int)
+            else:
+                sims = requirements.similarity(resume)
+                best = sims.argmax(axis=1)
+                best_sims = sims[np.arange(len(requirements)), best]
+            covered = best_sims >= self.threshold
+            matches = [
+                RequirementMatch(requirement, resume.units[i] if len(resume) else "", round(float(sim), 3),
+                                 bool(ok))
+                for requirement, i, sim, ok in zip(requirements.units, best, best_sims, covered)
+            ]
+            credit = np.clip(best_sims, 0.0, self.threshold) / self.threshold
+            return SemanticMatch(matches, int(round(100 * float(credit.mean()))), round(float(covered.mean()), 3))
+
+    def match_many(self, resumes: dict, job_description: str) -> dict:
+        """{name: SemanticMatch}; the job description is embedded once for all of them."""
+        return {name: self.match(text, job_description) for name, text in resumes.items()}
+
+
+_matchers = {}
+_matchers_lock = threading.Lock()
+
+
+def get_matcher(api_key=None, embedder=None) -> SemanticMatcher:
+    """
+    Shared matcher for `embedder`, by default the configured one (CV_MATCHER_EMBEDDER):
+    "openai" (the default when an API key is given), "hashing", or "st" / "st:<model name>"
+    for sentence-transformers. Pass embedder="hashing" for a fallback that never calls out.
+    """
+    choice = embedder or os.environ.get("CV_MATCHER_EMBEDDER") or ("openai" if api_key else "hashing")
+    key = (choice, hashlib.sha256((api_key or "").encode()).hexdigest() if choice == "openai" else None)
+    with _matchers_lock:
+        matcher = _matchers.get(key)
+        if matcher is None:
+            if choice == "openai":
+                embedder = OpenAIEmbedder(api_key)
+            elif choice.startswith("st"):
+                embedder = SentenceTransformerEmbedder(*choice.split(":", 1)[1:])
+            else:
+                embedder = HashingEmbedder()
+            matcher = _matchers[key] = SemanticMatcher(embedder)
+        return matcher
@@ -0,0 +1,279 @@
+"""
+Headless HTTP analysis service for integrations (an ATS, scripts), with no Streamlit involved.
+
+A plain ASGI application; serve it with any ASGI server (`pip install uvicorn`):
+
+    OPENAI_API_KEY=sk-... python service.py --port 8080
+    uvicorn service:app --port 8080
+
+    curl -F resume=@cv.pdf -F job_description=@posting.txt http://127.0.0.1:8080/analyze
+    curl -H "Content-Type: application/json" -d '{"improved_cv": "# Jane Doe"}' \\
+        http://127.0.0.1:8080/export/pdf -o cv.pdf
+
+Endpoints:
+
+- POST /analyze: multipart form with a `resume` file (PDF, DOCX or text) and a
+  `job_description` field (text or file); optional `bypass_cache` and `split`.
+  Responds with the analysis JSON.
+- POST /export/pdf, /export/docx: JSON body {"improved_cv": "..."}; responds with the file.
+- GET /health: in-flight analyses, coalescing counters and API metrics.
+
+Uploads are parsed and exports rendered in worker threads, and the LLM is called through
+the async client, so the event loop only coordinates. Concurrent requests for the same
+analysis are coalesced: same resume text (by hash) and job description, even if uploaded
+as different files. Only the first request calls the API, and every waiter gets its
+result or its error. Coalescing is per process, so run one worker process per host.
+"""
+import argparse
+import asyncio
+import email.parser
+import email.policy
+import hashlib
+import json
+import logging
+import os
+import time
+
+from analyze_resume import aanalyze_document
+from cache import get_default_cache, normalize_text
+from document import load_document
+from jobs import _NamedBytesIO
+from openai_client import get_client, metrics_snapshot
+
+logger = logging.getLogger(__name__)
+
+MAX_UPLOAD_BYTES = int(float(os.environ.get("CV_MATCHER_MAX_UPLOAD_MB", "10")) * 1024 * 1024)
+# Upstream calls in flight across all requests (the governor still enforces RPM / TPM).
+SERVICE_CONCURRENCY = int(os.environ.get("CV_MATCHER_SERVICE_CONCURRENCY", "16"))
+EXPORT_FORMATS = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+_TRUE = {"1", "true", "yes", "on"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_multipart(body: bytes, content_type: str) -> dict:
+    """{field name: (filename or None, bytes)} of a multipart/form-data body."""
+    if not content_type.startswith("multipart/form-data"):
+        raise HTTPError(415, "Expected a multipart/form-data upload")
+    header = f"Content-Type: {content_type}\r\nMIME-Version: 1.0\r\n\r\n".encode("latin-1")
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(header + body)
+    if not message.is_multipart():
+        raise HTTPError(400, "Malformed multipart body")
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        if name:
+            fields[name] = (part.get_filename(), part.get_payload(decode=True) or b"")
+    return fields
+
+
+def _text_field(fields: dict, name: str, default=None):
+    if name not in fields:
+        return default
+    return fields[name][1].decode("utf-8", errors="replace")
+
+
+def coalescing_key(resume_text: str, job_description: str, split, bypass_cache=False) -> str:
+    """
+    Requests with the same key would send the same prompts, so they share one analysis.
+    A request bypassing the cache only joins others that bypass it too: a normal request
+    in flight may be answered from the cache, which is not the fresh result it asked for.
+    """
+    digest = hashlib.sha256()
+    for part in (normalize_text(resume_text), normalize_text(job_description), repr(split), repr(bypass_cache)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class Coalescer:
+    """Runs one task per key at a time; callers arriving while it runs await the same task."""
+
+    def __init__(self):
+        self.in_flight = {}
+        self.stats = {"leaders": 0, "coalesced": 0}
+
+    async def run(self, key, factory):
+        """(result of factory(), whether it was shared with an earlier caller)."""
+        task = self.in_flight.get(key)
+        shared = task is not None
+        if shared:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["leaders"] += 1
+            task = self.in_flight[key] = asyncio.ensure_future(factory())
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        # shield: a client hanging up must not cancel the call the other waiters share.
+        return await asyncio.shield(task), shared
+
+
+async def _read_body(receive, limit: int) -> bytes:
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise HTTPError(499, "Client disconnected")
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            raise HTTPError(413, f"Upload larger than {limit // (1024 * 1024)} MB")
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+async def _respond(send, status: int, body: bytes, content_type: str, headers=()):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode()),
+                    *((name.encode(), value.encode()) for name, value in headers)],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _respond_json(send, status: int, data: dict):
+    await _respond(send, status, json.dumps(data, ensure_ascii=False).encode("utf-8"), "application/json")
+
+
+class AnalysisService:
+    """The ASGI application. The OpenAI client and cache are created on first use."""
+
+    def __init__(self, api_key=None, base_url=None, cache=None, concurrency=SERVICE_CONCURRENCY, split=None):
+        self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
+        self.base_url = base_url
+        self.split = split
+        self.concurrency = concurrency
+        self.cache = cache
+        self.coalescer = Coalescer()
+        self._semaphore = None
+        self.stats = {"requests": 0, "errors": 0}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        self.stats["requests"] += 1
+        method, path = scope["method"], scope["path"].rstrip("/") or "/"
+        headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope["headers"]}
+        try:
+            if method == "POST" and path == "/analyze":
+                await _respond_json(send, 200, await self.analyze(await _read_body(receive, MAX_UPLOAD_BYTES),
+                                                                  headers.get("content-type", "")))
+            elif method == "POST" and path.startswith("/export/"):
+                fmt = path[len("/export/"):]
+                body = await self.export(fmt, await _read_body(receive, MAX_UPLOAD_BYTES),
+                                         headers.get("content-type", ""))
+                await _respond(send, 200, body, EXPORT_FORMATS[fmt],
+                               [("content-disposition", f'attachment; filename="improved_cv.{fmt}"')])
+            elif method == "GET" and path == "/health":
+                await _respond_json(send, 200, self.health())
+            else:
+                raise HTTPError(404, f"No route for {method} {path}")
+        except HTTPError as e:
+            self.stats["errors"] += 1
+            if e.status != 499:
+                await _respond_json(send, e.status, {"error": str(e)})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.api_key:
+                    await get_client(self.api_key, self.base_url).aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def analyze(self, body: bytes, content_type: str) -> dict:
+        started = time.perf_counter()
+        fields = await asyncio.to_thread(parse_multipart, body, content_type)
+        if "resume" not in fields:
+            raise HTTPError(400, "Missing the `resume` file")
+        job_description = (_text_field(fields, "job_description") or "").strip()
+        if not job_description:
+            raise HTTPError(400, "Missing the `job_description` field")
+        if not self.api_key:
+            raise HTTPError(503, "No OpenAI API key configured (set OPENAI_API_KEY)")
+        bypass_cache = (_text_field(fields, "bypass_cache", "") or "").lower() in _TRUE
+        split = self.split if "split" not in fields else _text_field(fields, "split").lower() in _TRUE
+
+        filename, data = fields["resume"]
+        upload = _NamedBytesIO(data, filename or "resume.txt")
+        try:
+            document = await asyncio.to_thread(load_document, upload)
+        except Exception as e:
+            raise HTTPError(422, f"Could not read the resume: {type(e).__name__}: {e}")
+        if not document.text.strip():
+            raise HTTPError(422, "No text found in the resume")
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        cache = self.cache or get_default_cache()
+        client = get_client(self.api_key, self.base_url)
+        key = coalescing_key(document.text, job_description, split, bypass_cache)
+        try:
+            (result, info), coalesced = await self.coalescer.run(
+                key, lambda: aanalyze_document(client, document, job_description, cache, bypass_cache, split,
+                                               self._semaphore))
+        except Exception as e:
+            logger.warning("analysis failed: %s: %s", type(e).__name__, e)
+            raise HTTPError(502, f"Analysis failed: {type(e).__name__}: {e}")
+        return {"resume_hash": document.content_hash, "filename": upload.name, "result": result, **info,
+                "coalesced": coalesced, "elapsed": round(time.perf_counter() - started, 3)}
+
+    async def export(self, fmt: str, body: bytes, content_type: str):
+        """The improved CV rendered as `fmt` ("pdf" or "docx")."""
+        if fmt not in EXPORT_FORMATS:
+            raise HTTPError(404, f"Unknown export format {fmt!r} (use {', '.join(EXPORT_FORMATS)})")
+        if content_type.startswith("multipart/form-data"):
+            text = _text_field(await asyncio.to_thread(parse_multipart, body, content_type), "improved_cv", "")
+        else:
+            try:
+                text = json.loads(body or b"{}").get("improved_cv", "")
+            except (ValueError, AttributeError):
+                raise HTTPError(400, 'Expected a JSON body like {"improved_cv": "..."}')
+        if not isinstance(text, str):
+            raise HTTPError(400, "`improved_cv` must be a string")
+        if not text.strip():
+            raise HTTPError(400, "Missing `improved_cv`")
+        from export import export_docx, export_pdf
+        render = export_pdf if fmt == "pdf" else export_docx
+        return await asyncio.to_thread(render, text)
+
+    def health(self) -> dict:
+        return {"status": "ok", "in_flight": len(self.coalescer.in_flight), **self.stats, **self.coalescer.stats,
+                "api": metrics_snapshot()}
+
+
+app = AnalysisService()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the resume analysis API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--base-url", help="OpenAI-compatible endpoint, e.g. a local llm_stub.py.")
+    parser.add_argument("--concurrency", type=int, default=SERVICE_CONCURRENCY,
+                        help="Upstream API calls in flight at once.")
+    args = parser.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        parser.error("serving needs an ASGI server: pip install uvicorn")
+    service = AnalysisService(base_url=args.base_url, concurrency=args.concurrency)
+    uvicorn.run(service, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Skill-phrase index: an Aho–Corasick automaton over word tokens.
+
+Skills are matched on whole (stemmed) tokens, so "java" does not match "javascript",
+multi-word skills like "machine learning" work, and aliases map to one canonical name
+("k8s" -> "kubernetes"). All skills are found in a single pass over the text, and every
+hit carries character offsets for highlighting.
+"""
+from collections import deque, namedtuple
+from functools import lru_cache
+
+from utils import WORD_PATTERN, stem
+
+DEFAULT_ALIASES = {
+    "kubernetes": ["k8s", "kube"],
+    "javascript": ["js", "ecmascript"],
+    "typescript": ["ts"],
+    "postgresql": ["postgres", "psql"],
+    "machine learning": ["ml"],
+    "artificial intelligence": ["ai"],
+    "natural language processing": ["nlp"],
+    "continuous integration": ["ci", "ci/cd"],
+    "amazon web services": ["aws"],
+    "google cloud platform": ["gcp", "google cloud"],
+    "microsoft azure": ["azure"],
+    "node.js": ["nodejs"],
+    "react": ["react.js", "reactjs"],
+    "c++": ["cpp"],
+    "c#": ["csharp", "c sharp"],
+    "golang": ["go lang"],
+    "large language models": ["llm", "llms"],
+}
+
+SkillHit = namedtuple("SkillHit", "skill start end")
+
+
+def _tokens(text: str):
+    """(normalized token, start, end) for each word of `text`."""
+    for m in WORD_PATTERN.finditer(text.lower()):
+        yield stem(m.group()), m.start(), m.end()
+
+
+class SkillIndex:
+    """
+    Build once with `add()` (or the constructor), then call `find()` as often as needed.
+    The automaton is stored as flat lists indexed by state id to keep it compact.
+    """
+
+    def __init__(self, skills=(), aliases=None):
+        self._goto = [{}]
+        self._fail = [0]
+        self._terminal = [()]  # skills ending exactly at each state
+        self._out = [()]       # ... plus those reachable through fail links, filled by _build()
+        self._built = False
+        self.skills = set()
+        aliases = DEFAULT_ALIASES if aliases is None else aliases
+        for skill in skills:
+            self.add(skill, aliases.get(skill.lower(), ()))
+
+    def add(self, skill: str, aliases=()):
+        canonical = skill.lower().strip()
+        self.skills.add(canonical)
+        for surface in (canonical, *aliases):
+            tokens = [token for token, _, _ in _tokens(surface)]
+            if not tokens:
+                continue
+            state = 0
+            for token in tokens:
+                nxt = self._goto[state].get(token)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][token] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._terminal.append(())
+                state = nxt
+            self._terminal[state] = self._terminal[state] + ((canonical, len(tokens)),)
+        self._built = False
+        return self
+
+    def _build(self):
+        self._out = list(self._terminal)
+        queue = deque(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+        while queue:
+            state = queue.popleft()
+            for token, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(token, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        self._built = True
+
+    def find(self, text: str):
+        """Every skill occurrence in `text` as SkillHit(skill, start, end), ordered by end offset."""
+        if not self._built:
+            self._build()
+        hits = []
+        starts = []
+        state = 0
+        for i, (token, start, end) in enumerate(_tokens(text)):
+            starts.append(start)
+            while state and token not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(token, 0)
+            for skill, length in self._out[state]:
+                hits.append(SkillHit(skill, starts[i - length + 1], end))
+        return hits
+
+    def coverage(self, text: str) -> dict:
+        """Map every indexed skill to its list of (start, end) hit positions in `text` (empty if absent)."""
+        found = {skill: [] for skill in self.skills}
+        for hit in self.find(text):
+            found[hit.skill].append((hit.start, hit.end))
+        return found
+
+
+@lru_cache(maxsize=128)
+def keyword_index(keywords: tuple) -> SkillIndex:
+    """Memoized index for a set of JD keywords, so reruns reuse the built automaton."""
+    index = SkillIndex(keywords)
+    index.find("")  # build eagerly so the shared instance is read-only afterwards
+    return index
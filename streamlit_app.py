@@ -1,10 +1,24 @@
+import hashlib
+import json
+import logging
+import os
+import time
+
 import streamlit as st
-from analyze_resume import analyze_resume
-from utils import normalize_cv_markdown, extract_keywords
+from jobs import get_job_queue
+from llm_response import recovery_stats
+from cache import get_default_cache
+import tracing
+from utils import normalize_cv_markdown
+from incremental import MAX_DELTA_RUNS, job_keywords, keyword_coverage
 from components.copy_button import st_copy_to_clipboard
-from export import export_docx, export_pdf
-import plotly.express as px
-import pandas as pd
+
+# Heavy dependencies (plotly, pandas, numpy, the OpenAI SDK, the document parsers and
+# exporters) are imported where they are first needed, so the API key screen of a new
+# session renders without loading them; see benchmarks/bench_import_time.py.
+
+logger = logging.getLogger(__name__)
+rerun_started = time.perf_counter()
 
 st.set_page_config(page_title="CV Matcher", page_icon="📄", layout="wide")
 
@@ -48,6 +62,138 @@ if "analysis_result" not in st.session_state:
     st.session_state.analysis_result = None
 if "resume_text" not in st.session_state:
     st.session_state.resume_text = ""
+if "bypass_cache" not in st.session_state:
+    st.session_state.bypass_cache = False
+if "job_id" not in st.session_state:
+    st.session_state.job_id = None
+if "result_hash" not in st.session_state:
+    st.session_state.result_hash = None
+if "rerun_times" not in st.session_state:
+    st.session_state.rerun_times = []  # recent "done" step render times (ms)
+if "show_traces" not in st.session_state:
+    st.session_state.show_traces = False
+if "incremental" not in st.session_state:
+    st.session_state.incremental = True
+if "last_run" not in st.session_state:
+    st.session_state.last_run = None  # inputs and result of the last successful analysis
+if "full_run_seconds" not in st.session_state:
+    st.session_state.full_run_seconds = None  # duration of the last full (non-incremental) analysis
+
+
+@st.cache_resource
+def start_metrics_server(port: int):
+    """/metrics and /traces for the whole process; started once however many sessions connect."""
+    return tracing.serve_metrics(port)
+
+
+if os.environ.get("CV_MATCHER_METRICS_PORT"):
+    start_metrics_server(int(os.environ["CV_MATCHER_METRICS_PORT"]))
+
+# Reattach to a running or finished analysis after a page reload
+if st.session_state.job_id is None and st.query_params.get("job"):
+    restored_job = get_job_queue().get(st.query_params["job"])
+    if restored_job is not None:
+        st.session_state.job_id = restored_job["id"]
+        st.session_state.job_description = restored_job["job_description"]
+        st.session_state.step = "analyzing"
+
+
+def submit_analysis():
+    """Queue the analysis in the background worker pool and switch to the progress view."""
+    options = {}
+    if st.session_state.incremental and st.session_state.last_run and not st.session_state.bypass_cache:
+        options["previous"] = st.session_state.last_run
+    job_id = get_job_queue().submit(
+        st.session_state.uploaded_file,
+        st.session_state.job_description,
+        st.session_state.openai_api_key,
+        use_mock=False,
+        bypass_cache=st.session_state.bypass_cache,
+        **options,
+    )
+    st.session_state.job_id = job_id
+    st.query_params["job"] = job_id
+    st.session_state.step = "analyzing"
+    st.rerun()
+
+
+def result_hash(result) -> str:
+    return hashlib.sha256(json.dumps(result, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+# Derived views of a finished analysis. Each is memoized on its own inputs only (the result
+# hash, or the job description and resume text), so a rerun caused by an unrelated widget
+# costs nothing and editing the job description only rebuilds the keyword chips.
+# Arguments starting with "_" are not hashed by Streamlit; the hash argument stands in for them.
+@st.cache_data(max_entries=64, show_spinner=False)
+def breakdown_view(result_key, _result):
+    """Sub-scores and the radar chart (as a Plotly figure dict)."""
+    import pandas as pd
+    import plotly.express as px
+
+    # 🎯 Mock sub-scores (replace with real ones if available in `result`)
+    breakdown_scores = {
+        "Skills Match": _result.get("skills_score", 78),
+        "Experience Alignment": _result.get("experience_score", 70),
+        "Education Relevance": _result.get("education_score", 65),
+        "Keyword Presence": _result.get("keyword_score", 85),
+        "Formatting / Clarity": _result.get("formatting_score", 90),
+    }
+    df_scores = pd.DataFrame(dict(
+        criteria=list(breakdown_scores.keys()),
+        score=list(breakdown_scores.values())
+    ))
+
+    fig = px.line_polar(
+        df_scores,
+        r="score",
+        theta="criteria",
+        line_close=True,
+        range_r=[0, 100],
+        markers=True,
+    )
+    fig.update_traces(fill="toself", line_color="#2c7be5")
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(visible=True, range=[0, 100]),
+            angularaxis=dict(
+                tickfont=dict(size=14, family="Arial", color="black")  # adjust size here
+            ),
+        ),
+        showlegend=False,
+        margin=dict(l=40, r=40, t=40, b=40)
+    )
+    return breakdown_scores, fig.to_dict()
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def keyword_chips(job_description, resume_text) -> str:
+    """HTML chips for the top job-description keywords, green when the resume covers them."""
+    keywords = job_keywords(job_description, top_n=20)
+    keyword_hits = keyword_coverage(resume_text, keywords)
+    chips_html = '<div class="keyword-container">'
+    for kw in keywords:
+        css_class = "keyword-pass" if keyword_hits[kw] else "keyword-miss"
+        chips_html += f'<div class="keyword-chip {css_class}">{kw}</div>'
+    return chips_html + "</div>"
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def clean_cv_view(result_key, _result) -> str:
+    return normalize_cv_markdown(_result.get("improved_cv") or "")
+
+
+def record_rerun_time(render_trace):
+    """Keep the last 20 render times of the results page and show them under it."""
+    elapsed_ms = (time.perf_counter() - rerun_started) * 1000
+    render_trace.set(rerun_ms=round(elapsed_ms, 1))
+    times = st.session_state.rerun_times
+    times.append(elapsed_ms)
+    del times[:-20]
+    logger.debug("results rerun took %.1f ms", elapsed_ms)
+    median = sorted(times)[len(times) // 2]
+    st.caption(f"⏱️ Rendered in {elapsed_ms:.0f} ms · median of last {len(times)} reruns {median:.0f} ms")
+
 
 # --- Step 1: Enter API Key ---
 if st.session_state.step == "enter_key":
@@ -70,8 +216,7 @@ if st.session_state.step == "upload":
 
     if st.session_state.uploaded_file and st.session_state.job_description:
         if st.button("🚀 Analyze Resume", use_container_width=True):
-            st.session_state.step = "analyzing"
-            st.rerun()
+            submit_analysis()
 
 # Step 3: Sidebar during analyzing / done
 if st.session_state.step in ["analyzing", "done"]:
@@ -89,175 +234,296 @@ if st.session_state.step in ["analyzing", "done"]:
             "💼 Paste Job Description",
             value=st.session_state.job_description
         )
+        st.session_state.bypass_cache = st.checkbox(
+            "♻️ Bypass cache (force a fresh analysis)",
+            value=st.session_state.bypass_cache
+        )
+        st.session_state.incremental = st.checkbox(
+            "⚡ Incremental re-analysis (only send what changed)",
+            value=st.session_state.incremental
+        )
+        cache_stats = get_default_cache().stats()
+        st.caption(
+            f"Cache: {cache_stats['hits']} hits · {cache_stats['misses']} misses · {cache_stats['entries']} entries"
+        )
+        from openai_client import metrics_snapshot
+        api_stats = metrics_snapshot()
+        if api_stats["requests"]:
+            st.caption(
+                f"API: {api_stats['requests']} calls · {api_stats['retries']} retries · "
+                f"p50 {api_stats['latency_p50']}s · {api_stats['prompt_tokens'] + api_stats['completion_tokens']} tokens"
+            )
+        governor_stats = api_stats["governor"]
+        if governor_stats and (governor_stats["queued"] or governor_stats["admitted"]):
+            st.caption(
+                f"Rate limits: {governor_stats['queued']} queued ({governor_stats['queued_users']} users) · "
+                f"wait p95 {governor_stats['wait_p95'] or 0}s · {governor_stats['tokens_available']} tokens free"
+            )
+        recovery = recovery_stats()
+        if recovery["responses"] > recovery["clean"]:
+            st.caption(
+                f"Responses: {recovery['clean']}/{recovery['responses']} clean · "
+                f"{recovery['followups']} follow-ups · {recovery['unrecovered']} unrecovered"
+            )
+        st.session_state.show_traces = st.checkbox(
+            "🐞 Show timing traces",
+            value=st.session_state.show_traces
+        )
         if st.button("🚀 Analyze Resume", use_container_width=True):
-            st.session_state.step = "analyzing"
-            st.rerun()
+            if st.session_state.uploaded_file is None:
+                st.warning("Please upload the resume again to start a new analysis.")
+            else:
+                submit_analysis()
 
-# Step 4: Perform Analysis
-if st.session_state.step == "analyzing":
-    uploaded_file = st.session_state.get("uploaded_file")
-    job_description = st.session_state.get("job_description")
-    api_key = st.session_state.get("openai_api_key")
+# Step 4: Wait for the background analysis
+@st.fragment(run_every=1.0)
+def show_job_progress(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        st.error("Analysis job not found. Please submit it again.")
+        return
+    if job["status"] in ("done", "failed"):
+        st.session_state.resume_text = job["resume_text"]
+        st.session_state.analysis_result = job["result"]
+        st.session_state.result_hash = result_hash(job["result"])
+        st.session_state.rerun_times = []
+        if job["status"] == "done":
+            st.session_state.last_run = {"resume_text": job["resume_text"],
+                                         "job_description": job["job_description"], "result": job["result"]}
+            if "incremental" not in job["result"]:
+                st.session_state.full_run_seconds = job["updated_at"] - job["created_at"]
+        st.session_state.step = "done"
+        st.rerun()
+
+    st.info("Analyzing resume, please wait..." if job["status"] == "running"
+            else "Waiting for a free worker...", icon="⏳")
+    from governor import get_governor
+    governor = get_governor()
+    queue = governor.snapshot() if governor is not None else None
+    if queue and queue["queued"]:
+        st.caption(f"⏱️ {queue['queued']} API calls are queued for rate-limit capacity "
+                   f"(oldest waiting {queue['oldest_wait_s']:.0f}s); this analysis will resume automatically.")
 
-    if uploaded_file is None or job_description.strip() == "":
+    # Partial results streamed in by the worker
+    partial = job["partial"]
+    if partial.get("scores"):
+        st.markdown(" · ".join(
+            f"**{key.replace('_', ' ').title()}:** {value}" for key, value in partial["scores"].items()
+        ))
+    for section, bullet in partial.get("recommendations", []):
+        st.markdown(f"- **{section}:** {bullet}")
+    if partial.get("improved_cv"):
+        st.markdown(partial["improved_cv"])
+
+
+@st.fragment(run_every=1.0)
+def show_semantic_progress(task_id):
+    """Placeholder for the semantic coverage table while the job queue computes it."""
+    task = get_job_queue().get_semantic(task_id)
+    if task is None or task["status"] != "running":
+        st.rerun()
+    st.caption("⏳ Matching requirements to resume lines...")
+
+
+if st.session_state.step == "analyzing":
+    if st.session_state.job_id is None:
         st.error("No uploaded file or job description found.")
     else:
-        st.info("Analyzing resume, please wait...", icon="⏳")
-        resume_text, result = analyze_resume(uploaded_file, job_description, api_key, use_mock=False)
-        st.session_state.resume_text = resume_text
-        st.session_state.analysis_result = result
-        st.session_state.step = "done"
-        st.rerun()
+        show_job_progress(st.session_state.job_id)
 
 # --- Step 5: Show Results ---
 if st.session_state.step == "done" and st.session_state.analysis_result:
+    import pandas as pd
+
     result = st.session_state.analysis_result
     resume_text = st.session_state.resume_text
     job_description = st.session_state.job_description
 
-    st.success("✅ Analysis complete!")
+    # A context manager, not begin/end: st.rerun() and st.stop() raise mid-script.
+    with tracing.trace("render") as render_trace:
+        st.success("✅ Analysis complete!")
+        if result.get("incremental"):
+            delta = result["incremental"]
+            saved = delta["tokens_saved"] / delta["full_prompt_tokens"] if delta["full_prompt_tokens"] else 0
+            st.caption(
+                f"⚡ Incremental re-analysis ({delta['jd_lines_added'] + delta['jd_lines_removed']} job description"
+                f" and {delta['resume_lines_added'] + delta['resume_lines_removed']} resume lines changed; "
+                f"{delta['delta_runs']} of at most {MAX_DELTA_RUNS} delta runs in a row)"
+            )
+            tokens_col, time_col = st.columns(2)
+            tokens_col.metric("Prompt tokens sent", f"{delta['prompt_tokens']:,}",
+                              f"-{delta['tokens_saved']:,} ({saved:.0%}) vs a full analysis", delta_color="inverse")
+            full_run_seconds = st.session_state.full_run_seconds
+            if full_run_seconds:
+                time_col.metric("Analysis time", f"{delta['elapsed_s']:.1f}s",
+                                f"{delta['elapsed_s'] - full_run_seconds:+.1f}s vs the last full analysis",
+                                delta_color="inverse")
+            else:
+                time_col.metric("Analysis time", f"{delta['elapsed_s']:.1f}s")
+            if delta.get("rewrite_stale"):
+                st.warning("Rewriting the CV for this edit failed: "
+                           "the improved CV below is from the previous analysis.")
 
-    # 🎯 Mock sub-scores (replace with real ones if available in `result`)
-    breakdown_scores = {
-        "Skills Match": result.get("skills_score", 78),
-        "Experience Alignment": result.get("experience_score", 70),
-        "Education Relevance": result.get("education_score", 65),
-        "Keyword Presence": result.get("keyword_score", 85),
-        "Formatting / Clarity": result.get("formatting_score", 90),
-    }
+        if st.session_state.result_hash is None:
+            st.session_state.result_hash = result_hash(result)
+        breakdown_scores, radar_figure = breakdown_view(st.session_state.result_hash, result)
 
-    # --- Main Match Score (still keep it) ---
-    col1, col2 = st.columns([1, 2])
-
-    with col1:
-        st.markdown(f"""
-            <div class='card metric-card'>
-                {result['score']}
-                <div class='metric-label'>Overall Match Score</div>
-            </div>
-        """, unsafe_allow_html=True)
+        # --- Main Match Score (still keep it) ---
+        col1, col2 = st.columns([1, 2])
 
-        st.markdown("<div class='section-subtitle'>Breakdown</div>", unsafe_allow_html=True)
-
-        badges = " ".join([
-            f"<span style='display:inline-block; padding:6px 12px; margin:4px; "
-            f"border-radius:12px; background:#2c7be5; color:white; font-size:0.85rem;'>"
-            f"{label}: {value}%</span>"
-            for label, value in breakdown_scores.items()
-        ])
-        st.markdown(badges, unsafe_allow_html=True)
-
-    with col2:
-        # --- Radar Chart ---
-        df_scores = pd.DataFrame(dict(
-            criteria=list(breakdown_scores.keys()),
-            score=list(breakdown_scores.values())
-        ))
+        with col1:
+            st.markdown(f"""
+                <div class='card metric-card'>
+                    {result['score']}
+                    <div class='metric-label'>Overall Match Score</div>
+                </div>
+            """, unsafe_allow_html=True)
 
-        fig = px.line_polar(
-            df_scores,
-            r="score",
-            theta="criteria",
-            line_close=True,
-            range_r=[0, 100],
-            markers=True,
-        )
-        fig.update_traces(fill="toself", line_color="#2c7be5")
-        fig.update_layout(
-            polar=dict(
-                radialaxis=dict(visible=True, range=[0, 100]),
-                angularaxis=dict(
-                    tickfont=dict(size=14, family="Arial", color="black")  # adjust size here
-                ),
-            ),
-            showlegend=False,
-            margin=dict(l=40, r=40, t=40, b=40)
-        )
+            st.markdown("<div class='section-subtitle'>Breakdown</div>", unsafe_allow_html=True)
 
-        st.plotly_chart(fig, use_container_width=True)
+            badges = " ".join([
+                f"<span style='display:inline-block; padding:6px 12px; margin:4px; "
+                f"border-radius:12px; background:#2c7be5; color:white; font-size:0.85rem;'>"
+                f"{label}: {value}%</span>"
+                for label, value in breakdown_scores.items()
+            ])
+            st.markdown(badges, unsafe_allow_html=True)
 
-    # --- Keyword Coverage ---
-    job_keywords = extract_keywords(job_description, top_n=20)
-    resume_text_lower = resume_text.lower()
-    keyword_status = {kw: ("✅" if kw in resume_text_lower else "❌") for kw in job_keywords}
+        with col2:
+            # --- Radar Chart ---
+            with tracing.span("render.chart"):
+                st.plotly_chart(radar_figure, use_container_width=True)
 
-    st.divider()
-    st.subheader("Keywords Coverage")
+        # --- Keyword Coverage ---
+        st.divider()
+        st.subheader("Keywords Coverage")
 
-    # --- CSS for keyword chips ---
-    st.markdown("""
-    <style>
-    .keyword-container {
-        display: flex;
-        flex-wrap: wrap;
-        gap: 8px;
-        margin-top: 10px;
-    }
-    .keyword-chip {
-        padding: 6px 12px;
-        border-radius: 20px;
-        font-size: 0.85rem;
-        font-weight: 500;
-        color: white;
-    }
-    .keyword-pass {
-        background-color: #28a745; /* green */
-    }
-    .keyword-miss {
-        background-color: #dc3545; /* red */
-    }
-    </style>
-    """, unsafe_allow_html=True)
+        # --- CSS for keyword chips ---
+        st.markdown("""
+        <style>
+        .keyword-container {
+            display: flex;
+            flex-wrap: wrap;
+            gap: 8px;
+            margin-top: 10px;
+        }
+        .keyword-chip {
+            padding: 6px 12px;
+            border-radius: 20px;
+            font-size: 0.85rem;
+            font-weight: 500;
+            color: white;
+        }
+        .keyword-pass {
+            background-color: #28a745; /* green */
+        }
+        .keyword-miss {
+            background-color: #dc3545; /* red */
+        }
+        </style>
+        """, unsafe_allow_html=True)
 
-    # --- Render keyword chips ---
-    chips_html = '<div class="keyword-container">'
-    for kw, status in keyword_status.items():
-        css_class = "keyword-pass" if status == "✅" else "keyword-miss"
-        chips_html += f'<div class="keyword-chip {css_class}">{kw}</div>'
-    chips_html += "</div>"
+        # --- Render keyword chips ---
+        with tracing.span("render.keywords"):
+            st.markdown(keyword_chips(job_description, resume_text), unsafe_allow_html=True)
 
-    st.markdown(chips_html, unsafe_allow_html=True)
-    st.divider()
+        # --- Semantic Coverage ---
+        st.divider()
+        st.subheader("Semantic Coverage")
+        with tracing.span("render.semantic"):
+            # Embedding calls can wait on retries and the rate-limit governor: run them in the
+            # background and poll, like the analysis itself.
+            semantic_id = get_job_queue().submit_semantic(resume_text, job_description, st.session_state.openai_api_key)
+            semantic_task = get_job_queue().get_semantic(semantic_id) or {"status": "running"}
+            semantic = semantic_task["result"] if semantic_task["status"] == "done" else None
+            if semantic_task["status"] == "running":
+                show_semantic_progress(semantic_id)
+            elif semantic is None:
+                st.caption("Semantic coverage is not available for this analysis.")
+            elif semantic["requirements"]:
+                st.caption(f"Semantic match {semantic['score']}/100 • "
+                           f"{semantic['coverage']:.0%} of requirements covered by a similar resume line")
+                st.dataframe(pd.DataFrame(semantic["requirements"]), use_container_width=True, hide_index=True)
+            else:
+                st.caption("No requirement lines found in the job description.")
+        st.divider()
 
-    st.subheader("✨ Suggestions for Improvement")
-    if "recommendations" in result:
-        for section, bullets in result["recommendations"].items():
-            st.markdown(f"<div class='section-title'>{section}</div>", unsafe_allow_html=True)
-            for bullet in bullets:
+        st.subheader("✨ Suggestions for Improvement")
+        if "recommendations" in result:
+            for section, bullets in result["recommendations"].items():
+                st.markdown(f"<div class='section-title'>{section}</div>", unsafe_allow_html=True)
+                for bullet in bullets:
+                    st.markdown(f"- {bullet}")
+        else:
+            for bullet in result.get("suggestions", []):
                 st.markdown(f"- {bullet}")
-    else:
-        for bullet in result.get("suggestions", []):
-            st.markdown(f"- {bullet}")
-    st.markdown("</div>", unsafe_allow_html=True)
+        st.markdown("</div>", unsafe_allow_html=True)
 
-    # --- Improved Resume ---
-    if result.get("improved_cv"):
-        clean_cv = normalize_cv_markdown(result["improved_cv"])
-        st.divider()
-        st.markdown(result["improved_cv"], unsafe_allow_html=True)
+        # --- Improved Resume ---
+        if result.get("improved_cv"):
+            clean_cv = clean_cv_view(st.session_state.result_hash, result)
+            st.divider()
+            with tracing.span("render.cv"):
+                st.markdown(result["improved_cv"], unsafe_allow_html=True)
 
-    # --- Footer ---
-    st.markdown("""
-    <style>
-    footer {
-        visibility: hidden;
-    }
-    .custom-footer {
-        position: fixed;
-        left: 0;
-        bottom: 0;
-        width: 100%;
-        padding: 8px 16px;
-        background-color: #f9f9f9;
-        color: #6c757d;
-        text-align: center;
-        font-size: 0.85rem;
-        border-top: 1px solid #e6e6e6;
-    }
-    </style>
-    <div class="custom-footer">
-        📄 CV Matcher • Built with ❤️ using Streamlit  
-        <a href="https://github.com/your-repo" target="_blank" style="color:#2c7be5; text-decoration:none;">GitHub</a> • 
-        <a href="mailto:your@email.com" style="color:#2c7be5; text-decoration:none;">Contact</a>
-    </div>
-    """, unsafe_allow_html=True)
+        # --- Footer ---
+        st.markdown("""
+        <style>
+        footer {
+            visibility: hidden;
+        }
+        .custom-footer {
+            position: fixed;
+            left: 0;
+            bottom: 0;
+            width: 100%;
+            padding: 8px 16px;
+            background-color: #f9f9f9;
+            color: #6c757d;
+            text-align: center;
+            font-size: 0.85rem;
+            border-top: 1px solid #e6e6e6;
+        }
+        </style>
+        <div class="custom-footer">
+            📄 CV Matcher • Built with ❤️ using Streamlit  
+            <a href="https://github.com/your-repo" target="_blank" style="color:#2c7be5; text-decoration:none;">GitHub</a> • 
+            <a href="mailto:your@email.com" style="color:#2c7be5; text-decoration:none;">Contact</a>
+        </div>
+        """, unsafe_allow_html=True)
+
+        record_rerun_time(render_trace)
+
+# --- Search candidates analyzed in earlier sessions with the same API key (opt-in) ---
+if (os.environ.get("CV_MATCHER_INDEX_CANDIDATES", "0") == "1" and st.session_state.get("openai_api_key")
+        and st.session_state.step in ["upload", "done"]):
+    with st.expander("🔎 Search previous candidates"):
+        from candidate_store import get_candidate_store, owner_id
+
+        query = st.text_input("Query", placeholder="score > 80 and mentions kubernetes", key="candidate_query")
+        store = get_candidate_store()
+        owner = owner_id(st.session_state.openai_api_key)
+        matches = store.search(query, limit=50, owner=owner)
+        st.caption(f"{len(matches)} shown of {store.count(owner)} candidates indexed with your API key")
+        if matches:
+            st.dataframe([{k: v for k, v in row.items() if k not in ("id", "rank")} for row in matches],
+                         use_container_width=True, hide_index=True)
+
+# --- Debug: per-stage timings of recent analyses and renders ---
+if st.session_state.show_traces and st.session_state.step in ["analyzing", "done"]:
+    with st.expander("🐞 Timing traces", expanded=True):
+        import pandas as pd
+
+        rows = []
+        for trace in reversed(tracing.recorder.recent(20)):
+            row = {"trace": trace.name, "total ms": round((trace.duration or 0) * 1000, 1)}
+            row.update({f"{stage} ms": round(seconds * 1000, 1) for stage, seconds in trace.stages().items()})
+            row.update(trace.tokens())
+            rows.append(row)
+        if rows:
+            st.dataframe(pd.DataFrame(rows), use_container_width=True)
+        else:
+            st.caption("No traces recorded yet.")
+        col_json, col_prom = st.columns(2)
+        col_json.download_button("Download JSON", tracing.to_json(), file_name="traces.json")
+        col_prom.download_button("Download Prometheus", tracing.to_prometheus(), file_name="metrics.prom")
@@ -0,0 +1,83 @@
+import io
+import os
+import socket
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+# The process-wide rate-limit governor would pace the stub calls; its tests build their own.
+os.environ.setdefault("CV_MATCHER_GOVERNOR", "0")
+
+RESUME = """Jane Doe
+Experience
+- Built streaming pipelines on Kafka at Acme
+- Maintained Airflow DAGs for reporting
+Skills
+Python, SQL, Kafka, Airflow
+"""
+JOB_DESCRIPTION = """Senior Data Engineer
+Requirements:
+- Python and SQL
+- Kafka streaming
+- Airflow orchestration
+- Cloud experience (AWS or GCP)
+"""
+
+
+@pytest.fixture
+def resume_text():
+    """A short plain-text resume that matches `job_description` except for the cloud requirement."""
+    return RESUME
+
+
+@pytest.fixture
+def job_description():
+    return JOB_DESCRIPTION
+
+
+@pytest.fixture
+def upload():
+    """Turn text into an upload as the analysis expects it: file-like with a `.name`."""
+    def make(text: str, name: str = "cv.txt"):
+        file = io.BytesIO(text.encode())
+        file.name = name
+        return file
+
+    return make
+
+
+@pytest.fixture
+def llm_server(monkeypatch):
+    """Start llm_stub servers (same arguments as llm_stub.serve); OPENAI_BASE_URL points at the last one."""
+    import llm_stub
+    servers = []
+
+    def start(**kwargs):
+        server = llm_stub.serve(port=0, **kwargs)
+        servers.append(server)
+        server.base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def result_cache(tmp_path):
+    from cache import ResultCache
+    return ResultCache(str(tmp_path / "results.sqlite"))
+
+
+@pytest.fixture
+def dead_base_url():
+    """An OpenAI base URL on a local port nothing listens on: every call fails to connect."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}/v1"
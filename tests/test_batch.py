@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+import cache
+from batch import iter_batch, main
+from fixtures import make_cv_markdown
+from openai_client import get_client
+
+JOB_DESCRIPTION = "Senior data engineer.\nRequirements:\n- Python and SQL\n- Kafka streaming\n"
+
+
+def test_batch_leaves_the_shared_client_open(tmp_path, llm_server, result_cache):
+    llm_server()
+    resume = tmp_path / "cv.txt"
+    resume.write_text(make_cv_markdown(3, seed=1))
+
+    async def scenario():
+        client = get_client("stub")
+        shared = client.async_client()  # e.g. a service request on the same loop
+        records = [r async for r in iter_batch([str(resume)], [("jd", JOB_DESCRIPTION)], api_key="stub",
+                                               cache=result_cache)]
+        assert not shared.is_closed()
+        await client.aclose()
+        return records
+
+    records = asyncio.run(scenario())
+    assert [r["ok"] for r in records] == [True]
+
+
+def test_cli_writes_one_line_per_pair(tmp_path, llm_server, result_cache, monkeypatch, capsys):
+    stub = llm_server()
+    monkeypatch.setattr(cache, "_default_cache", result_cache)
+    jd = tmp_path / "posting.txt"
+    jd.write_text(JOB_DESCRIPTION)
+    resumes = []
+    for seed in (1, 2):
+        resumes.append(tmp_path / f"cv{seed}.txt")
+        resumes[-1].write_text(make_cv_markdown(3, seed=seed))
+    out = tmp_path / "results.jsonl"
+
+    code = main(["--jd", str(jd), "--api-key", "stub", "--base-url", stub.base_url, "-o", str(out),
+                 "--bypass-cache", *map(str, resumes)])
+    records = [json.loads(line) for line in out.read_text().splitlines()]
+    assert code == 0
+    assert sorted(r["resume"] for r in records) == sorted(map(str, resumes))
+    assert json.loads(capsys.readouterr().err)["ok"] == 2
+
+
+def test_records_stream_as_items_finish_and_failures_stay_isolated(tmp_path, llm_server, result_cache):
+    llm_server()
+    resume = tmp_path / "cv.txt"
+    resume.write_text(make_cv_markdown(3, seed=1))
+    missing = tmp_path / "missing.pdf"
+
+    async def scenario():
+        records = []
+        async for record in iter_batch([str(missing), str(resume)], [("jd", JOB_DESCRIPTION)], api_key="stub",
+                                       cache=result_cache, dedup_threshold=None):
+            records.append(record)
+        await get_client("stub").aclose()
+        return records
+
+    first, second = asyncio.run(scenario())
+    # The unreadable file fails fast and is reported before the analysis completes.
+    assert first["resume"] == str(missing) and not first["ok"] and "FileNotFoundError" in first["error"]
+    assert second["resume"] == str(resume) and second["ok"]
@@ -0,0 +1,36 @@
+import io
+import json
+import zipfile
+
+from docx import Document
+
+from bulk_export import iter_zip, write_zip
+
+CV = "# Jane Doe\n## Experience\n- Built streaming pipelines on Kafka"
+
+
+def docx_lines(data: bytes) -> list:
+    return [p.text for p in Document(io.BytesIO(data)).paragraphs]
+
+
+def test_zip_has_one_entry_per_cv_and_format_and_lists_failures():
+    items = [("jane doe.pdf", CV), ("jane doe.pdf", CV.replace("Jane", "Janet")), ("broken", None)]
+    out = io.BytesIO()
+    report = write_zip(items, out, formats=("pdf", "docx"), max_workers=2)
+
+    assert sorted(report["written"]) == ["jane_doe-2.docx", "jane_doe-2.pdf", "jane_doe.docx", "jane_doe.pdf"]
+    assert sorted(f["name"] for f in report["failed"]) == ["broken.docx", "broken.pdf"]
+    with zipfile.ZipFile(out) as archive:
+        assert sorted(archive.namelist()) == sorted(report["written"] + ["_failures.json"])
+        assert docx_lines(archive.read("jane_doe.docx")) == CV.splitlines()
+        assert docx_lines(archive.read("jane_doe-2.docx"))[0] == "# Janet Doe"
+        assert archive.read("jane_doe.pdf").startswith(b"%PDF")
+        failures = json.loads(archive.read("_failures.json"))
+    assert {f["name"] for f in failures} == {"broken.docx", "broken.pdf"}
+    assert all(f["error"] for f in failures)
+
+
+def test_streamed_zip_is_a_complete_archive():
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(iter_zip([("cv", CV)], formats=("docx",), max_workers=1))))
+    assert archive.namelist() == ["cv.docx"]
+    assert docx_lines(archive.read("cv.docx")) == CV.splitlines()
@@ -0,0 +1,64 @@
+import analyze_resume
+from analyze_resume import analyze_resume as run_analysis
+from cache import ResultCache, make_cache_key
+
+RESULT = {"score": 72, "improved_cv": "# Jane Doe"}
+
+
+def test_hit_after_set_and_miss_for_other_inputs(tmp_path):
+    cache = ResultCache(str(tmp_path / "results.sqlite"))
+    key = make_cache_key("Python developer", "Python role", "gpt-4.1-nano", "1")
+    assert cache.get(key) is None
+    cache.set(key, RESULT)
+    assert cache.get(key) == RESULT
+    # Whitespace is not content; anything else is.
+    assert make_cache_key("  Python\n developer ", "Python role", "gpt-4.1-nano", "1") == key
+    assert cache.get(make_cache_key("Go developer", "Python role", "gpt-4.1-nano", "1")) is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "entries": 1}
+
+
+def test_model_and_prompt_version_are_part_of_the_key():
+    key = make_cache_key("resume", "jd", "gpt-4.1-nano", "1")
+    assert key != make_cache_key("resume", "jd", "gpt-4.1-mini", "1")
+    assert key != make_cache_key("resume", "jd", "gpt-4.1-nano", "2")
+
+
+def test_entries_expire_and_least_recently_used_are_evicted(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("cache.time.time", lambda: now[0])
+    cache = ResultCache(str(tmp_path / "results.sqlite"), max_entries=2, ttl=60)
+    for name in ("a", "b"):
+        cache.set(name, {"name": name})
+        now[0] += 1
+    cache.get("a")  # "b" is now the least recently used
+    now[0] += 1
+    cache.set("c", {"name": "c"})
+    assert cache.get("b") is None and cache.get("a") == {"name": "a"}
+    now[0] += 61
+    assert cache.get("c") is None  # expired
+    assert cache.stats()["entries"] == 1  # "a" has expired too; it is purged when read or on the next write
+    assert cache.get("a") is None and cache.stats()["entries"] == 0
+
+
+def test_a_new_model_or_prompt_version_is_a_miss_for_that_part_only(llm_server, result_cache, upload, resume_text,
+                                                                    job_description, monkeypatch):
+    stub = llm_server()
+
+    def analyze():
+        return run_analysis(upload(resume_text), job_description, api_key="stub", use_mock=False,
+                            cache=result_cache, split=True)[1]
+
+    first = analyze()
+    assert stub.state.requests == 2  # scoring and rewrite
+    assert analyze() == first
+    assert stub.state.requests == 2  # both from the cache
+
+    monkeypatch.setattr(analyze_resume, "REWRITE_PROMPT_VERSION", "test-bump")
+    assert analyze() == first
+    assert stub.state.requests == 3  # only the rewrite was asked again
+
+    monkeypatch.setattr(analyze_resume, "SCORING_MODEL", "another-model")
+    analyze()
+    assert stub.state.requests == 4
+    analyze()
+    assert stub.state.requests == 4
@@ -0,0 +1,80 @@
+import sqlite3
+
+import pytest
+
+from candidate_store import CandidateStore, _phrase, owner_id, parse_query
+
+
+def result(score, **scores):
+    return {"score": score, "skills_score": scores.get("skills", score), "experience_score": 50,
+            "recommendations": {}, "improved_cv": ""}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CandidateStore(str(tmp_path / "candidates.sqlite"))
+
+
+def test_query_parsing():
+    assert parse_query("score > 80 and mentions kubernetes AND python") == (
+        ["kubernetes", "python"], [("score", ">", 80.0)])
+    assert parse_query("experience_score >= 60.5") == ([], [("experience_score", ">=", 60.5)])
+    assert parse_query("height > 2") == (["height > 2"], [])  # not a score field: plain text
+    assert parse_query("  ") == ([], [])
+
+
+def test_phrases_carry_no_fts_syntax():
+    assert _phrase('c++ OR "NEAR(x' ) == '"c++ or near x"'
+    assert _phrase("()*") == ""
+
+
+def test_ranking_and_filters(store):
+    store.add("Kafka streaming engineer. Kafka Connect, Kafka Streams, Python.", result(70), name="kafka.pdf")
+    store.add("Python developer who once used Kafka.", result(90), name="python.pdf")
+    store.add("Frontend engineer, React and TypeScript.", result(85), name="react.pdf")
+
+    assert [r["name"] for r in store.search("kafka")] == ["kafka.pdf", "python.pdf"]  # BM25: more mentions first
+    assert [r["name"] for r in store.search("mentions kafka and score > 80")] == ["python.pdf"]
+    assert [r["name"] for r in store.search()] == ["python.pdf", "react.pdf", "kafka.pdf"]  # by score
+    assert [r["name"] for r in store.search(min_score=86)] == ["python.pdf"]
+    assert store.search("kubernetes") == []
+
+
+def test_reindexing_a_pair_updates_it_and_its_text_index(store):
+    store.add("Python and Kafka.", result(60), job_description="Data engineer", name="cv.pdf")
+    store.add("Python and Kafka.", result(75), job_description="Data engineer", name="cv.pdf")
+    assert store.count() == 1
+    assert store.search("kafka")[0]["score"] == 75
+
+    store.add("Python and Kafka.", result(50), job_description="Frontend engineer", name="cv.pdf")
+    assert store.count() == 2  # another job description is another candidate row
+
+    # A changed resume is a new row; the old text stays findable only through its own row.
+    store.add("Python and Airflow.", result(80), job_description="Data engineer", name="cv.pdf")
+    assert {r["score"] for r in store.search("airflow")} == {80}
+    assert {r["score"] for r in store.search("kafka")} == {75, 50}
+
+
+def test_owners_only_see_their_candidates(store):
+    alice, bob = owner_id("sk-alice"), owner_id("sk-bob")
+    store.add("Python and Kafka.", result(60), name="alice.pdf", owner=alice)
+    store.add("Python and Kafka.", result(70), name="bob.pdf", owner=bob)
+    assert [r["name"] for r in store.search("kafka", owner=alice)] == ["alice.pdf"]
+    assert store.count(bob) == 1 and store.count() == 2
+    bobs = store.search(owner=bob)[0]["id"]
+    assert store.get(bobs, owner=alice) is None
+    assert store.get(bobs, owner=bob)["name"] == "bob.pdf"
+    assert "sk-alice" not in repr(store.search())  # only the hash is stored
+
+
+def test_rows_without_an_owner_are_dropped_on_open(tmp_path):
+    path = str(tmp_path / "old.sqlite")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE candidates (id INTEGER PRIMARY KEY, resume_hash TEXT)")
+        conn.execute("INSERT INTO candidates (resume_hash) VALUES ('x')")
+    assert CandidateStore(path).count() == 0
+
+
+def test_results_without_a_score_are_not_indexed(store):
+    assert not store.add("Python.", {"score": "Error parsing file"})
+    assert store.count() == 0
@@ -0,0 +1,236 @@
+"""
+Differential tests: normalization and the PDF renderer built on cv_markdown.parse_cv must
+produce exactly what the original line-by-line implementations (kept below) produced.
+"""
+import io
+import random
+import re
+
+import pytest
+
+from cv_markdown import parse_cv
+from utils import normalize_cv_markdown
+
+SAMPLE = """# Jane Doe
+📧 jane@example.com
+📞 +1 555 0100
+🌐 github.com/jane
+
+## Professional Experience
+**Senior Engineer — Acme**
+- Built streaming pipelines on Kafka
+* Cut report latency by 40%
+### Data Engineer — Initech
+  - Maintained Airflow DAGs
+**Engineer** — Globex
+Plain paragraph with *emphasis*.
+
+## Education
+MSc Computer Science, 2015
+"""
+
+EDGE_CASES = [
+    "", "\n", "\r\n", "\rx", "\x0c-", "a b", "a\x0bb\x1cc", "# Jane Doe\r\n📧 a@b.c\r\n",
+    "## Skills\n\n\n- a\n", "**bold only**\n", "no trailing newline", "  # indented heading  ",
+    "#NoSpace\n###### Six\n", "- \n* \n-", "Line\u0085next",
+]
+
+
+def baseline_normalize_cv_markdown(md_text: str) -> str:
+    """utils.normalize_cv_markdown before the parser was introduced."""
+    lines = md_text.splitlines()
+    normalized = []
+    contacts_lines = []
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            normalized.append("")
+            continue
+
+        if re.match(r"^#{1,6}\s", line):
+            content = re.sub(r"^#{1,6}\s+", "", line)
+            if "Name" in content or "PhD" in content or re.match(r"^[A-Z][a-z]+\s[A-Z][a-z]+", content):
+                normalized.append(f"# {content}")
+            else:
+                normalized.append(f"## {content}")
+            continue
+
+        if line.startswith("**") and line.endswith("**"):
+            content = line.strip("* ")
+            normalized.append(f"### {content}")
+            continue
+
+        if line.startswith(("📧", "📞", "🌐")):
+            contacts_lines.append(line)
+            continue
+
+        if line.startswith(("-", "*")):
+            content = line.lstrip("-* ").strip()
+            normalized.append(f"- {content}")
+            continue
+
+        normalized.append(line)
+
+    if contacts_lines:
+        normalized.insert(1, " | ".join(contacts_lines))
+        normalized.insert(2, "")
+
+    return "\n".join(normalized)
+
+
+def baseline_generate_pdf_from_markdown(md_text: str) -> bytes:
+    """pdf_generator.generate_pdf_from_markdown before the parser and themes were introduced."""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import LETTER
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.platypus import HRFlowable, Paragraph, SimpleDocTemplate, Spacer
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=LETTER, rightMargin=50, leftMargin=50, topMargin=50, bottomMargin=50)
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name="NameHeader", fontSize=30, leading=32, alignment=1, fontName="Times-Bold",
+                              spaceAfter=6))
+    styles.add(ParagraphStyle(name="Contact", fontSize=10, leading=12, alignment=1, textColor=colors.grey,
+                              fontName="Times-Italic", spaceAfter=10))
+    styles.add(ParagraphStyle(name="SectionHeader", fontSize=14, leading=16, fontName="Times-Bold",
+                              spaceBefore=12, spaceAfter=6))
+    styles.add(ParagraphStyle(name="PositionHeader", fontSize=11, leading=13, fontName="Times-Bold",
+                              spaceBefore=4, spaceAfter=2))
+    styles.add(ParagraphStyle(name="BodyTextCustom", fontSize=10.5, leading=13, fontName="Times-Roman",
+                              spaceAfter=4, alignment=4))
+
+    flow = []
+    contact_inserted = False
+    for line in md_text.splitlines():
+        line = line.strip()
+        if not line:
+            flow.append(Spacer(1, 4))
+            continue
+        if line.startswith("# "):
+            flow.append(Paragraph(line[2:].strip(), styles["NameHeader"]))
+            flow.append(HRFlowable(width="100%", thickness=0.8, color=colors.grey, spaceBefore=6, spaceAfter=10))
+        elif line.startswith(("📧", "📞", "🌐")):
+            flow.append(Paragraph(line, styles["Contact"]))
+            if not contact_inserted:
+                flow.append(HRFlowable(width="100%", thickness=0.6, color=colors.grey, spaceBefore=4, spaceAfter=10))
+                contact_inserted = True
+        elif line.startswith("## "):
+            flow.append(HRFlowable(width="100%", thickness=0.5, color=colors.grey, spaceBefore=6, spaceAfter=4))
+            flow.append(Paragraph(line[3:].strip(), styles["SectionHeader"]))
+        elif line.startswith("### ") or ("—" in line and line.startswith("**")):
+            clean_line = line.replace("*", "").replace("### ", "").strip()
+            flow.append(Paragraph(clean_line, styles["PositionHeader"]))
+            flow.append(Spacer(1, 2))
+        else:
+            flow.append(Paragraph(line, styles["BodyTextCustom"]))
+    doc.build(flow)
+    return buffer.getvalue()
+
+
+def random_markdown(rng: random.Random) -> str:
+    pieces = ["# ", "## ", "### ", "#", "**", "**Role — Co**", "- ", "* ", "📧 ", "📞 ", "🌐 ", "Jane Doe", "PhD",
+              "Name", " ", "  ", "\t", "—", "text", "Kafka", "\r", "\x0c", " ", "\r\n", "\n", "\n\n"]
+    return "".join(rng.choice(pieces) for _ in range(rng.randint(0, 60)))
+
+
+def inputs():
+    rng = random.Random(13)
+    return [SAMPLE, SAMPLE.replace("\n", "\r\n"), *EDGE_CASES] + [random_markdown(rng) for _ in range(300)]
+
+
+def test_normalize_matches_baseline():
+    for text in inputs():
+        assert normalize_cv_markdown(text) == baseline_normalize_cv_markdown(text), repr(text)
+
+
+def test_one_node_per_line():
+    for text in inputs():
+        assert [node.raw for node in parse_cv(text).nodes] == text.splitlines()
+
+
+def test_structure_of_sample():
+    document = parse_cv(SAMPLE)
+    assert document.name == "Jane Doe"
+    assert document.contacts == ["📧 jane@example.com", "📞 +1 555 0100", "🌐 github.com/jane"]
+    experience, education = document.sections
+    assert experience.title == "Professional Experience"
+    assert [p.title for p in experience.positions] == ["Senior Engineer — Acme", "Data Engineer — Initech",
+                                                       "Engineer — Globex"]
+    assert education.items[0].line == "MSc Computer Science, 2015"
+
+
+@pytest.fixture
+def invariant_pdfs(monkeypatch):
+    """Deterministic reportlab output (no timestamps or random document ids), so PDFs compare byte for byte."""
+    pytest.importorskip("reportlab")
+    from reportlab import rl_config
+    monkeypatch.setattr(rl_config, "invariant", 1)
+
+
+def test_pdf_matches_baseline(invariant_pdfs):
+    from pdf_generator import generate_pdf_from_markdown
+    rng = random.Random(5)
+    # Random text can contain markup reportlab rejects; compare only what the baseline renders.
+    candidates = [SAMPLE, SAMPLE.replace("\n", "\r\n"), *EDGE_CASES] + [random_markdown(rng) for _ in range(40)]
+    compared = 0
+    for text in candidates:
+        try:
+            expected = baseline_generate_pdf_from_markdown(text)
+        except Exception:
+            continue
+        assert generate_pdf_from_markdown(text) == expected, repr(text)
+        compared += 1
+    assert compared >= len(EDGE_CASES)
+
+
+def baseline_export_pdf(text: str) -> bytes:
+    """export.export_pdf before it read the parsed nodes."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+    y = height - 40
+    for line in text.split("\n"):
+        c.drawString(40, y, line)
+        y -= 15
+        if y < 40:
+            c.showPage()
+            y = height - 40
+    c.save()
+    return buffer.getvalue()
+
+
+def docx_paragraphs(data: bytes) -> list:
+    from docx import Document
+    return [p.text for p in Document(io.BytesIO(data)).paragraphs]
+
+
+def newline_separated():
+    """Inputs whose lines are separated by "\\n" only, without a trailing newline."""
+    rng = random.Random(21)
+    texts = [SAMPLE.rstrip("\n"), "a", "  indented\n\n- bullet", "\n".join(f"line {i}" for i in range(120))]
+    other_breaks = re.compile("[\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+    texts += [other_breaks.sub(" ", random_markdown(rng)).rstrip("\n") for _ in range(30)]
+    return [t for t in texts if t]
+
+
+def test_pdf_export_matches_baseline_for_newline_separated_text(invariant_pdfs):
+    from export import export_pdf
+    for text in newline_separated():
+        assert export_pdf(text) == baseline_export_pdf(text), repr(text)
+
+
+def test_docx_export_matches_baseline_for_newline_separated_text():
+    pytest.importorskip("docx")
+    from export import export_docx
+    for text in newline_separated():
+        assert docx_paragraphs(export_docx(text))[-len(text.split("\n")):] == text.split("\n"), repr(text)
+
+
+def test_exports_split_lines_like_the_parser():
+    pytest.importorskip("docx")
+    from export import export_docx
+    # A trailing newline adds no empty paragraph, and "\r\n" ends a line instead of leaving "\r" in it.
+    assert docx_paragraphs(export_docx("# Jane Doe\r\n- Python\n")) == ["# Jane Doe", "- Python"]
@@ -0,0 +1,41 @@
+import asyncio
+
+from batch import _load_jd, iter_batch
+from dedup import DedupIndex
+from fixtures import make_cv_markdown
+
+
+def test_near_duplicates_match_their_canonical_document():
+    index = DedupIndex(0.8)
+    cv = make_cv_markdown(3, seed=1)
+    assert index.add("a.pdf", cv) is None
+    match = index.add("a.docx", cv.replace("\n", "\n\n") + "\nReferences available on request.")
+    assert match.of == "a.pdf" and not match.exact
+    assert index.add("b.pdf", make_cv_markdown(3, seed=2)) is None
+
+
+def test_empty_and_short_texts_are_never_duplicates():
+    index = DedupIndex()
+    assert index.assign({"scan1.pdf": "", "scan2.pdf": "  \n", "p1.pdf": "Page 1", "p2.pdf": "page 1"}) == {}
+    assert index.find("") is None
+    assert index.clusters() == []
+
+
+def test_job_descriptions_with_the_same_file_name_are_analyzed_separately(tmp_path, llm_server, result_cache):
+    llm_server()
+    resume = tmp_path / "cv.txt"
+    resume.write_text(make_cv_markdown(3, seed=1))
+    paths = []
+    for region, text in (("eu", "Backend engineer, Python and PostgreSQL, based in Berlin. "),
+                         ("us", "Backend engineer, Go and Kubernetes on AWS, based in Austin. ")):
+        (tmp_path / region).mkdir()
+        paths.append(tmp_path / region / "backend.txt")
+        paths[-1].write_text(text * 3)
+    jd_items = [_load_jd(str(path)) for path in paths]
+
+    async def collect():
+        return [record async for record in iter_batch([str(resume)], jd_items, api_key="stub", cache=result_cache)]
+
+    records = asyncio.run(collect())
+    assert sorted(r["job_description"] for r in records) == [str(path) for path in paths]
+    assert all(r["ok"] and "duplicate_of" not in r for r in records)
@@ -0,0 +1,89 @@
+import pytest
+
+import llm_stub
+from analyze_resume import analyze_resume, delta_part
+from incremental import MAX_DELTA_RUNS, diff_inputs, diff_text
+
+PREVIOUS_RESULT = {
+    "score": 70, "skills_score": 70, "education_score": 60, "experience_score": 75, "keyword_score": 65,
+    "formatting_score": 80, "recommendations": {"Skills & Keywords": ["Mention AWS"]},
+    "improved_cv": "# Jane Doe\nKEPT CV",
+}
+
+
+@pytest.fixture
+def previous_run(resume_text, job_description):
+    return {"resume_text": resume_text, "job_description": job_description, "result": dict(PREVIOUS_RESULT)}
+
+
+@pytest.fixture
+def edited_jd(job_description):
+    return job_description.replace("Airflow orchestration", "Dagster orchestration")
+
+
+def test_diff_ignores_whitespace_and_order():
+    delta = diff_text("a\nb\n- c", "b\n  a\n* c")
+    assert not delta.changed
+
+
+def test_failed_calls_keep_the_previous_rewrite_marked_stale(llm_server, result_cache, upload, resume_text,
+                                                             edited_jd, previous_run):
+    llm_server(content="this is not json")
+    _, result = analyze_resume(upload(resume_text), edited_jd, api_key="stub", use_mock=False, cache=result_cache,
+                               previous=previous_run)
+    assert result["score"] == "Error"
+    assert result["incremental"]["rewrite_reused"] and result["incremental"]["rewrite_stale"]
+    assert result["improved_cv"] == PREVIOUS_RESULT["improved_cv"]
+
+
+def test_job_description_edit_updates_scores_and_rewrites_the_cv(llm_server, result_cache, upload, resume_text,
+                                                                 edited_jd, previous_run):
+    stub = llm_server()
+    _, result = analyze_resume(upload(resume_text), edited_jd, api_key="stub", use_mock=False, cache=result_cache,
+                               previous=previous_run)
+    report = result["incremental"]
+    assert report["mode"] == "delta"
+    assert result["score"] == 72  # the stub's answer
+    # The old CV was tailored to the old job description.
+    assert result["improved_cv"] == llm_stub.STUB_RESULT["improved_cv"]
+    assert not report["rewrite_reused"] and not report["rewrite_stale"]
+    assert stub.state.requests == 2  # delta + rewrite
+    assert report["delta_runs"] == 1
+    assert 0 < report["prompt_tokens"] < report["full_prompt_tokens"]
+    assert report["tokens_saved"] == report["full_prompt_tokens"] - report["prompt_tokens"]
+
+
+def test_consecutive_delta_runs_are_capped(llm_server, result_cache, upload, resume_text, edited_jd, previous_run):
+    stub = llm_server()
+    previous_run["result"]["incremental"] = {"delta_runs": MAX_DELTA_RUNS - 1}
+    _, result = analyze_resume(upload(resume_text), edited_jd, api_key="stub", use_mock=False, cache=result_cache,
+                               previous=previous_run)
+    assert result["incremental"]["delta_runs"] == MAX_DELTA_RUNS
+
+    previous_run["result"]["incremental"] = {"delta_runs": MAX_DELTA_RUNS}
+    _, result = analyze_resume(upload(resume_text), edited_jd + "- Terraform\n", api_key="stub", use_mock=False,
+                               cache=result_cache, previous=previous_run)
+    assert "incremental" not in result  # a full analysis, which resets the count
+    assert result["score"] == 72
+    assert stub.state.requests == 4
+
+
+def test_unchanged_inputs_reuse_the_previous_result_even_after_the_cap(llm_server, result_cache, upload,
+                                                                       resume_text, previous_run):
+    stub = llm_server()
+    previous_run["result"]["incremental"] = {"delta_runs": MAX_DELTA_RUNS}
+    _, result = analyze_resume(upload(resume_text), previous_run["job_description"], api_key="stub",
+                               use_mock=False, cache=result_cache, previous=previous_run)
+    assert result["incremental"]["mode"] == "reuse"
+    assert result["improved_cv"] == PREVIOUS_RESULT["improved_cv"]
+    assert stub.state.requests == 0
+
+
+def test_delta_cache_key_depends_on_the_previous_result(resume_text, job_description, edited_jd, previous_run):
+    delta = diff_inputs(previous_run, resume_text, edited_jd)
+    key = delta_part(PREVIOUS_RESULT, delta).cache_key(resume_text, edited_jd)
+    assert key == delta_part(dict(PREVIOUS_RESULT), delta).cache_key(resume_text, edited_jd)
+    assert key != delta_part(dict(PREVIOUS_RESULT, score=40), delta).cache_key(resume_text, edited_jd)
+    other = diff_inputs({"resume_text": resume_text, "job_description": job_description + "- Terraform\n"},
+                        resume_text, edited_jd)
+    assert key != delta_part(PREVIOUS_RESULT, other).cache_key(resume_text, edited_jd)
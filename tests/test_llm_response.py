@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+import pytest
+
+import llm_response
+import llm_stub
+from llm_response import (REQUIRED_FIELDS, RecoveryStats, acomplete_missing, complete_missing, extract_json,
+                          parse_response, recover_partial, validate)
+from openai_client import ManagedClient
+
+COMPLETE = dict(llm_stub.STUB_RESULT)
+TEXT = json.dumps(COMPLETE)
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(monkeypatch):
+    monkeypatch.setattr(llm_response, "stats", RecoveryStats())
+
+
+def test_extract_plain_fenced_and_prose_wrapped_json():
+    assert extract_json(TEXT) == (COMPLETE, "json")
+    assert extract_json(f"```json\n{TEXT}\n```") == (COMPLETE, "extracted")
+    assert extract_json(f"Here is the analysis:\n{TEXT}\nLet me know if you need more.") == (COMPLETE, "extracted")
+    assert extract_json('Result: {"score": 9, "tags": ["a",],}') == ({"score": 9, "tags": ["a"]}, "extracted")
+
+
+@pytest.mark.parametrize("text", ['Sure! {"score": 9', "no json here", "", "[1, 2, 3]", '"just a string"'])
+def test_extract_rejects_invalid_or_non_object_output(text):
+    assert extract_json(text) == (None, None)
+
+
+def test_recover_partial_keeps_every_complete_value_of_truncated_output():
+    truncated = TEXT[:TEXT.index("Quantify")]  # cut inside the "Impact & Metrics" list
+    data = recover_partial(truncated)
+    assert data["score"] == 72 and data["formatting_score"] == 85
+    assert data["recommendations"]["Skills & Keywords"] == COMPLETE["recommendations"]["Skills & Keywords"]
+    assert "Impact & Metrics" not in data["recommendations"]  # its only bullet was cut off
+    assert "improved_cv" not in data
+    assert recover_partial('Sure! {"score": 9') == {}  # the number may still be going on
+    assert recover_partial('{"score": 9, "skills') == {"score": 9}
+
+
+def test_validate_coerces_scores_and_reports_missing_or_wrong_fields():
+    clean, missing = validate({"score": "87%", "skills_score": 140.4, "education_score": True,
+                               "experience_score": "n/a", "keyword_score": -3, "formatting_score": None,
+                               "recommendations": {"Impact & Metrics": ["Add numbers", "", 3], "Empty": []},
+                               "improved_cv": "   ", "extra": "kept"})
+    assert clean["score"] == 87 and clean["skills_score"] == 100 and clean["keyword_score"] == 0
+    assert clean["recommendations"] == {"Impact & Metrics": ["Add numbers"]}
+    assert clean["extra"] == "kept"
+    assert missing == ["education_score", "experience_score", "formatting_score", "improved_cv"]
+
+
+def test_validate_only_checks_the_requested_fields():
+    clean, missing = validate({"score": 50, "improved_cv": "# CV"}, fields=("score",))
+    assert clean == {"score": 50} and missing == []
+    assert validate({"recommendations": ["not", "a", "dict"]}, fields=("recommendations",))[1] == ["recommendations"]
+
+
+def test_parse_response_methods_and_stats():
+    assert parse_response(TEXT).method == "json"
+    assert parse_response(f"```json\n{TEXT}\n```").method == "extracted"
+    partial = parse_response(TEXT[:TEXT.index('"recommendations"')])
+    assert partial.method == "partial" and partial.usable and not partial.complete
+    assert set(partial.missing) == {"recommendations", "improved_cv"}
+    assert parse_response("Sorry, I can't help with that.").method == "failed"
+    counters = llm_response.recovery_stats()
+    assert counters["responses"] == 4 and counters["clean"] == 1 and counters["clean_rate"] == 0.25
+
+
+def test_followup_fetches_only_the_missing_fields_and_merges_them(llm_server):
+    stub = llm_server()
+    partial = parse_response(json.dumps({"score": 61, "skills_score": 55, "education_score": 70,
+                                         "experience_score": 60, "keyword_score": 50, "formatting_score": 80}))
+    assert set(partial.missing) == {"recommendations", "improved_cv"}
+    merged = complete_missing(ManagedClient("stub", stub.base_url), "stub", partial, "resume", "jd")
+    assert merged.complete
+    assert merged.data["score"] == 61  # known fields are kept, not replaced by the follow-up
+    assert merged.data["improved_cv"] == COMPLETE["improved_cv"]
+    assert merged.data["recommendations"] == COMPLETE["recommendations"]
+    counters = llm_response.recovery_stats()
+    assert counters["followups"] == 1 and counters["followup_recovered"] == 1 and counters["recovery_rate"] == 1.0
+
+
+def test_followup_that_is_still_incomplete_or_fails_keeps_the_main_answer(llm_server, dead_base_url):
+    stub = llm_server(content='{"recommendations": {"Impact & Metrics": ["Add numbers"]}}')
+    partial = parse_response(json.dumps({k: v for k, v in COMPLETE.items() if k not in ("score", "recommendations")}))
+    merged = asyncio.run(acomplete_missing(ManagedClient("stub", stub.base_url), "stub", partial, "resume", "jd"))
+    assert merged.missing == ["score"]
+    assert merged.data["recommendations"] == {"Impact & Metrics": ["Add numbers"]}
+
+    dead = ManagedClient("stub", dead_base_url, max_retries=0)
+    assert complete_missing(dead, "stub", partial, "resume", "jd") is partial
+    assert llm_response.recovery_stats()["unrecovered"] == 2
+
+
+def test_complete_responses_make_no_followup_call():
+    parsed = parse_response(TEXT)
+    assert complete_missing(object(), "stub", parsed, "resume", "jd") is parsed
+    assert set(REQUIRED_FIELDS) <= set(parsed.data)
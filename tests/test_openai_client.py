@@ -0,0 +1,136 @@
+import gc
+from collections import OrderedDict
+
+import pytest
+from openai import APIConnectionError, NotFoundError
+
+import openai_client
+from governor import Governor
+from openai_client import CircuitBreaker, CircuitOpenError, ManagedClient, get_client, is_retryable
+from sim_governor import SimulatedClock
+
+MESSAGES = [{"role": "user", "content": "Score this resume."}]
+
+
+def test_breaker_transitions():
+    clock = SimulatedClock()
+    breaker = CircuitBreaker(threshold=3, cooldown=30, clock=clock)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    clock.advance(30)
+    assert breaker.state == "half-open" and breaker.allow()  # one trial call goes through
+    assert not breaker.allow()  # and only one
+    breaker.record_failure()
+    assert breaker.state == "open"  # the trial failed: another full cooldown
+    clock.advance(29)
+    assert breaker.state == "open"
+    clock.advance(1)
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_rate_limited_calls_are_retried(llm_server):
+    stub = llm_server(rate_limit_every=2)  # every second request is a 429 with Retry-After: 0.1
+    client = ManagedClient("stub", stub.base_url)
+    for _ in range(3):
+        assert client.chat(model="stub", messages=MESSAGES).choices[0].message.content
+    counters = client.metrics.snapshot()
+    assert counters["retries"] == 2 and counters["failures"] == 0
+    assert counters["requests"] == stub.state.requests == 5
+    assert client.breaker.state == "closed"
+
+
+def test_breaker_opens_after_repeated_connection_failures_and_recovers(llm_server, dead_base_url):
+    clock = SimulatedClock()
+    client = ManagedClient("stub", dead_base_url, max_retries=0)
+    client.breaker = CircuitBreaker(threshold=3, cooldown=30, clock=clock)
+    for _ in range(3):
+        with pytest.raises(APIConnectionError):
+            client.chat(model="stub", messages=MESSAGES)
+    with pytest.raises(CircuitOpenError):  # rejected without calling the API
+        client.chat(model="stub", messages=MESSAGES)
+    assert client.metrics.snapshot()["rejected"] == 1
+
+    stub = llm_server()  # the endpoint comes back
+    client.client = client.client.with_options(base_url=stub.base_url)
+    clock.advance(30)
+    client.chat(model="stub", messages=MESSAGES)  # the half-open trial succeeds
+    assert client.breaker.state == "closed"
+
+
+def test_client_errors_are_not_retried_and_leave_the_breaker_closed(llm_server):
+    stub = llm_server()
+    client = ManagedClient("stub", stub.base_url)
+    client.breaker = CircuitBreaker(threshold=1)
+    with pytest.raises(NotFoundError) as error:
+        client.embed(model="stub", input=["text"])  # the stub only serves chat completions
+    assert not is_retryable(error.value)
+    assert stub.state.requests == 1
+    assert client.breaker.state == "closed"
+
+
+def half_open_client(base_url, **kwargs) -> ManagedClient:
+    clock = SimulatedClock()
+    client = ManagedClient("stub", base_url, **kwargs)
+    client.breaker = CircuitBreaker(threshold=1, cooldown=30, clock=clock)
+    client.breaker.record_failure()
+    clock.advance(30)
+    return client
+
+
+def test_half_open_breaker_lets_a_single_probe_through():
+    breaker = half_open_client("http://127.0.0.1:9/v1").breaker
+    assert breaker.admit() == "probe"
+    assert breaker.admit() is None and breaker.state == "half-open"
+    breaker.release()  # the probe ended without a verdict
+    assert breaker.admit() == "probe"
+
+
+def test_a_probe_ending_in_a_client_error_frees_the_next_probe(llm_server):
+    stub = llm_server()
+    client = half_open_client(stub.base_url)
+    with pytest.raises(NotFoundError):
+        client.embed(model="stub", input=["text"])
+    assert client.breaker.state == "half-open" and not client.breaker.probing
+    client.chat(model="stub", messages=MESSAGES)
+    assert client.breaker.state == "closed"
+
+
+def test_streamed_probe_succeeds_only_once_consumed(llm_server):
+    stub = llm_server()
+    client = half_open_client(stub.base_url)
+    stream = client.chat(model="stub", messages=MESSAGES, stream=True)
+    assert client.breaker.state == "half-open"
+    with pytest.raises(CircuitOpenError):  # the probe is still running
+        client.chat(model="stub", messages=MESSAGES)
+    assert "".join(chunk.choices[0].delta.content or "" for chunk in stream if chunk.choices)
+    assert client.breaker.state == "closed"
+
+
+def test_failed_attempts_are_refunded_to_the_governor(dead_base_url):
+    governor = Governor(rpm=600, tpm=100_000, clock=SimulatedClock(), burst=0.5)
+    client = ManagedClient("stub", dead_base_url, max_retries=2, governor=governor)
+    full = governor.snapshot()["tokens_available"]
+    with pytest.raises(APIConnectionError):
+        client.chat(model="stub", messages=MESSAGES)
+    snapshot = governor.snapshot()
+    assert client.metrics.snapshot()["requests"] == 3
+    assert snapshot["tokens_available"] == full
+    assert snapshot["requests_available"] == 300 - 3  # the requests themselves were still made
+
+
+def test_shared_clients_are_bounded_and_evicted_ones_closed(monkeypatch):
+    monkeypatch.setattr(openai_client, "_clients", OrderedDict())
+    monkeypatch.setattr(openai_client, "MAX_CLIENTS", 2)
+    first, second = get_client("key-1"), get_client("key-2")
+    assert get_client("key-1") is first  # now the most recently used
+    http_client = second.http_client
+    del second
+    get_client("key-3")
+    assert len(openai_client._clients) == 2
+    assert get_client("key-1") is first
+    gc.collect()
+    assert http_client.is_closed and not first.http_client.is_closed
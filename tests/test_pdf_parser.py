@@ -0,0 +1,45 @@
+import io
+
+import pytest
+
+pytest.importorskip("PyPDF2")
+pytest.importorskip("reportlab")
+
+import document
+from bench_parsing import make_pdf
+from pdf_parser import extract_pdf_pages
+
+
+class Upload(io.BytesIO):
+    name = "cv.pdf"
+
+
+@pytest.fixture(scope="module")
+def pdf():
+    return make_pdf(6, lines_per_page=5)
+
+
+def test_parallel_matches_sequential(pdf):
+    sequential = extract_pdf_pages(io.BytesIO(pdf), parallel=False)
+    parallel = extract_pdf_pages(io.BytesIO(pdf), parallel=True, threshold=2, max_workers=2)
+    assert parallel == sequential
+    assert parallel.timed_out == ()
+    assert "5.4" in parallel[5]
+
+
+def test_pages_past_the_deadline_come_back_empty(pdf):
+    pages = extract_pdf_pages(io.BytesIO(pdf), parallel=True, threshold=2, max_workers=2, page_timeout=0)
+    assert pages == [""] * 6
+    assert pages.timed_out == tuple(range(6))
+
+
+def test_documents_with_timed_out_pages_are_not_cached(pdf, monkeypatch):
+    monkeypatch.setattr(document, "_cache", type(document._cache)())
+    monkeypatch.setattr(document, "extract_pdf_pages",
+                        lambda f: extract_pdf_pages(f, parallel=True, threshold=2, max_workers=2, page_timeout=0))
+    assert not document.load_document(Upload(pdf)).complete
+    assert not document._cache
+
+    monkeypatch.setattr(document, "extract_pdf_pages", lambda f: extract_pdf_pages(f, parallel=False))
+    assert document.load_document(Upload(pdf)).complete
+    assert len(document._cache) == 1
@@ -0,0 +1,133 @@
+import pytest
+
+import prompt_builder
+from prompt_builder import compress_job_description, compress_resume, count_tokens, prepare_inputs, truncate_to_tokens
+
+RESUME_PAGES = [
+    "Jane Doe — Resume\nSenior Data Engineer\nSkills: Python, Kafka, Airflow\nPage 1 of 3",
+    "Jane Doe — Resume\nExperience\n- Built streaming pipelines on Kafka at Acme\nPage 2 of 3",
+    "Jane Doe — Resume\nEducation\nMSc Computer Science, 2015\nPage 3 of 3",
+]
+JOB_DESCRIPTION = """Senior Data Engineer
+
+We need strong Python and Kafka experience, and Airflow is a plus.
+
+Benefits
+Free lunch, gym membership and a generous learning budget.
+
+We are an equal opportunity employer and value diversity.
+
+We need strong Python and Kafka experience, and Airflow is a plus."""
+
+
+@pytest.fixture
+def no_encoder(monkeypatch):
+    monkeypatch.setattr(prompt_builder, "tiktoken", None)
+    monkeypatch.setattr(prompt_builder, "_encodings", {})
+
+
+def test_compression_keeps_scoring_content():
+    resume = compress_resume("\n".join(RESUME_PAGES), RESUME_PAGES)
+    for kept in ("Senior Data Engineer", "Skills: Python, Kafka, Airflow", "Built streaming pipelines on Kafka",
+                 "MSc Computer Science, 2015"):
+        assert kept in resume
+    assert "Page 2 of 3" not in resume
+    assert "Jane Doe — Resume" not in resume
+
+    jd = compress_job_description(JOB_DESCRIPTION)
+    assert jd.count("We need strong Python and Kafka experience") == 1
+    assert "Senior Data Engineer" in jd
+    assert "gym" not in jd and "equal opportunity" not in jd
+
+
+def test_prepare_inputs_fits_budget_and_keeps_the_start():
+    resume = "\n".join(f"- Delivered project {i} using Python and Kafka" for i in range(400))
+    build = prepare_inputs(resume, JOB_DESCRIPTION, budget=500)
+    assert build.truncated
+    assert build.input_tokens <= 500
+    assert count_tokens(build.resume_text) + count_tokens(build.job_description) == build.input_tokens
+    assert build.resume_text.startswith("- Delivered project 0 using Python and Kafka")
+    assert "Kafka" in build.job_description
+
+
+def test_prepare_inputs_untouched_within_budget():
+    build = prepare_inputs("Python developer\nKafka", "Python role", budget=1000)
+    assert not build.truncated
+    assert (build.resume_text, build.job_description) == ("Python developer\nKafka", "Python role")
+
+
+def test_truncate_cuts_inside_a_single_long_line():
+    text = " ".join(f"requirement{i}" for i in range(2000))
+    head = truncate_to_tokens(text, 50)
+    assert head
+    assert count_tokens(head) <= 50
+    assert text.startswith(head)
+
+
+def test_truncate_keeps_whole_lines_then_the_head_of_the_overflowing_one():
+    text = "short line\n" + "word " * 500
+    head = truncate_to_tokens(text, 40)
+    assert head.startswith("short line\nword word")
+    assert count_tokens(head) <= 40
+
+
+def test_fallback_estimate_without_tiktoken(no_encoder):
+    assert count_tokens("x" * 40) == 10
+    head = truncate_to_tokens("y" * 1000, 10)
+    assert head == "y" * 40
+
+
+def test_fallback_when_the_encoding_cannot_be_loaded(monkeypatch):
+    class Offline:
+        calls = 0
+
+        @classmethod
+        def encoding_for_model(cls, model):
+            cls.calls += 1
+            raise ConnectionError("no network")
+
+        get_encoding = encoding_for_model
+
+    monkeypatch.setattr(prompt_builder, "tiktoken", Offline)
+    monkeypatch.setattr(prompt_builder, "_encodings", {})
+    assert count_tokens("x" * 40) == 10
+    assert count_tokens("x" * 8) == 2
+    assert Offline.calls == 1  # the failure is cached, not retried per call
+    assert prepare_inputs("Python developer", "Python role").input_tokens > 0
+
+
+def test_boilerplate_is_dropped_line_by_line_without_blank_lines():
+    jd = ("Senior Python Engineer\nRequirements:\n- 5 years Python\n- Kafka\n"
+          "We are an equal opportunity employer.")
+    assert compress_job_description(jd) == "Senior Python Engineer\nRequirements:\n- 5 years Python\n- Kafka"
+
+
+def test_a_sentence_starting_with_benefits_is_not_a_benefits_section():
+    jd = "Benefits and requirements\n- Python\n- Kafka"
+    assert compress_job_description(jd) == jd
+
+
+def test_eeo_sentences_are_cut_from_a_line_that_also_has_requirements():
+    jd = "You know Python and Kafka. We are an equal opportunity employer. Airflow is a plus."
+    assert compress_job_description(jd) == "You know Python and Kafka. Airflow is a plus."
+
+
+def test_benefits_section_ends_at_the_next_heading():
+    jd = "Data Engineer\nPerks:\n- Gym membership\n- Free lunch\nRequirements:\n- Python\n- SQL"
+    assert compress_job_description(jd) == "Data Engineer\nRequirements:\n- Python\n- SQL"
+
+
+def test_a_job_description_of_only_boilerplate_is_kept_whole():
+    jd = "We are an equal opportunity employer."
+    assert compress_job_description(jd) == jd
+
+
+def test_every_line_outside_the_benefits_section_survives():
+    from fixtures import make_job_descriptions
+    for name, jd in make_job_descriptions().items():
+        compressed = compress_job_description(jd).splitlines()
+        body = jd.split("Benefits:")[0]
+        for line in body.splitlines():
+            if line.strip():
+                assert line.strip() in compressed, (name, line)
+        assert "- Learning budget" not in compressed
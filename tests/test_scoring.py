@@ -0,0 +1,44 @@
+from scoring import LocalScorer, skill_phrases
+
+JOB_DESCRIPTION = """Senior Data Engineer
+Requirements:
+- Kafka streaming
+- PySpark
+- Airflow orchestration
+- Strong communication in a team
+"""
+CORPUS = [
+    JOB_DESCRIPTION,
+    "Frontend Engineer\n- React\n- Strong communication in a team",
+    "Product Manager\n- Roadmaps\n- Strong communication in a team",
+]
+RESUMES = {
+    "streaming": "Built Kafka streaming jobs and PySpark pipelines, scheduled with Airflow orchestration.",
+    "partial": "Wrote PySpark batch jobs. Strong communication in a team.",
+    "generic": "Strong communication in a team. Team player with great communication.",
+    "unrelated": "Pastry chef with ten years of experience in French bakeries.",
+}
+
+
+def test_skill_phrases_come_from_the_bullets():
+    assert skill_phrases(JOB_DESCRIPTION) >= {"kafka stream", "pyspark", "airflow orchestr"}
+    assert "senior" not in skill_phrases(JOB_DESCRIPTION)  # the title is not a bullet
+
+
+def test_rank_orders_resumes_by_distinctive_matches():
+    ranked = LocalScorer().fit(CORPUS).rank(dict(reversed(RESUMES.items())), JOB_DESCRIPTION)
+    assert [name for name, _ in ranked] == ["streaming", "partial", "generic", "unrelated"]
+    scores = dict(ranked)
+    assert scores["streaming"]["missing_skills"] == ["communic"]  # "strong" and "team" are stopwords
+    assert scores["unrelated"]["score"] == 0 and scores["unrelated"]["bm25"] == 0
+    assert [name for name, _ in LocalScorer().fit(CORPUS).rank(RESUMES, JOB_DESCRIPTION, top_n=2)] == [
+        "streaming", "partial"]
+
+
+def test_words_in_every_posting_weigh_less():
+    scorer = LocalScorer().fit(CORPUS)
+    assert scorer.idf("pyspark") > scorer.idf("communic")
+    generic = scorer.score(RESUMES["generic"], JOB_DESCRIPTION)
+    specific = scorer.score("Kafka streaming", JOB_DESCRIPTION)
+    # Each covers one bullet, but only one of them is distinctive.
+    assert specific["skills_score"] > generic["skills_score"]
@@ -0,0 +1,54 @@
+import time
+
+import pytest
+
+from jobs import JobQueue
+from semantic import HashingEmbedder, get_matcher, split_units
+
+RESUME = "Built Kafka streaming pipelines in Python"
+JOB_DESCRIPTION = "Requirements:\n- Kafka streaming\n- Python\n- Go\nApply now!"
+
+
+def test_short_bullets_are_requirements_and_short_prose_is_not():
+    assert split_units(JOB_DESCRIPTION) == ["Kafka streaming", "Python", "Go"]
+    assert split_units("1. SQL\n• dbt\nGreat team!\nYou will own the data platform.") == [
+        "SQL", "dbt", "You will own the data platform."]
+
+
+def test_hashing_fallback_ignores_the_configured_embedder(monkeypatch):
+    monkeypatch.setenv("CV_MATCHER_EMBEDDER", "openai")
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    matcher = get_matcher(embedder="hashing")
+    assert isinstance(matcher.embedder, HashingEmbedder)
+    match = matcher.match(RESUME, JOB_DESCRIPTION)
+    found = {r.requirement: r for r in match.requirements}
+    assert list(found) == ["Kafka streaming", "Python", "Go"]
+    # Stemmed unigrams and bigrams: all 3 features of "Kafka streaming" and 1 of "Python"
+    # occur among the resume line's 9.
+    assert found["Kafka streaming"].similarity == pytest.approx(3 / 27 ** 0.5, abs=1e-3)
+    assert found["Python"].similarity == pytest.approx(1 / 3, abs=1e-3)
+    assert found["Go"].similarity == 0.0
+    assert [r.covered for r in match.requirements] == [True, True, False]
+    assert all(r.evidence == RESUME for r in match.requirements[:2])
+    assert match.coverage == pytest.approx(2 / 3, abs=1e-3)
+    assert match.score == 67
+    assert match.to_dict()["requirements"][0] == {
+        "requirement": "Kafka streaming", "evidence": RESUME, "similarity": 0.577, "covered": True}
+
+
+def test_semantic_match_runs_in_the_job_queue(tmp_path, monkeypatch):
+    monkeypatch.delenv("CV_MATCHER_EMBEDDER", raising=False)
+    queue = JobQueue(path=str(tmp_path / "jobs.sqlite"), workers=1)
+    try:
+        task_id = queue.submit_semantic(RESUME, JOB_DESCRIPTION)
+        assert queue.submit_semantic(RESUME, JOB_DESCRIPTION) == task_id  # a rerun reattaches
+        deadline = time.monotonic() + 10
+        while queue.get_semantic(task_id)["status"] == "running" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        task = queue.get_semantic(task_id)
+        assert task["status"] == "done"
+        assert task["result"]["score"] == 67
+        assert [r["requirement"] for r in task["result"]["requirements"]] == ["Kafka streaming", "Python", "Go"]
+        assert queue.get_semantic("unknown") is None
+    finally:
+        queue.stop()
@@ -0,0 +1,62 @@
+import asyncio
+import json
+
+from fixtures import make_cv_markdown
+from service import AnalysisService, coalescing_key
+
+BOUNDARY = "cvmatcherboundary"
+
+
+def multipart(fields: dict) -> bytes:
+    parts = []
+    for name, value in fields.items():
+        filename = '; filename="cv.txt"' if name == "resume" else ""
+        parts.append(f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"{filename}\r\n\r\n{value}\r\n')
+    return ("".join(parts) + f"--{BOUNDARY}--\r\n").encode()
+
+
+async def call(app, method: str, path: str, body: bytes = b"", content_type: str = "application/json"):
+    """(status, parsed body) of one request sent straight to the ASGI app."""
+    scope = {"type": "http", "method": method, "path": path, "headers": [(b"content-type", content_type.encode())]}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    response = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    return sent[0]["status"], json.loads(response) if sent[0]["status"] != 200 or path == "/analyze" else response
+
+
+def test_bypassing_the_cache_is_part_of_the_coalescing_key():
+    assert coalescing_key("cv", "jd", None) == coalescing_key("cv ", "jd", None, False)
+    assert coalescing_key("cv", "jd", None) != coalescing_key("cv", "jd", None, True)
+
+
+def test_export_rejects_a_non_string_cv():
+    status, body = asyncio.run(call(AnalysisService(api_key="stub"), "POST", "/export/pdf",
+                                    json.dumps({"improved_cv": ["# Jane Doe"]}).encode()))
+    assert status == 400 and "string" in body["error"]
+
+
+def test_concurrent_requests_coalesce_only_with_the_same_cache_mode(llm_server, result_cache):
+    stub = llm_server(latency=0.3)
+    app = AnalysisService(api_key="stub", base_url=stub.base_url, cache=result_cache, split=False)
+    resume, jd = make_cv_markdown(3, seed=4), "Senior data engineer: Python, SQL, Kafka, Airflow."
+    content_type = f"multipart/form-data; boundary={BOUNDARY}"
+
+    async def analyze(bypass):
+        fields = {"resume": resume, "job_description": jd, "bypass_cache": "1" if bypass else "0"}
+        return await call(app, "POST", "/analyze", multipart(fields), content_type)
+
+    async def run():
+        return await asyncio.gather(analyze(False), analyze(False), analyze(True), analyze(True))
+
+    responses = asyncio.run(run())
+    assert [status for status, _ in responses] == [200] * 4
+    # Which request of each pair leads depends on thread scheduling; each pair has exactly one leader.
+    assert sorted(body["coalesced"] for _, body in responses[:2]) == [False, True]
+    assert sorted(body["coalesced"] for _, body in responses[2:]) == [False, True]
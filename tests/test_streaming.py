@@ -0,0 +1,61 @@
+import json
+import random
+
+import llm_stub
+from analyze_resume import analyze_resume_stream
+from json_stream import IncrementalJSONParser
+
+DOCUMENT = {
+    "score": 72, "ratio": -1.5e3, "ok": True, "missing": None,
+    "recommendations": {"Impact & Metrics": ["Quantify \"latency\" wins", "Use \\u escapes: é€"]},
+    "improved_cv": "# Jane Doe\n\t📧 jane@example.com\n- Built things — fast",
+    "nested": [[], {}, [1, [2, {"a": "b"}]]],
+}
+
+
+def chunked(text: str, rng: random.Random):
+    i = 0
+    while i < len(text):
+        size = rng.randint(1, 7)
+        yield text[i:i + size]
+        i += size
+
+
+def test_chunked_parse_matches_json_loads():
+    text = "```json\n" + json.dumps(DOCUMENT, ensure_ascii=False, indent=1) + "\n```"
+    for seed in range(50):
+        parser = IncrementalJSONParser(stream_paths=[("improved_cv",)])
+        events = [event for chunk in chunked(text, random.Random(seed)) for event in parser.feed(chunk)]
+        values = {path: value for kind, path, value in events if kind == "value"}
+        assert parser.done
+        assert values[("score",)] == 72 and values[("ratio",)] == -1500.0
+        assert values[("ok",)] is True and values[("missing",)] is None
+        assert values[("recommendations", "Impact & Metrics", 1)] == DOCUMENT["recommendations"]["Impact & Metrics"][1]
+        assert values[("nested", 2, 1, 1, "a")] == "b"
+        deltas = "".join(value for kind, path, value in events if kind == "delta")
+        assert deltas == values[("improved_cv",)] == DOCUMENT["improved_cv"]
+
+
+def test_ascii_escaped_output_is_decoded():
+    parser = IncrementalJSONParser()
+    events = [e for chunk in chunked(json.dumps(DOCUMENT), random.Random(1)) for e in parser.feed(chunk)]
+    assert ("value", ("improved_cv",), DOCUMENT["improved_cv"]) in events
+
+
+def test_analysis_streams_fields_recommendations_and_cv_chunks(llm_server, result_cache, upload, resume_text,
+                                                               job_description):
+    llm_server()
+    for split in (False, True):
+        events = list(analyze_resume_stream(upload(resume_text), job_description, api_key="stub", use_mock=False,
+                                            cache=result_cache, bypass_cache=True, split=split))
+        kinds = [kind for kind, _ in events]
+        assert kinds[0] == "resume_text" and kinds[-1] == "done"
+        done = events[-1][1]
+        fields = dict(payload for kind, payload in events if kind == "field")
+        assert fields["score"] == llm_stub.STUB_RESULT["score"] == done["score"]
+        recommendations = [payload for kind, payload in events if kind == "recommendation"]
+        assert ("Impact & Metrics", "Quantify latency improvements") in recommendations
+        chunks = [payload for kind, payload in events if kind == "improved_cv"]
+        assert len(chunks) > 1  # the CV arrives in pieces, not at the end
+        assert "".join(chunks) == llm_stub.STUB_RESULT["improved_cv"] == done["improved_cv"]
+        assert kinds.index("field") < kinds.index("done")
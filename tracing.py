@@ -0,0 +1,290 @@
+"""
+Lightweight timing traces for the parse → prompt → LLM → render pipeline.
+
+    @traced("analysis")
+    def analyze(...):
+        with span("parse"):
+            ...
+        with span("llm", model=MODEL) as s:
+            response = client.chat(...)
+            s.set(**token_usage(response.usage))
+
+A trace groups the spans of one run; spans opened outside a trace still count towards the
+per-stage totals. The last MAX_TRACES traces and the totals can be exported as JSON or
+Prometheus text: set CV_MATCHER_TRACE_FILE to have them written after every trace
+(Prometheus format for a ".prom" file, JSON otherwise), or call `serve_metrics(port)` for
+/metrics and /traces endpoints.
+"""
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+MAX_TRACES = 50
+TRACE_FILE = os.environ.get("CV_MATCHER_TRACE_FILE")
+
+_current = contextvars.ContextVar("cv_matcher_trace", default=None)
+_depth = contextvars.ContextVar("cv_matcher_span_depth", default=0)  # per context, so threads nest correctly
+
+
+class Span:
+    __slots__ = ("name", "depth", "offset", "duration", "attrs")
+
+    def __init__(self, name, depth=0, attrs=None):
+        self.name = name
+        self.depth = depth
+        self.offset = 0.0
+        self.duration = None
+        self.attrs = dict(attrs or {})
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "depth": self.depth, "offset_s": round(self.offset, 6),
+                "duration_s": round(self.duration or 0.0, 6), **self.attrs}
+
+
+class Trace:
+    def __init__(self, name, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.started_at = time.time()
+        self.duration = None
+        self.spans = []
+        self._t0 = time.perf_counter()
+        self._previous = None  # the trace that was current before this one
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def stages(self) -> dict:
+        """Seconds per span name (nested spans are also counted in their parent)."""
+        totals = {}
+        for s in self.spans:
+            totals[s.name] = totals.get(s.name, 0.0) + (s.duration or 0.0)
+        return totals
+
+    def tokens(self) -> dict:
+        totals = {"prompt_tokens": 0, "completion_tokens": 0}
+        for s in self.spans:
+            for key in totals:
+                totals[key] += s.attrs.get(key) or 0
+        return totals
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_s": round(self.duration or 0.0, 6),
+            **self.attrs,
+            **self.tokens(),
+            "spans": [s.to_dict() for s in sorted(self.spans, key=lambda s: s.offset)],
+        }
+
+
+class Recorder:
+    """Thread-safe store of recent traces and per-stage totals."""
+
+    def __init__(self, max_traces=MAX_TRACES):
+        self._lock = threading.Lock()
+        self.traces = deque(maxlen=max_traces)
+        self.stages = {}  # name -> [count, total seconds, max seconds]
+        self.tokens = {"prompt_tokens": 0, "completion_tokens": 0}
+        self.trace_counts = {}
+
+    def observe(self, span: Span):
+        with self._lock:
+            stats = self.stages.setdefault(span.name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += span.duration
+            stats[2] = max(stats[2], span.duration)
+            for key in self.tokens:
+                self.tokens[key] += span.attrs.get(key) or 0
+
+    def finish(self, trace: Trace):
+        with self._lock:
+            self.traces.append(trace)
+            self.trace_counts[trace.name] = self.trace_counts.get(trace.name, 0) + 1
+
+    def recent(self, n=None, name=None) -> list:
+        with self._lock:
+            traces = [t for t in self.traces if name is None or t.name == name]
+        return traces[-n:] if n else traces
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stages = {name: {"count": c, "total_s": round(total, 6), "max_s": round(peak, 6)}
+                      for name, (c, total, peak) in self.stages.items()}
+            return {"stages": stages, "tokens": dict(self.tokens), "traces_total": dict(self.trace_counts),
+                    "traces": [t.to_dict() for t in self.traces]}
+
+    def reset(self):
+        with self._lock:
+            self.traces.clear()
+            self.stages.clear()
+            self.trace_counts.clear()
+            self.tokens = dict.fromkeys(self.tokens, 0)
+
+
+recorder = Recorder()
+
+
+def begin(name: str, **attrs) -> Trace:
+    """Start a trace and make it current; pair with `end`. Prefer `trace()` where a block fits."""
+    t = Trace(name, **attrs)
+    t._previous = _current.get()
+    _current.set(t)
+    return t
+
+
+def end(t: Trace):
+    t.duration = time.perf_counter() - t._t0
+    # Restore by value rather than with a token: a generator may be closed from another context.
+    _current.set(t._previous)
+    t._previous = None
+    recorder.finish(t)
+    if TRACE_FILE:
+        write(TRACE_FILE)
+
+
+@contextmanager
+def trace(name: str, **attrs):
+    t = begin(name, **attrs)
+    try:
+        yield t
+    except Exception as e:
+        t.set(error=type(e).__name__)
+        raise
+    finally:
+        end(t)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time a stage of the current trace (if any); `.set()` adds attributes such as token counts."""
+    t = _current.get()
+    depth = _depth.get()
+    s = Span(name, depth, attrs)
+    _depth.set(depth + 1)
+    start = time.perf_counter()
+    try:
+        yield s
+    finally:
+        s.duration = time.perf_counter() - start
+        _depth.set(depth)
+        if t:
+            s.offset = start - t._t0
+            t.spans.append(s)
+        recorder.observe(s)
+
+
+def traced(name: str):
+    """Decorator running each call (or each iteration of a generator function) in its own trace."""
+    def decorator(fn):
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def gen_wrapper(*args, **kwargs):
+                with trace(name):
+                    yield from fn(*args, **kwargs)
+            return gen_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with trace(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_trace():
+    return _current.get()
+
+
+def token_usage(usage) -> dict:
+    """Prompt / completion token counts from an OpenAI `usage` object (empty when missing)."""
+    if usage is None:
+        return {}
+    return {"prompt_tokens": usage.prompt_tokens or 0, "completion_tokens": usage.completion_tokens or 0}
+
+
+def percentiles(values, prefix: str) -> dict:
+    """`{prefix}_p50`, `_p95` and `_max` of `values` by nearest rank, rounded to ms (None when empty)."""
+    values = sorted(values)
+
+    def pct(p):
+        return round(values[min(len(values) - 1, int(p * len(values)))], 3) if values else None
+
+    return {f"{prefix}_p50": pct(0.5), f"{prefix}_p95": pct(0.95), f"{prefix}_max": pct(1.0)}
+
+
+def to_json() -> str:
+    return json.dumps(recorder.snapshot(), indent=2)
+
+
+def to_prometheus() -> str:
+    snapshot = recorder.snapshot()
+    lines = [
+        "# HELP cv_matcher_stage_seconds Time spent in each pipeline stage.",
+        "# TYPE cv_matcher_stage_seconds summary",
+    ]
+    for name, stats in sorted(snapshot["stages"].items()):
+        lines.append(f'cv_matcher_stage_seconds_count{{stage="{name}"}} {stats["count"]}')
+        lines.append(f'cv_matcher_stage_seconds_sum{{stage="{name}"}} {stats["total_s"]}')
+    lines += ["# HELP cv_matcher_stage_seconds_max Slowest observation of each stage.",
+              "# TYPE cv_matcher_stage_seconds_max gauge"]
+    for name, stats in sorted(snapshot["stages"].items()):
+        lines.append(f'cv_matcher_stage_seconds_max{{stage="{name}"}} {stats["max_s"]}')
+    lines += ["# HELP cv_matcher_llm_tokens_total Tokens reported by the OpenAI API.",
+              "# TYPE cv_matcher_llm_tokens_total counter"]
+    for key, value in snapshot["tokens"].items():
+        lines.append(f'cv_matcher_llm_tokens_total{{kind="{key.replace("_tokens", "")}"}} {value}')
+    lines += ["# HELP cv_matcher_traces_total Finished traces.", "# TYPE cv_matcher_traces_total counter"]
+    for name, count in sorted(snapshot["traces_total"].items()):
+        lines.append(f'cv_matcher_traces_total{{name="{name}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+
+def write(path: str):
+    """Write the snapshot to `path`: Prometheus text for ".prom" files, JSON otherwise."""
+    body = to_prometheus() if path.endswith(".prom") else to_json()
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(body)
+    os.replace(tmp, path)
+
+
+def serve_metrics(port: int = 9108, host: str = "127.0.0.1"):
+    """Serve /metrics (Prometheus text) and /traces (JSON) from a daemon thread."""
+    # http.server pulls in the email package; only import it when metrics are served.
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") == "/metrics":
+                body, content_type = to_prometheus(), "text/plain; version=0.0.4"
+            elif self.path.rstrip("/") == "/traces":
+                body, content_type = to_json(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="trace-metrics", daemon=True).start()
+    return server
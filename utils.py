@@ -1,12 +1,67 @@
 import re
 from collections import Counter
 
+from cv_markdown import Blank, BoldLine, Bullet, Contact, Heading, parse_cv
+
+# English function words plus words that appear in nearly every job posting.
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each etc few for from further had has have
+having he her here hers herself him himself his how i if in into is it its itself just may me might more
+most must my myself no nor not now of off on once only or other our ours ourselves out over own per same
+shall she should so some such than that the their theirs them themselves then there these they this those
+through to too under until up upon us very via was we were what when where which while who whom why will
+with within without would you your yours yourself yourselves
+ability able across candidate candidates company etc experience including join looking new role strong
+team using well work working years year plus preferred required requirements responsibilities skills
+""".split())
+
+WORD_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+BULLET_PATTERN = re.compile(r"^\s*([-*•▪◦–]|\d+[.)])\s+")  # a list marker ("-", "•", "1.", "2)") and its space
+_SUFFIXES = ("izations", "ization", "ational", "fulness", "iveness", "ations", "ation", "ments", "ment",
+             "ness", "ings", "ing", "ities", "ity", "ies", "ers", "er", "ed", "ly", "es", "s")
+
+
+def tokenize(text: str):
+    """Lowercase word tokens; keeps tech spellings like c++, c#, node.js and ci/cd parts intact."""
+    return WORD_PATTERN.findall(text.lower())
+
+
+def stem(word: str) -> str:
+    """Light suffix-stripping stemmer: engineer/engineers/engineering all map to "engin"."""
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    for attempt in range(2):
+        for suffix in _SUFFIXES:
+            # Plurals are only stripped once, and never from words ending in "ss".
+            if suffix in ("s", "es") and (attempt or word.endswith("ss")):
+                continue
+            if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+                word = word[:-len(suffix)]
+                break
+        else:
+            break
+    if len(word) > 4 and word.endswith("e"):
+        word = word[:-1]
+    if len(word) >= 4 and word[-1] == word[-2] and word[-1] not in "sl":
+        word = word[:-1]
+    return word
+
+
+def ngrams(tokens, n_max: int = 3):
+    """All 1..n_max-grams that neither start nor end with a stopword, as space-joined strings."""
+    for n in range(1, n_max + 1):
+        for i in range(len(tokens) - n + 1):
+            gram = tokens[i:i + n]
+            if gram[0] in STOPWORDS or gram[-1] in STOPWORDS:
+                continue
+            yield " ".join(gram)
+
 
 def extract_keywords(text: str, top_n: int = 20):
     """Very simple keyword extraction using word frequency."""
-    words = re.findall(r'\b\w+\b', text.lower())
-    stopwords = {"and", "or", "the", "a", "an", "to", "for", "of", "in", "with", "on", "at"}
-    words = [w for w in words if w not in stopwords and len(w) > 2]
+    words = tokenize(text)
+    words = [w for w in words if w not in STOPWORDS and len(w) > 2 and not w.isdigit()]
     freq = Counter(words)
     return [word for word, count in freq.most_common(top_n)]
 
@@ -21,44 +76,28 @@ def normalize_cv_markdown(md_text: str) -> str:
     - Roles/Companies as '### Role/Company'
     - Lists standardized with '-'
     """
-    lines = md_text.splitlines()
     normalized = []
     contacts_lines = []
 
-    for line in lines:
-        line = line.strip()
-        if not line:
+    for node in parse_cv(md_text).nodes:
+        if isinstance(node, Blank):
             normalized.append("")
-            continue
-
-        # Normalize headers
-        if re.match(r"^#{1,6}\s", line):
-            content = re.sub(r"^#{1,6}\s+", "", line)
+        elif isinstance(node, Heading):
+            content = node.text
             if "Name" in content or "PhD" in content or re.match(r"^[A-Z][a-z]+\s[A-Z][a-z]+", content):
                 normalized.append(f"# {content}")  # Name
             else:
                 normalized.append(f"## {content}")  # Section
-            continue
-
-        # Merge bold role/company lines to ### format
-        if line.startswith("**") and line.endswith("**"):
-            content = line.strip("* ")
-            normalized.append(f"### {content}")
-            continue
-
-        # Contact info
-        if line.startswith(("📧", "📞", "🌐")):
-            contacts_lines.append(line)
-            continue
-
-        # Normalize lists
-        if line.startswith(("-", "*")):
-            content = line.lstrip("-* ").strip()
-            normalized.append(f"- {content}")
-            continue
-
-        # Default: just clean text
-        normalized.append(line)
+        elif isinstance(node, BoldLine) and node.closed:
+            # Merge bold role/company lines to ### format
+            normalized.append(f"### {node.line.strip('* ')}")
+        elif isinstance(node, Contact):
+            contacts_lines.append(node.line)
+        elif isinstance(node, (Bullet, BoldLine)):
+            # Normalize lists (a line only opening in bold counts as one, as before)
+            normalized.append(f"- {node.line.lstrip('-* ').strip()}")
+        else:
+            normalized.append(node.line)
 
     # Combine contacts into single line after name
     if contacts_lines: